@@ -0,0 +1,378 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Performance measurements of the probing, parsing and plotting code.
+Run the file to print the results, no network access is needed.
+"""
+import gc
+import numpy as np
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from threading import Thread
+from time import time
+from timeit import default_timer
+
+from multiping import multi_ping
+import ping_parser
+import ping_stats
+import bus
+import compress
+import decimate
+import heatmap
+import replay
+import rollup
+import sketch
+import store
+
+
+def cpu_time():
+    """
+    Returns the user + system cpu time used by this process in seconds
+    """
+    times = os.times()
+    return times[0] + times[1]
+
+
+def bench_multi_ping(counts=(100, 1000, 4000), duration=5.0, interval=1.0):
+    """
+    Pings loopback addresses with multi_ping and measures the cost per
+    target. Every address in 127.0.0.0/8 answers on the loopback interface.
+    Returns a list of (targets, samples, cpu us/sample, objects/target).
+
+    Keyword arguments:
+    counts -- (optional) number of targets to measure with
+    duration -- (optional) seconds to ping for each count (default: 5.0)
+    interval -- (optional) seconds between requests to a target
+    """
+    output = []
+    for count in counts:
+        servers = ['127.{0:d}.{1:d}.{2:d}'.format(i >> 16 & 0xFF,
+                    i >> 8 & 0xFF, i & 0xFF) for i in range(1, count + 1)]
+        gc.collect()
+        objects = len(gc.get_objects())
+        samples = 0
+        cpu_start = cpu_time()
+        end = time() + duration
+        with multi_ping(servers, 1000, interval) as pinger:
+            for server, (ms, date) in pinger:
+                samples += 1
+                if date > end:
+                    break
+            gc.collect()
+            objects = len(gc.get_objects()) - objects
+        cpu = cpu_time() - cpu_start
+        output.append((count, samples, cpu * 1e6 / max(samples, 1),
+                        objects / float(count)))
+    return output
+
+
+#one typical line per supported ping program
+PING_OUTPUT = {
+    'windows': b'Reply from 192.36.125.18: bytes=32 time=12ms TTL=55\r\n',
+    'iputils': b'64 bytes from 192.36.125.18: icmp_seq=7 ttl=55 '
+                b'time=12.3 ms\n',
+    'busybox': b'64 bytes from 192.36.125.18: seq=7 ttl=55 time=12.3 ms\n',
+    'timeout': b'Request timed out.\r\n',
+    }
+
+def bench_parser(lines=100000, chunk_size=4096):
+    """
+    Measures the parsing throughput for each of the supported outputs, both
+    line by line and chunk by chunk as read from a pipe.
+    Returns a list of (format, lines/s by line, lines/s by chunk).
+
+    Keyword arguments:
+    lines -- (optional) number of lines to parse (default: 100000)
+    chunk_size -- (optional) bytes per chunk fed to ping_stream
+    """
+    output = []
+    for name, line in sorted(PING_OUTPUT.items()):
+        start = default_timer()
+        for i in range(lines):
+            ping_parser.parse_line(line)
+        by_line = lines / (default_timer() - start)
+
+        data = line * lines
+        stream = ping_parser.ping_stream()
+        start = default_timer()
+        count = 0
+        for i in range(0, len(data), chunk_size):
+            count += len(stream.feed(data[i:i + chunk_size]))
+        by_chunk = count / (default_timer() - start)
+        output.append((name, by_line, by_chunk))
+    return output
+
+
+def bench_nan_line_creator(lengths=(1000, 10000, 100000), loss=0.01,
+        repeat=100):
+    """
+    Measures the time to create the timeout line for histories with random
+    timeouts. Returns a list of (samples, us/call).
+
+    Keyword arguments:
+    lengths -- (optional) history lengths to measure with
+    loss -- (optional) fraction of samples that are timeouts (default: 0.01)
+    repeat -- (optional) calls per length (default: 100)
+    """
+    import ping_gui
+    output = []
+    random = np.random.RandomState(0)
+    for length in lengths:
+        x_axis = np.arange(length, dtype=np.float64) - length
+        y_axis = random.uniform(10, 30, length)
+        y_axis[random.uniform(size=length) < loss] = np.nan
+        start = default_timer()
+        for i in range(repeat):
+            ping_gui.nan_line_creator(x_axis, y_axis)
+        output.append((length, (default_timer() - start) * 1e6 / repeat))
+    return output
+
+
+def bench_subplots(counts=(1, 10, 100)):
+    """
+    Measures adding and removing sub-plots of a Graph in a frame that
+    isn't shown, each done with a single layout and draw. The goal is well
+    under a second for 1 to 100 sub-plots. With matplotlib 2.1 adding 100
+    took about 4.6 s when last checked, all but a little of it spent by
+    matplotlib creating the axes (28 ms each) and drawing them.
+    Returns a list of (sub-plots, ms to add, ms to remove).
+
+    Keyword arguments:
+    counts -- (optional) numbers of sub-plots to add and remove
+    """
+    import wx
+    import wxplot
+    #wx needs an app before any window is made
+    app = wx.App(False)
+    frame = wx.Frame(None, size=(1000, 800))
+    graph = wxplot.Graph(wx.Panel(frame))
+    output = []
+    for count in counts:
+        start = default_timer()
+        graph.add_subplots(count)
+        added = default_timer() - start
+        start = default_timer()
+        graph.remove_subplots(count)
+        output.append((count, added * 1000,
+                        (default_timer() - start) * 1000))
+    frame.Destroy()
+    return output
+
+
+def bench_sliding_stats(lengths=(1000, 10000, 100000), samples=50000):
+    """
+    Measures the cost of adding a sample to sliding_stats for different
+    history lengths, with a window of the last 10 samples as in the GUI.
+    Returns a list of (history length, us/sample).
+
+    Keyword arguments:
+    lengths -- (optional) history lengths to measure with
+    samples -- (optional) number of samples to add (default: 50000)
+    """
+    output = []
+    random = np.random.RandomState(0)
+    data = random.uniform(10, 30, samples)
+    data[random.uniform(size=samples) < 0.01] = np.nan
+    data = data.tolist()
+    for length in lengths:
+        stats = ping_stats.sliding_stats([length, 10])
+        start = default_timer()
+        for ping_ms in data:
+            stats.add(ping_ms)
+        output.append((length, (default_timer() - start) * 1e6 / samples))
+    return output
+
+
+def bench_decimate(lengths=(10000, 100000, 1000000), columns=800, frames=100):
+    """
+    Measures the time per frame to downsample a scrolling history, one new
+    sample per frame. Returns a list of (samples, points plotted, us/frame).
+
+    Keyword arguments:
+    lengths -- (optional) history lengths to measure with
+    columns -- (optional) pixel width of the plot (default: 800)
+    frames -- (optional) number of frames to draw (default: 100)
+    """
+    output = []
+    random = np.random.RandomState(0)
+    for length in lengths:
+        ping_date = np.arange(length + frames, dtype=np.float64)
+        ping_ms = random.uniform(10, 30, length + frames)
+        ping_ms[random.uniform(size=length + frames) < 0.01] = np.nan
+        decimator = decimate.minmax_decimator()
+        start = default_timer()
+        for end in range(length, length + frames):
+            x_out, y_out = decimator.decimate(ping_date[end - length:end],
+                    ping_ms[end - length:end], end - length, end, columns)
+        output.append((length, len(x_out),
+                        (default_timer() - start) * 1e6 / frames))
+    return output
+
+
+def bench_compress(samples=100000, interval=1.0):
+    """
+    Measures the size and the cost of compressing pings at a fixed interval
+    with a few ms of jitter and 1 % timeouts.
+    Returns (bytes/sample, us/sample to append, us/sample to query).
+
+    Keyword arguments:
+    samples -- (optional) number of pings to compress (default: 100000)
+    interval -- (optional) seconds between the pings (default: 1.0)
+    """
+    random = np.random.RandomState(0)
+    ping_date = time() + np.arange(samples) * interval + \
+                random.uniform(0, 0.003, samples)
+    ping_ms = random.gamma(4, 3, samples) + 10
+    ping_ms[random.uniform(size=samples) < 0.01] = np.nan
+    series = compress.block_series()
+    start = default_timer()
+    for date, value in zip(ping_date.tolist(), ping_ms.tolist()):
+        series.append(date, value)
+    append = default_timer() - start
+    start = default_timer()
+    series.query()
+    query = default_timer() - start
+    return (series.nbytes() / float(samples), append * 1e6 / samples,
+            query * 1e6 / samples)
+
+
+def bench_startup(repeat=10):
+    """
+    Measures the wall time of python ping_cli.py --help, which imports
+    everything that ping_cli needs but doesn't ping.
+    Returns (best ms, median ms).
+
+    Keyword arguments:
+    repeat -- (optional) number of runs (default: 10)
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'ping_cli.py')
+    times = []
+    with open(os.devnull, 'w') as devnull:
+        for i in range(repeat):
+            start = default_timer()
+            subprocess.check_call([sys.executable, script, '--help'],
+                                    stdout=devnull)
+            times.append((default_timer() - start) * 1000)
+    return min(times), float(np.median(times))
+
+
+def _plot_consumer(pings, history=3600):
+    """
+    Updates the stats and plot data of every host like ping_gui.ping_it,
+    without the plot
+    """
+    traces = {}
+    for host, (ping_ms, ping_date) in pings:
+        if not host in traces:
+            traces[host] = (ping_stats.sliding_stats([history, 10]),
+                            sketch.sketch_buckets(60, history // 60 + 2),
+                            rollup.rollup_pyramid(),
+                            compress.block_series(retention=86400),
+                            heatmap.latency_heatmap(history / 200.0, 200))
+        stats, buckets, pyramid, recent, rolling = traces[host]
+        stats.add(ping_ms)
+        buckets.add(ping_date, ping_ms)
+        pyramid.add(ping_date, ping_ms)
+        recent.append(ping_date, ping_ms)
+        rolling.add(ping_date, ping_ms)
+
+
+def _store_consumer(pings, root):
+    """
+    Stores the pings of every host like ping_gui.store_it
+    """
+    storage = {}
+    for host, (ping_ms, ping_date) in pings:
+        if not host in storage:
+            storage[host] = store.series_writer(store.series_path(root, host))
+        storage[host].append(ping_date, ping_ms)
+    for writer in storage.values():
+        writer.close()
+
+
+def bench_pipeline(hosts=10, rounds=10000):
+    """
+    Runs made up pings, and a replay of them, through the bus to the
+    stats, plot data and storage of the GUI, as fast as they can go.
+    Subscriptions block, so every ping reaches every consumer.
+    Returns a list of (source, samples, samples/s, cpu us/sample).
+
+    Keyword arguments:
+    hosts -- (optional) number of made up hosts (default: 10)
+    rounds -- (optional) number of pings of each host (default: 10000)
+    """
+    output = []
+    directory = tempfile.mkdtemp()
+    try:
+        recording = os.path.join(directory, 'recording.tsv')
+        servers = ['host{0:d}'.format(i) for i in range(hosts)]
+        sources = [('synthetic', replay.recorder(replay.synthetic(servers,
+                        1000, rounds=rounds, speed=None, start=0), recording)),
+                    ('replay', replay.replay(recording, None))]
+        for name, prober in sources:
+            root = os.path.join(directory, name)
+            sample_bus = bus.sample_bus()
+            threads = [Thread(target=_plot_consumer,
+                            args=(sample_bus.subscribe('plot', 4096,
+                                                        bus.BLOCK),)),
+                        Thread(target=_store_consumer,
+                            args=(sample_bus.subscribe('storage', 4096,
+                                                        bus.BLOCK), root))]
+            for thread in threads:
+                thread.start()
+            cpu_start = cpu_time()
+            start = default_timer()
+            try:
+                sample_bus.run(prober)
+            finally:
+                sample_bus.close()
+                for thread in threads:
+                    thread.join()
+            elapsed = default_timer() - start
+            cpu = cpu_time() - cpu_start
+            samples = hosts * rounds
+            output.append((name, samples, samples / elapsed,
+                            cpu * 1e6 / samples))
+    finally:
+        shutil.rmtree(directory)
+    return output
+
+
+if __name__ == '__main__':
+    print('multi_ping: targets, samples, cpu us/sample, objects/target')
+    for result in bench_multi_ping():
+        print('{0:8d} {1:8d} {2:10.1f} {3:8.1f}'.format(*result))
+
+    print('parser: format, lines/s by line, lines/s by chunk')
+    for result in bench_parser():
+        print('{0:>8s} {1:12.0f} {2:12.0f}'.format(*result))
+
+    print('nan_line_creator: samples, us/call')
+    for result in bench_nan_line_creator():
+        print('{0:8d} {1:10.1f}'.format(*result))
+
+    print('sub-plots: added and removed, ms to add, ms to remove')
+    for result in bench_subplots():
+        print('{0:8d} {1:10.1f} {2:10.1f}'.format(*result))
+
+    print('sliding_stats: history length, us/sample')
+    for result in bench_sliding_stats():
+        print('{0:8d} {1:10.2f}'.format(*result))
+
+    print('decimate: samples, points plotted, us/frame')
+    for result in bench_decimate():
+        print('{0:8d} {1:8d} {2:10.1f}'.format(*result))
+
+    print('compress: bytes/sample, us/sample append, us/sample query')
+    print('{0:8.2f} {1:10.2f} {2:10.2f}'.format(*bench_compress()))
+
+    print('start up of ping_cli.py --help: best ms, median ms')
+    print('{0:8.0f} {1:8.0f}'.format(*bench_startup()))
+
+    print('pipeline: source, samples, samples/s, cpu us/sample')
+    for result in bench_pipeline():
+        print('{0:>10s} {1:8d} {2:10.0f} {3:10.1f}'.format(*result))
@@ -0,0 +1,217 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Fan-out of ping results from the probes to any number of consumers.
+
+The probes publish (host, (ping_time, date)) samples on a sample_bus, and
+every consumer, e.g. the plot, the storage or an alert, reads them from a
+subscription of its own. Each subscription is a bounded queue with an
+overflow policy, so a stalled consumer can't make the others wait or let
+samples pile up without bound:
+
+DROP_OLDEST -- the oldest queued sample is dropped for the new one
+COALESCE -- only the latest queued sample of each host is kept, when the
+    queue is full of other hosts the oldest is dropped
+BLOCK -- the publisher waits until the consumer has made room, for
+    consumers that must see every sample. This slows all other consumers
+    down to the pace of this one.
+"""
+from collections import deque, OrderedDict
+from threading import Condition, Lock
+
+DROP_OLDEST = 'drop_oldest'
+COALESCE = 'coalesce'
+BLOCK = 'block'
+POLICIES = (DROP_OLDEST, COALESCE, BLOCK)
+
+
+class subscription():
+    """
+    Bounded queue of samples for one consumer. Iterating over it returns
+    the samples until it is closed and empty.
+
+    attributes:
+    name -- the name of the consumer, used in reports
+    capacity -- the largest number of queued samples
+    policy -- what to do with a new sample when the queue is full
+    received -- the number of samples published to the subscription
+    taken -- the number of samples read by the consumer
+    dropped -- the number of samples dropped or replaced
+    """
+
+    def __init__(self, name, capacity=1024, policy=DROP_OLDEST):
+        """
+        Keyword arguments:
+        name -- the name of the consumer
+        capacity -- (optional) the largest number of queued samples
+            (default: 1024)
+        policy -- (optional) DROP_OLDEST, COALESCE or BLOCK
+            (default: DROP_OLDEST)
+        """
+        if not policy in POLICIES:
+            raise ValueError("Unknown overflow policy: {0!s}".format(policy))
+        self.name = name
+        self.capacity = int(capacity)
+        self.policy = policy
+        self.received = self.taken = self.dropped = 0
+        self.closed = False
+        #coalesced samples are kept by host in the order they arrived
+        self._queue = OrderedDict() if policy == COALESCE else deque()
+        self._changed = Condition(Lock())
+
+    @property
+    def lag(self):
+        """
+        The number of samples waiting for the consumer
+        """
+        return len(self._queue)
+
+    def _pop(self):
+        """
+        Removes and returns the oldest queued sample
+        """
+        if self.policy == COALESCE:
+            return self._queue.popitem(last=False)[1]
+        return self._queue.popleft()
+
+    def put(self, sample):
+        """
+        Queues a sample, following the policy if the queue is full.
+        Samples put after closing are ignored.
+
+        Keyword arguments:
+        sample -- (host, (ping_time, date))
+        """
+        with self._changed:
+            if self.closed:
+                return
+            self.received += 1
+            if self.policy == COALESCE and sample[0] in self._queue:
+                #keeps its place in the queue
+                self._queue[sample[0]] = sample
+                self.dropped += 1
+                return
+            while len(self._queue) >= self.capacity:
+                if self.policy == BLOCK:
+                    self._changed.wait()
+                    if self.closed:
+                        return
+                else:
+                    self._pop()
+                    self.dropped += 1
+            if self.policy == COALESCE:
+                self._queue[sample[0]] = sample
+            else:
+                self._queue.append(sample)
+            self._changed.notify_all()
+
+    def get(self):
+        """
+        Returns the oldest queued sample, waiting for one if the queue is
+        empty. Returns None once the subscription is closed and empty.
+        """
+        with self._changed:
+            while not self._queue and not self.closed:
+                self._changed.wait()
+            if not self._queue:
+                return None
+            sample = self._pop()
+            self.taken += 1
+            #a blocked publisher may go on
+            self._changed.notify_all()
+            return sample
+
+    def __iter__(self):
+        while True:
+            sample = self.get()
+            if sample == None:
+                return
+            yield sample
+
+    def close(self):
+        """
+        Stops accepting samples, the queued samples can still be read
+        """
+        with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+
+
+class sample_bus():
+    """
+    Publishes the samples of one or more probes to all subscriptions
+
+    attributes:
+    subscriptions -- list of the open subscriptions
+    """
+
+    def __init__(self):
+        self.subscriptions = []
+        self._lock = Lock()
+
+    def subscribe(self, name, capacity=1024, policy=DROP_OLDEST):
+        """
+        Returns a new subscription that gets all samples published from
+        now on
+
+        Keyword arguments:
+        name -- the name of the consumer
+        capacity -- (optional) the largest number of queued samples
+            (default: 1024)
+        policy -- (optional) DROP_OLDEST, COALESCE or BLOCK
+            (default: DROP_OLDEST)
+        """
+        added = subscription(name, capacity, policy)
+        with self._lock:
+            #a new list, so that publish never needs the lock
+            self.subscriptions = self.subscriptions + [added]
+        return added
+
+    def unsubscribe(self, removed):
+        """
+        Closes a subscription and stops publishing to it
+        """
+        with self._lock:
+            self.subscriptions = [subscribed for subscribed in
+                                self.subscriptions if not subscribed is removed]
+        removed.close()
+
+    def publish(self, sample):
+        """
+        Puts a sample in all subscriptions
+
+        Keyword arguments:
+        sample -- (host, (ping_time, date))
+        """
+        for subscribed in self.subscriptions:
+            subscribed.put(sample)
+
+    def run(self, prober, stop=None):
+        """
+        Publishes the samples of a probe until it ends or stop is set
+
+        Keyword arguments:
+        prober -- context manager yielding (host, (ping_time, date)), see
+            ping_cli.probe
+        stop -- (optional) threading.Event to stop at (default: None)
+        """
+        with prober as pinger:
+            for sample in pinger:
+                self.publish(sample)
+                if not stop == None and stop.isSet():
+                    break
+
+    def close(self):
+        """
+        Closes all subscriptions, the consumers stop when they have read
+        the queued samples
+        """
+        for subscribed in self.subscriptions:
+            subscribed.close()
+
+    def report(self):
+        """
+        Returns a list with (name, lag, dropped) of each subscription
+        """
+        return [(subscribed.name, subscribed.lag, subscribed.dropped)
+                for subscribed in self.subscriptions]
@@ -0,0 +1,332 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Compressed blocks of ping results in memory.
+
+The dates are stored in milliseconds as the difference between consecutive
+differences, which is zero or close to it for pings sent at a fixed
+interval. The ping times are stored as 32 bit floats XOR'ed with the
+previous ping time, keeping only the bits that differ (Pelkonen et al.,
+Gorilla, VLDB 2015). Every ping starts with a flag bit that is set for a
+timeout, timeouts have no ping time.
+
+A ping at 1 Hz takes about 5 bytes this way instead of the 16 bytes of a
+ring_buffer, so a day of pings of a thousand hosts fits in a few hundred
+MB. Blocks are sealed when full and only decoded when queried.
+"""
+from collections import deque
+from math import isnan
+from numpy import NaN
+import numpy as np
+import struct
+from threading import Lock
+
+#value bits of the delta of delta after 1 to 4 prefix bits
+DOD_BITS = (7, 9, 12, 64)
+_FLOAT = struct.Struct('<f')
+_UINT = struct.Struct('<I')
+
+
+class _bit_writer():
+    """
+    Appends values of any number of bits to a bytearray
+    """
+    def __init__(self):
+        self.data = bytearray()
+        #bits not yet making up a whole byte
+        self._word = 0
+        self._bits = 0
+
+    def write(self, value, bits):
+        """
+        Writes the lowest bits of value, negative values in two's complement
+        """
+        self._word = self._word << bits | value & ((1 << bits) - 1)
+        self._bits += bits
+        while self._bits >= 8:
+            self._bits -= 8
+            self.data.append(self._word >> self._bits & 0xFF)
+        self._word &= (1 << self._bits) - 1
+
+    def getvalue(self):
+        """
+        Returns the bytes written so far, the last byte padded with zeros
+        """
+        if self._bits:
+            return bytes(self.data +
+                        bytearray([self._word << (8 - self._bits)]))
+        return bytes(self.data)
+
+
+class _bit_reader():
+    """
+    Reads values written by _bit_writer
+    """
+    def __init__(self, data):
+        self.data = bytearray(data)
+        self._pos = 0
+        self._word = 0
+        self._bits = 0
+
+    def read(self, bits):
+        while self._bits < bits:
+            self._word = self._word << 8 | self.data[self._pos]
+            self._pos += 1
+            self._bits += 8
+        self._bits -= bits
+        value = self._word >> self._bits
+        self._word &= (1 << self._bits) - 1
+        return value
+
+    def read_signed(self, bits):
+        value = self.read(bits)
+        if value >= 1 << (bits - 1):
+            value -= 1 << bits
+        return value
+
+
+class sample_block():
+    """
+    Immutable compressed pings, created by block_encoder
+
+    attributes:
+    data -- the encoded pings
+    count -- the number of pings
+    first_date -- the date of the first ping, rounded to ms
+    last_date -- the date of the last ping, rounded to ms
+    """
+
+    def __init__(self, data, count, first_ms, last_ms):
+        """
+        Keyword arguments:
+        data -- the encoded pings
+        count -- the number of pings
+        first_ms -- the date of the first ping in ms
+        last_ms -- the date of the last ping in ms
+        """
+        self.data = data
+        self.count = count
+        self.first_ms = first_ms
+        self.first_date = first_ms / 1000.0
+        self.last_date = last_ms / 1000.0
+
+    def __len__(self):
+        return self.count
+
+    def decode(self):
+        """
+        Returns arrays with the dates and ping times, NaN for timeouts
+        """
+        reader = _bit_reader(self.data)
+        ping_date = np.empty(self.count, dtype=np.float64)
+        ping_ms = np.empty(self.count, dtype=np.float64)
+        date_ms = self.first_ms
+        delta = 0
+        value = 0
+        last_ms = 0.0
+        leading = trailing = 0
+        for i in xrange(self.count):
+            if i and reader.read(1):
+                ones = 1
+                while ones < len(DOD_BITS) and reader.read(1):
+                    ones += 1
+                delta += reader.read_signed(DOD_BITS[ones - 1])
+            date_ms += delta
+            ping_date[i] = date_ms
+
+            if reader.read(1):
+                ping_ms[i] = NaN
+                continue
+            if reader.read(1):
+                if reader.read(1):
+                    leading = reader.read(5)
+                    trailing = 32 - leading - reader.read(5) - 1
+                value ^= reader.read(32 - leading - trailing) << trailing
+                last_ms = _FLOAT.unpack(_UINT.pack(value))[0]
+            ping_ms[i] = last_ms
+        return ping_date / 1000.0, ping_ms
+
+
+class block_encoder():
+    """
+    Compresses pings as they arrive into the format read by
+    sample_block.decode
+    """
+
+    def __init__(self):
+        self.writer = _bit_writer()
+        self.count = 0
+        self.first_ms = self.last_ms = 0
+        self._delta = 0
+        #bits of the latest reply and the meaningful bits of its XOR
+        self._value = 0
+        self._leading = self._trailing = 32
+
+    def append(self, ping_date, ping_ms):
+        """
+        Adds a ping
+
+        Keyword arguments:
+        ping_date -- the date of the ping
+        ping_ms -- the ping time, NaN for a timeout
+        """
+        write = self.writer.write
+        date_ms = int(round(ping_date * 1000))
+        if self.count == 0:
+            self.first_ms = date_ms
+        else:
+            delta = date_ms - self.last_ms
+            dod = delta - self._delta
+            self._delta = delta
+            if dod == 0:
+                write(0, 1)
+            else:
+                for ones, bits in enumerate(DOD_BITS, 1):
+                    if -(1 << (bits - 1)) <= dod < 1 << (bits - 1):
+                        break
+                if ones < len(DOD_BITS):
+                    write(((1 << ones) - 1) << 1, ones + 1)
+                else:
+                    write((1 << ones) - 1, ones)
+                write(dod, bits)
+        self.last_ms = date_ms
+        self.count += 1
+
+        if isnan(ping_ms):
+            write(1, 1)
+            return
+        write(0, 1)
+        value = _UINT.unpack(_FLOAT.pack(ping_ms))[0]
+        xor = value ^ self._value
+        self._value = value
+        if xor == 0:
+            write(0, 1)
+            return
+        leading = 32 - xor.bit_length()
+        trailing = (xor & -xor).bit_length() - 1
+        if leading >= self._leading and trailing >= self._trailing:
+            #fits in the meaningful bits of the previous XOR
+            write(0b10, 2)
+        else:
+            self._leading, self._trailing = leading, trailing
+            write(0b11, 2)
+            write(leading, 5)
+            write(32 - leading - trailing - 1, 5)
+        write(xor >> self._trailing, 32 - self._leading - self._trailing)
+
+    def block(self):
+        """
+        Returns a sample_block with the pings added so far
+        """
+        return sample_block(self.writer.getvalue(), self.count,
+                            self.first_ms, self.last_ms)
+
+
+class block_series():
+    """
+    Pings of one host in compressed blocks. Pings are added to an open
+    block that is sealed when it holds block_size pings, and blocks older
+    than the retention are dropped. Queries only decode the blocks they
+    overlap, and the latest decoded blocks are cached for the next query.
+
+    attributes:
+    block_size -- the number of pings per sealed block
+    retention -- seconds of pings kept, None to keep all
+    blocks -- deque of the sealed sample_blocks, oldest first
+    lock -- held while adding or reading
+    """
+
+    def __init__(self, block_size=1024, retention=None, cache=8):
+        """
+        Keyword arguments:
+        block_size -- (optional) the number of pings per sealed block
+            (default: 1024)
+        retention -- (optional) seconds of pings kept, None to keep all
+            (default: None)
+        cache -- (optional) the number of decoded blocks cached
+            (default: 8)
+        """
+        self.block_size = int(block_size)
+        self.retention = retention
+        self.blocks = deque()
+        self.lock = Lock()
+        self._encoder = block_encoder()
+        self._decoded = deque(maxlen=cache)
+
+    def __len__(self):
+        return sum(len(block) for block in self.blocks) + \
+                self._encoder.count
+
+    def append(self, ping_date, ping_ms):
+        """
+        Adds a ping, sealing the open block when it is full
+
+        Keyword arguments:
+        ping_date -- the date of the ping
+        ping_ms -- the ping time, NaN for a timeout
+        """
+        with self.lock:
+            self._encoder.append(ping_date, ping_ms)
+            if self._encoder.count < self.block_size:
+                return
+            self.blocks.append(self._encoder.block())
+            self._encoder = block_encoder()
+            if not self.retention == None:
+                while self.blocks and \
+                        self.blocks[0].last_date < ping_date - self.retention:
+                    self.blocks.popleft()
+
+    def nbytes(self):
+        """
+        Returns the number of bytes of encoded pings
+        """
+        with self.lock:
+            return sum(len(block.data) for block in self.blocks) + \
+                    len(self._encoder.writer.data)
+
+    def oldest(self):
+        """
+        Returns the date of the oldest ping held, inf if there is none
+        """
+        with self.lock:
+            if self.blocks:
+                return self.blocks[0].first_date
+            if self._encoder.count:
+                return self._encoder.first_ms / 1000.0
+            return np.inf
+
+    def _decode(self, block):
+        """
+        Returns the decoded pings of a block, from the cache if possible
+        """
+        for cached, ping_date, ping_ms in self._decoded:
+            if cached is block:
+                return ping_date, ping_ms
+        ping_date, ping_ms = block.decode()
+        self._decoded.append((block, ping_date, ping_ms))
+        return ping_date, ping_ms
+
+    def query(self, start=-np.inf, end=np.inf):
+        """
+        Returns arrays with the dates and ping times of the pings with
+        start <= date < end
+
+        Keyword arguments:
+        start -- (optional) the earliest date (default: -inf)
+        end -- (optional) the date to stop at (default: inf)
+        """
+        with self.lock:
+            blocks = [block for block in self.blocks
+                        if block.last_date >= start and block.first_date < end]
+            open_block = self._encoder.block()
+        parts = [self._decode(block) for block in blocks]
+        if len(open_block):
+            #the open block changes with every ping so it isn't cached
+            parts.append(open_block.decode())
+        if not parts:
+            return np.empty(0), np.empty(0)
+        ping_date = np.concatenate([part[0] for part in parts])
+        ping_ms = np.concatenate([part[1] for part in parts])
+        first = np.searchsorted(ping_date, start, 'left')
+        last = np.searchsorted(ping_date, end, 'left')
+        return ping_date[first:last], ping_ms[first:last]
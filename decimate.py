@@ -0,0 +1,114 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+import numpy as np
+
+
+def minmax(ping_date, ping_ms, width):
+    """
+    Reduces the samples to at most three points per column of the given
+    width: the minimum at the time of the first sample of the column, the
+    maximum at the time of the last sample and a NaN if the column contains
+    a timeout. Spikes and gaps are kept, as the line would look the same
+    at one point per pixel.
+    Returns the dates, ping times and the column of each point.
+
+    Keyword arguments:
+    ping_date -- sorted array with the dates of the samples
+    ping_ms -- array with the ping times, NaN for timeouts
+    width -- width of a column in seconds
+    """
+    if len(ping_date) == 0:
+        empty = np.empty(0)
+        return empty, empty, np.empty(0, dtype=np.int64)
+
+    column = np.floor(ping_date / width).astype(np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(column)) + 1))
+    ends = np.append(starts[1:], len(column))
+
+    is_nan = np.isnan(ping_ms)
+    low = np.minimum.reduceat(np.where(is_nan, np.inf, ping_ms), starts)
+    high = np.maximum.reduceat(np.where(is_nan, -np.inf, ping_ms), starts)
+    valid_count = np.add.reduceat((~is_nan).astype(np.int64), starts)
+    nan_count = ends - starts - valid_count
+
+    #three slots per column: min, max and nan, of which unused are dropped
+    x_out = np.column_stack((ping_date[starts], ping_date[ends - 1],
+                            ping_date[ends - 1]))
+    y_out = np.column_stack((low, high, np.full(len(starts), np.nan)))
+    used = np.column_stack((valid_count > 0, valid_count > 1, nan_count > 0))
+    columns = np.repeat(column[starts], 3).reshape(-1, 3)
+
+    return x_out[used], y_out[used], columns[used]
+
+
+class minmax_decimator():
+    """
+    Downsamples a history to a few points per pixel column before plotting.
+
+    The columns are aligned to absolute time, so once a column is complete
+    its points never change while the plot scrolls. Complete columns are
+    cached and only the newest columns are recalculated on each update.
+    """
+
+    def __init__(self):
+        self.reset(None)
+
+    def reset(self, width):
+        """
+        Clears the cached columns
+
+        Keyword arguments:
+        width -- the width of a column in seconds
+        """
+        self.width = width
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.columns = np.empty(0, dtype=np.int64)
+        #first column that is not complete and needs to be calculated
+        self.next_column = None
+
+    def decimate(self, ping_date, ping_ms, start, end, columns):
+        """
+        Returns the dates and ping times to plot between start and end.
+        Histories with less than two samples per column are returned as is.
+
+        Keyword arguments:
+        ping_date -- sorted array with the dates of the samples
+        ping_ms -- array with the ping times, NaN for timeouts
+        start -- the earliest date shown
+        end -- the latest date shown
+        columns -- the number of pixel columns of the plot
+        """
+        width = (end - start) / float(max(columns, 1))
+        if len(ping_date) <= 2 * columns:
+            self.reset(None)
+            return ping_date, ping_ms
+        if not width == self.width:
+            self.reset(width)
+
+        #drop columns that have scrolled out of view
+        first_column = np.floor(start / width)
+        keep = np.searchsorted(self.columns, first_column)
+        self.x = self.x[keep:]
+        self.y = self.y[keep:]
+        self.columns = self.columns[keep:]
+
+        #recalculate from the first column that wasn't complete
+        if self.next_column == None:
+            first = np.searchsorted(ping_date, first_column * width)
+        else:
+            first = np.searchsorted(ping_date, self.next_column * width)
+        x_new, y_new, column = minmax(ping_date[first:], ping_ms[first:],
+                                        width)
+        if len(column) == 0:
+            return self.x, self.y
+
+        #all but the last column are complete and can be cached
+        complete = np.searchsorted(column, column[-1])
+        self.x = np.append(self.x, x_new[:complete])
+        self.y = np.append(self.y, y_new[:complete])
+        self.columns = np.append(self.columns, column[:complete])
+        self.next_column = column[-1]
+
+        return (np.append(self.x, x_new[complete:]),
+                np.append(self.y, y_new[complete:]))
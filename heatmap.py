@@ -0,0 +1,130 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Rolling 2D histograms of ping times for the heatmap view.
+
+Time is cut into columns of a fixed width, aligned to absolute time, and
+the ping times into rows of log-spaced buckets, each the same fraction
+wider than the one below it. Adding a ping increments a single cell, and
+the columns are kept in a ring, so the cost of drawing the histogram only
+depends on its size and not on the number of pings in it.
+"""
+from math import floor, isnan, log
+import numpy as np
+from threading import Lock
+
+
+class latency_heatmap():
+    """
+    Counts of pings per time column and ping time row
+
+    attributes:
+    width -- seconds per column
+    columns -- the number of columns kept
+    edges -- the ping times in ms at the edges of the rows, one more than
+        the number of rows
+    centers -- the ping times in ms at the middle of the rows
+    counts -- array of rows x columns counts, column n (counted from the
+        epoch) is kept at n % columns
+    lock -- held while adding or reading
+    """
+
+    def __init__(self, width, columns, low=0.1, high=10000, rows=80):
+        """
+        Keyword arguments:
+        width -- seconds per column
+        columns -- the number of columns kept
+        low -- (optional) the lowest ping time in ms, lower ping times are
+            counted in the first row (default: 0.1)
+        high -- (optional) the highest ping time in ms, higher ping times
+            are counted in the last row (default: 10000)
+        rows -- (optional) the number of rows (default: 80)
+        """
+        self.width = float(width)
+        self.columns = int(columns)
+        self.edges = np.logspace(np.log10(low), np.log10(high), rows + 1)
+        self.centers = np.sqrt(self.edges[:-1] * self.edges[1:])
+        self.counts = np.zeros((rows, self.columns), dtype=np.uint32)
+        #the column number in each slot, -1 for empty slots
+        self.numbers = np.full(self.columns, -1, dtype=np.int64)
+        self.lock = Lock()
+        self._log_low = log(low)
+        self._log_step = (log(high) - log(low)) / rows
+
+    def _row(self, ping_ms):
+        """
+        Returns the row of a ping time
+        """
+        if ping_ms <= 0:
+            return 0
+        row = int(floor((log(ping_ms) - self._log_low) / self._log_step))
+        return min(max(row, 0), len(self.centers) - 1)
+
+    def add(self, ping_date, ping_ms):
+        """
+        Counts a ping in its cell. Timeouts and pings older than the kept
+        columns are left out.
+
+        Keyword arguments:
+        ping_date -- the date of the ping
+        ping_ms -- the ping time, NaN for a timeout
+        """
+        if isnan(ping_ms):
+            return
+        number = int(floor(ping_date / self.width))
+        slot = number % self.columns
+        with self.lock:
+            if not self.numbers[slot] == number:
+                if self.numbers[slot] > number:
+                    return
+                self.numbers[slot] = number
+                self.counts[:, slot] = 0
+            self.counts[self._row(ping_ms), slot] += 1
+
+    def extend(self, ping_date, ping_ms):
+        """
+        Counts many pings at once like add, e.g. the history when the
+        width changes
+
+        Keyword arguments:
+        ping_date -- array with the dates of the pings
+        ping_ms -- array with the ping times, NaN for timeouts
+        """
+        ping_date = np.asarray(ping_date, dtype=np.float64)
+        ping_ms = np.asarray(ping_ms, dtype=np.float64)
+        replied = ~np.isnan(ping_ms)
+        ping_date, ping_ms = ping_date[replied], ping_ms[replied]
+        numbers = np.floor(ping_date / self.width).astype(np.int64)
+        slots = numbers % self.columns
+        #ping times <= 0 go in the first row
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rows = np.floor((np.log(ping_ms) - self._log_low) /
+                            self._log_step)
+        rows = np.clip(np.nan_to_num(rows), 0, len(self.centers) - 1)
+        rows[ping_ms <= 0] = 0
+        with self.lock:
+            #the newest column of each slot wins, as if added one by one
+            newest = self.numbers.copy()
+            np.maximum.at(newest, slots, numbers)
+            changed = newest > self.numbers
+            self.counts[:, changed] = 0
+            self.numbers[changed] = newest[changed]
+            kept = self.numbers[slots] == numbers
+            np.add.at(self.counts, (rows[kept].astype(np.intp),
+                                    slots[kept]), 1)
+
+    def matrix(self, end):
+        """
+        Returns the middle date of each column up to the one holding end,
+        oldest first, and a copy of the counts in the same order. Columns
+        without pings are zero.
+
+        Keyword arguments:
+        end -- the latest date shown
+        """
+        last = int(floor(end / self.width))
+        numbers = np.arange(last - self.columns + 1, last + 1)
+        slots = numbers % self.columns
+        with self.lock:
+            counts = self.counts[:, slots] * (self.numbers[slots] == numbers)
+        return (numbers + 0.5) * self.width, counts
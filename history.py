@@ -0,0 +1,121 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+import numpy as np
+from threading import Lock
+
+
+class ring_buffer():
+    """
+    Fixed capacity history of ping times and dates.
+
+    Every sample is written twice, at its position and one capacity later,
+    so that the samples in order always form a contiguous slice of the
+    arrays. This gives O(1) appends and views without copying.
+
+    attributes:
+    capacity -- maximum number of samples held
+    lock -- held while appending or resizing, can be used by readers that
+        need a consistent copy
+    seq -- number of samples appended so far, tells readers if anything
+        has changed since they last looked
+    """
+
+    def __init__(self, capacity=100):
+        """
+        Keyword arguments:
+        capacity -- (optional) maximum number of samples (default: 100)
+        """
+        self.lock = Lock()
+        self.seq = 0
+        self._allocate(int(capacity))
+
+    def __len__(self):
+        return self.length
+
+    def _allocate(self, capacity):
+        """
+        Creates empty arrays for the given capacity
+        """
+        self.capacity = capacity
+        self.ping_ms = np.empty(2 * capacity, dtype=np.float64)
+        self.ping_date = np.empty(2 * capacity, dtype=np.float64)
+        #index of the next write and number of stored samples
+        self.head = 0
+        self.length = 0
+
+    def append(self, ping_ms, ping_date):
+        """
+        Adds a sample, the oldest sample is dropped when the buffer is full.
+
+        Keyword arguments:
+        ping_ms -- the ping time, NaN for a timeout
+        ping_date -- the date of the ping
+        """
+        with self.lock:
+            head = self.head
+            self.ping_ms[head] = self.ping_ms[head + self.capacity] = ping_ms
+            self.ping_date[head] = ping_date
+            self.ping_date[head + self.capacity] = ping_date
+            self.head = (head + 1) % self.capacity
+            if self.length < self.capacity:
+                self.length += 1
+            self.seq += 1
+
+    def view(self, count=None):
+        """
+        Returns the dates and ping times of the latest samples, oldest
+        first, as views into the buffer. The views are only valid until
+        the samples are overwritten, copy them if they are to be kept.
+
+        Keyword arguments:
+        count -- (optional) number of samples to return, None for all
+            (default: None)
+        """
+        length = self.length if count == None else min(int(count), self.length)
+        end = (self.head - 1) % self.capacity + 1
+        if end < self.length:
+            #the latest samples continue into the mirrored half
+            end += self.capacity
+        return self.ping_date[end - length:end], self.ping_ms[end - length:end]
+
+    def snapshot(self, count=None, start=None):
+        """
+        Returns the sequence number together with copies of the dates and
+        ping times of the latest samples, all taken under the lock so that
+        they are consistent with each other.
+
+        Keyword arguments:
+        count -- (optional) number of samples to return, None for all
+            (default: None)
+        start -- (optional) the earliest date to return, None for all
+            (default: None)
+        """
+        with self.lock:
+            ping_date, ping_ms = self.view(count)
+            if not start == None:
+                first = np.searchsorted(ping_date, start)
+                ping_date, ping_ms = ping_date[first:], ping_ms[first:]
+            return self.seq, ping_date.copy(), ping_ms.copy()
+
+    def resize(self, capacity):
+        """
+        Changes the capacity keeping the latest samples.
+        Views taken before the resize keep the old data.
+
+        Keyword arguments:
+        capacity -- the new maximum number of samples
+        """
+        capacity = int(capacity)
+        with self.lock:
+            if capacity == self.capacity:
+                return
+            ping_date, ping_ms = self.view(capacity)
+            count = len(ping_ms)
+            old_date, old_ms = ping_date.copy(), ping_ms.copy()
+            self._allocate(capacity)
+            for array, old in ((self.ping_date, old_date),
+                                (self.ping_ms, old_ms)):
+                array[:count] = old
+                array[capacity:capacity + count] = old
+            self.head = count % capacity
+            self.length = count
@@ -0,0 +1,153 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+import errno
+import heapq
+from numpy import NaN
+from os import getpid
+import select
+import socket
+
+from pipe import icmp_socket, echo_request, parse_echo_reply, \
+                    ICMP_ECHO_REPLY
+from scheduler import counter_ns, to_date, probe_scheduler
+
+#size of the socket receive buffer, replies from many hosts arrive in bursts
+RECEIVE_BUFFER = 4 * 1024 * 1024
+
+
+class multi_ping():
+
+    def __init__(self, servers, timeout, interval=1.0):
+        """
+        Will ping all the specified servers from a single socket and a single
+        loop, so that thousands of hosts can be watched from one thread.
+        The requests are spread out over the interval to avoid sending
+        everything in one burst, see scheduler.probe_scheduler.
+
+        Keyword arguments:
+        servers -- a list of server urls to ping
+        timeout -- the time to timeout in milliseconds (ms)
+        interval -- (optional) seconds between echo requests to each server,
+            down to scheduler.MIN_INTERVAL (default: 1.0)
+        """
+        self.servers = list(servers)
+        self.addresses = [socket.gethostbyname(server)
+                            for server in self.servers]
+        self.sock, self.raw = icmp_socket()
+        self.sock.setblocking(False)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                                RECEIVE_BUFFER)
+        except socket.error:
+            pass #keep the default size
+        self.ident = getpid() & 0xFFFF
+        self.seq = 0
+
+        self.timeout = timeout
+        self.interval = interval
+        self.scheduler = None
+        #(address, seq) -> (server index, send time) for unanswered requests
+        self.in_flight = {}
+        #seq -> (address, seq) of the same requests, to find the request of
+        #an error without the address of the server
+        self.keys = {}
+
+    def __exit__(self, type, value, traceback):
+        #release the socket
+        self.sock.close()
+
+    def __enter__(self):
+        """
+        Generator returning (server, (ping_time, date)) for every answered
+        or timed out request, in the order they are resolved.
+        """
+        timeout = int(self.timeout * 1e6)
+        self.scheduler = probe_scheduler(len(self.servers), self.interval)
+        #heap of (time, key) with the timeouts
+        deadlines = []
+
+        while True:
+            now = counter_ns()
+            #send all requests that are due
+            for index in self.scheduler.pop_due(now):
+                key = self.send(index)
+                heapq.heappush(deadlines, (now + timeout, key))
+
+            #expire requests, already answered entries are skipped lazily
+            while deadlines and deadlines[0][0] <= now:
+                key = heapq.heappop(deadlines)[1]
+                request = self.pop(key)
+                if not request == None:
+                    yield self.servers[request[0]], (NaN, to_date(now))
+
+            wake = self.scheduler.next_due()
+            if deadlines:
+                wake = min(wake, deadlines[0][0])
+            delay = max(wake - counter_ns(), 0) / 1e9
+            if select.select([self.sock], [], [], delay)[0]:
+                for result in self.receive():
+                    yield result
+
+    def send(self, index):
+        """
+        Sends an echo request to the server at index and returns the key
+        under which it is waiting for an answer.
+        """
+        self.seq = (self.seq + 1) & 0xFFFF
+        address = self.addresses[index]
+        key = (address, self.seq)
+        #a request left unanswered for 65536 sends is given up
+        self.pop(self.keys.get(self.seq))
+        self.in_flight[key] = (index, counter_ns())
+        self.keys[self.seq] = key
+        try:
+            self.sock.sendto(echo_request(self.ident, self.seq),
+                            (address, 0))
+        except socket.error:
+            pass #unreachable networks are reported as a timeout
+        return key
+
+    def pop(self, key):
+        """
+        Removes an unanswered request and returns its (server index, send
+        time), None if there is none under key
+        """
+        request = self.in_flight.pop(key, None)
+        if not request == None:
+            del self.keys[key[1]]
+        return request
+
+    def receive(self):
+        """
+        Reads all pending packets from the socket and returns a list with
+        (server, (ping_time, date)) for the requests they answer.
+        """
+        output = []
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(1024)
+            except socket.error as e:
+                if e.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            recv_time = counter_ns()
+            reply = parse_echo_reply(data)
+            if reply == None:
+                continue
+            icmp_type, ident, seq = reply
+            if self.raw and not ident == self.ident:
+                continue
+            if icmp_type == ICMP_ECHO_REPLY:
+                request = self.pop((addr[0], seq))
+                if request == None:
+                    continue
+                ping_time = round((recv_time - request[1]) / 1e6, 3)
+            else:
+                #errors are sent by a router, find the request by seq
+                request = self.pop(self.keys.get(seq))
+                if request == None:
+                    continue
+                ping_time = NaN
+            output.append((self.servers[request[0]],
+                            (ping_time, to_date(recv_time))))
+        return output
@@ -0,0 +1,270 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Headless pinging from the command line, for machines without a display.
+
+Pings one or more servers, prints the results and stats and stores every
+result like the GUI does. Nothing from wx or matplotlib is imported unless
+the GUI is asked for with --gui.
+
+Start up time is measured with benchmark.bench_startup, the wall time of
+python ping_cli.py --help:
+    python -c "import benchmark; print(benchmark.bench_startup())"
+The target is to keep the best of 10 runs below 150 ms on python 2.7, it
+was about 90 ms when last checked, of which importing numpy took about
+70 ms. The module imports that it adds up to can be listed with
+python -v ping_cli.py --help.
+"""
+import argparse
+import socket
+import sys
+from time import strftime, localtime, time
+
+from multiping import multi_ping
+from pipe import ping, ping_reader
+from ping_stats import sliding_stats
+from replay import recorded, replay, synthetic
+from store import series_path, series_writer
+
+
+def parse_args(args=None):
+    """
+    Parses the command line arguments
+
+    Keyword arguments:
+    args -- (optional) list of arguments, sys.argv is used if None
+    """
+    parser = argparse.ArgumentParser(description='Plots or logs the ping '
+                                    'time to one or more servers')
+    parser.add_argument('hosts', nargs='*', default=['ping.sunet.se'],
+                        help='servers to ping (default: ping.sunet.se)')
+    parser.add_argument('-t', '--timeout', type=float, default=200,
+                        help='timeout in milliseconds (default: 200)')
+    parser.add_argument('-i', '--interval', type=float, default=1.0,
+                        help='seconds between pings, down to 0.01 '
+                        '(default: 1)')
+    parser.add_argument('-H', '--history', type=int, default=100,
+                        help='number of pings in the stats (default: 100)')
+    parser.add_argument('-r', '--report', type=float, default=10,
+                        help='seconds between printed stats, 0 to never '
+                        'print them (default: 10)')
+    parser.add_argument('-d', '--data', default=None,
+                        help='directory to store results in, empty to not '
+                        'store them (default: data, nothing is stored for '
+                        '--replay and --synthetic)')
+    parser.add_argument('-w', '--workers', type=int, default=0,
+                        help='worker processes that each ping a share of '
+                        'the servers, 0 to ping from this process '
+                        '(default: 0)')
+    parser.add_argument('--record', default='',
+                        help='file to record the pings to, for --replay')
+    parser.add_argument('--replay', default='',
+                        help='replay the pings of a file written by '
+                        '--record instead of pinging')
+    parser.add_argument('--synthetic', action='store_true',
+                        help='make up the pings instead of pinging')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='times faster than real time to replay or '
+                        'make up pings, 0 for as fast as possible '
+                        '(default: 1)')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="don't print every ping")
+    parser.add_argument('--gui', action='store_true',
+                        help='start the graphical program instead')
+    return parser.parse_args(args)
+
+
+def probe(hosts, timeout, interval):
+    """
+    Returns a context manager whose generator yields
+    (host, (ping_time, date)) for all hosts. Falls back to the ping program
+    when ICMP sockets can't be opened, with the output of all hosts read
+    from one thread. On windows this handles a single host only.
+
+    Keyword arguments:
+    hosts -- list of servers to ping
+    timeout -- the time to timeout in milliseconds (ms)
+    interval -- seconds between pings to each host
+    """
+    try:
+        return multi_ping(hosts, timeout, interval)
+    except socket.error:
+        if not sys.platform == 'win32':
+            return ping_reader(hosts, timeout, interval)
+        if not len(hosts) == 1:
+            raise
+        return single_ping(hosts[0], timeout)
+
+
+class single_ping(ping):
+    """
+    pipe.ping with the results tagged by host like multi_ping
+    """
+    def __enter__(self):
+        for result in ping.__enter__(self):
+            yield self.server, result
+
+
+def prober_source(options):
+    """
+    Returns a function like probe that returns the prober asked for by the
+    options, or None to probe the hosts as usual
+
+    Keyword arguments:
+    options -- the parsed arguments, see parse_args
+    """
+    speed = options.speed or None
+    if options.replay:
+        def source(hosts, timeout, interval):
+            return replay(options.replay, speed, hosts)
+    elif options.synthetic:
+        def source(hosts, timeout, interval):
+            return synthetic(hosts, timeout, interval, speed=speed)
+    elif options.workers:
+        def source(hosts, timeout, interval):
+            #multiprocessing is only imported when it is used
+            from shards import shard_pool
+            return shard_pool(hosts, timeout, interval, options.workers)
+    elif options.record:
+        source = probe
+    else:
+        return None
+    if options.record:
+        return recorded(source, options.record)
+    return source
+
+
+def data_dir(options):
+    """
+    Returns the directory to store the results in, empty to not store them.
+    Replayed and made up pings aren't stored with the results of the real
+    hosts unless asked for, their dates may be old or far ahead.
+
+    Keyword arguments:
+    options -- the parsed arguments, see parse_args
+    """
+    if not options.data == None:
+        return options.data
+    if options.replay or options.synthetic:
+        return ''
+    return 'data'
+
+
+def format_stats(host, stats):
+    """
+    Returns a line with the stats of a host
+
+    Keyword arguments:
+    host -- the pinged server
+    stats -- the sliding_stats of the host
+    """
+    lbl_format = '{0:.1f}+-{1:.1f} ms (min {2:.1f}, max {3:.1f}), ' \
+                'loss {4:.0f} %'
+    lines = []
+    for window in stats.windows:
+        lines.append('last {0:d}: '.format(window.count) +
+                    lbl_format.format(window.mean, window.std, window.min,
+                        window.max, window.loss_rate * 100))
+    return '{0!s}: '.format(host) + ' | '.join(lines)
+
+
+def format_health(index, health):
+    """
+    Returns a line with the health of a shard
+
+    Keyword arguments:
+    index -- the number of the shard
+    health -- the shards.shard_health of the shard
+    """
+    return 'shard {0:d}: {1:d} servers, {2!s}, {3:d} restarts, ' \
+            '{4:d} pings, loss {5:.0f} %, {6:.1f} ms, last seen {7:.1f} s ' \
+            'ago, {8:d} overwritten'.format(index, health.targets,
+            'alive' if health.alive else 'dead', health.restarts,
+            health.samples, health.loss_rate * 100, health.mean,
+            health.silence, health.lost)
+
+
+def health_monitor(out, every):
+    """
+    Returns a function for shard_pool.monitor that prints the health of
+    the shards at most every so many seconds
+
+    Keyword arguments:
+    out -- file to print to
+    every -- seconds between the printed reports
+    """
+    #when the next report is due
+    due = [time() + every]
+
+    def monitor(report):
+        if time() < due[0]:
+            return
+        due[0] = time() + every
+        for index, health in enumerate(report):
+            out.write(format_health(index, health) + '\n')
+        out.flush()
+    return monitor
+
+
+def run(options, out=sys.stdout):
+    """
+    Pings until interrupted
+
+    Keyword arguments:
+    options -- the parsed arguments, see parse_args
+    out -- (optional) file to print to (default: sys.stdout)
+    """
+    stats = dict((host, sliding_stats([options.history, 10]))
+                for host in options.hosts)
+    writers = {}
+    directory = data_dir(options)
+    if directory:
+        for host in options.hosts:
+            writers[host] = series_writer(series_path(directory, host))
+    #counted from the first ping, replayed pings may have old dates
+    next_report = None
+    prober = (prober_source(options) or probe)(options.hosts,
+                                    options.timeout, options.interval)
+    #the shard_pool of the workers, also when recorded. Its health is
+    #printed when it checks the workers, also when no pings arrive.
+    made_up = options.replay or options.synthetic
+    if options.workers and options.report and not made_up:
+        pool = getattr(prober, 'prober', prober)
+        pool.monitor = health_monitor(out, options.report)
+
+    try:
+        with prober as pinger:
+            for host, (ping_ms, ping_date) in pinger:
+                stats[host].add(ping_ms)
+                if host in writers:
+                    writers[host].append(ping_date, ping_ms)
+                if not options.quiet:
+                    out.write('{0} {1!s} {2:.3f}\n'.format(
+                        strftime('%H:%M:%S', localtime(ping_date)), host,
+                        ping_ms))
+                if next_report == None:
+                    next_report = ping_date + options.report
+                if options.report and ping_date >= next_report:
+                    next_report += options.report
+                    for name in options.hosts:
+                        out.write(format_stats(name, stats[name]) + '\n')
+                out.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+def main(args=None):
+    options = parse_args(args)
+    if options.gui:
+        #only now pay for importing wx and matplotlib
+        import ping_gui
+        ping_gui.main(prober_source(options), data_dir(options))
+    else:
+        run(options)
+
+
+if __name__ == '__main__':
+    main()
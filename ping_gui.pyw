@@ -1,540 +1,1046 @@
-﻿#!/usr/bin/python2
-# -*- coding: UTF-8 -*-
-import sys
-import traceback
-
-def excepthook(etype, value, tb):
-    message = '\nUncaught exception:\n'
-    message += ''.join(traceback.format_exception(etype, value, tb))
-    with open('error.log', 'a') as log:
-        log.write(message)
-sys.excepthook = excepthook
-
-from numpy import nan
-import numpy as np
-from pipe import ping
-from time import time, sleep
-from threading import Thread, Event
-import re
-import wx
-from wx.lib.agw.floatspin import FloatSpin as FS, EVT_FLOATSPIN
-import wx.lib.newevent as NE
-
-from wxplot import Graph
-
-
-PingEvent, EVT_Ping = NE.NewEvent()
-
-class MyForm(wx.Frame):
-
-
-    def __init__(self):
-        wx.Frame.__init__(self, None, wx.ID_ANY, "ping graphing program",
-                                   size=(750,600))
-        sys.excepthook = self.excepthook
-        #used to start stop the ping operation
-        self.stoprequest = Event()
-
-        # Add a panel so it looks the correct on all platforms
-        panel = wx.Panel(self, wx.ID_ANY)
-        self.plot = Graph(panel)
-        self.plot.set_label(xlabel=u'Time (s)', ylabel=u'ping [ms]')
-        self.plot.set_formatter('plain', useOffset = False)
-        #black background
-        self.plot.sub_plots.set_axis_bgcolor('black')
-
-        ###stats###
-        self.ping_avg = wx.StaticText(panel, wx.ID_ANY, u'Ping average: xxx±xx ms')
-        self.packet_loss = wx.StaticText(panel, wx.ID_ANY, u'Packet loss: x %')
-        
-        self.ping_avg_latest = wx.StaticText(panel, wx.ID_ANY, u'Last 10 avg: xxx±xx ms')
-        self.packet_loss_latest = wx.StaticText(panel, wx.ID_ANY, u'Last 10 loss: x %')
-        
-        
-        ###settings###
-        # start stop button
-        self.start_stop = wx.Button(panel, wx.ID_ANY, "&Start")
-
-        # ping parameters
-        host_lbl = wx.StaticText(panel, wx.ID_ANY, 'Se&rver')
-        self.host = wx.TextCtrl(panel, wx.ID_ANY,
-                                value = 'ping.sunet.se', size = (200,-1))
-        timeout_lbl = wx.StaticText(panel, wx.ID_ANY, 'Tim&eout')
-        self.timeout = FS(panel, wx.ID_ANY, size = (60, -1), value = 200,
-                            min_val = 100, max_val = 10000,
-                            increment = 10, digits = 0)
-        #field for setting limit line in graph
-        limit_lbl = wx.StaticText(panel, wx.ID_ANY, 'Limi&t lvl')
-        self.limit = FS(panel, wx.ID_ANY, size = (50, -1), value = 70,
-                            min_val = 1, max_val = 1000,
-                            increment = 1, digits = 0)
-        #how many point should show on the graph
-        history_lbl = wx.StaticText(panel, wx.ID_ANY, '&History (s)')
-        self.history = FS(panel, wx.ID_ANY, size = (60, -1), value = 100,
-                            min_val = 100, max_val = 10000,
-                            increment = 10, digits = 0)
-
-        #------ Bindings ------#
-        self.start_stop.Bind(wx.EVT_BUTTON, self.onStart_Stop)
-        self.Bind(wx.EVT_CLOSE, self.onClose)
-        self.Bind(wx.EVT_SIZE, self.onResize)
-        self.Bind(EVT_Ping, self.onPlotting)
-
-        #------ Layout ------#
-        vsizer = wx.BoxSizer(wx.VERTICAL) #main sizer
-        hsizer_stats = wx.BoxSizer(wx.HORIZONTAL)
-        hsizer_stats_latest = wx.BoxSizer(wx.HORIZONTAL)
-        hsizer_settings = wx.BoxSizer(wx.HORIZONTAL)
-        vsizer_host = wx.BoxSizer(wx.VERTICAL)
-        vsizer_timeout = wx.BoxSizer(wx.VERTICAL)
-        vsizer_limit = wx.BoxSizer(wx.VERTICAL)
-        vsizer_history = wx.BoxSizer(wx.VERTICAL)
-
-        #build text input sizers
-        vsizer_host.Add(host_lbl, 0, wx.ALIGN_LEFT)
-        vsizer_host.Add(self.host, 0, wx.ALIGN_LEFT)
-
-        vsizer_timeout.Add(timeout_lbl, 0, wx.ALIGN_LEFT)
-        vsizer_timeout.Add(self.timeout, 0, wx.ALIGN_LEFT)
-
-        vsizer_limit.Add(limit_lbl, 0, wx.ALIGN_LEFT)
-        vsizer_limit.Add(self.limit, 0, wx.ALIGN_LEFT)
-
-        vsizer_history.Add(history_lbl, 0, wx.ALIGN_LEFT)
-        vsizer_history.Add(self.history, 0, wx.ALIGN_LEFT)
-        
-        #sizer with status information
-        hsizer_stats.Add(self.ping_avg, 0,
-                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
-                            10)
-        hsizer_stats.Add(self.packet_loss, 0,
-                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
-                            10)
-        #sizer with latest stats (last 10 pings)
-        hsizer_stats_latest.Add(self.ping_avg_latest, 0,
-                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
-                            10)
-        hsizer_stats_latest.Add(self.packet_loss_latest, 0,
-                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
-                            10)
-        
-        #sizer with controls for settings
-        hsizer_settings.Add(self.start_stop, 0,
-                            wx.RIGHT | wx.LEFT | wx.ALIGN_BOTTOM,
-                            10)
-        hsizer_settings.Add(vsizer_host, 0,
-                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
-                            10)
-        hsizer_settings.Add(vsizer_timeout, 0,
-                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
-                            10)
-        hsizer_settings.Add(vsizer_limit, 0,
-                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
-                            10)
-        hsizer_settings.Add(vsizer_history, 0,
-                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
-                            10)
-
-        #main layout
-        vsizer.Add(self.plot, 1, wx.EXPAND)
-        vsizer.Add(hsizer_stats, 0, wx.ALIGN_CENTER | wx.TOP, 5)
-        vsizer.Add(hsizer_stats_latest, 0, wx.ALIGN_CENTER | wx.BOTTOM, 5)
-        vsizer.Add(hsizer_settings, 0, wx.ALIGN_CENTER | wx.TOP, 0)
-
-        #finalize
-        panel.SetSizerAndFit(vsizer)
-        #self.SetMinSize(vsizer.GetMinSize())
-        self.GetBestSize()
-        self.Show(True)
-        self.stoprequest.set()
-
-
-    ###-----Events bound to specific buttons-----###
-    def onClose(self, event):
-        """
-        Should ensure that a proper exit is done
-        """
-        if not self.stoprequest.isSet():
-            self.stop_ping()
-            #sleep to let the thread have time to halt
-            sleep(max(1, self.timeout.GetValue() // 1000))
-        #death to everything
-        self.Destroy()
-
-    def onResize(self, event):
-        self.plot.figure.tight_layout()
-        event.Skip()
-        
-        
-    def onStart_Stop(self, event):
-        """
-        Starts or stops the pinging of the server
-        """
-        if self.stoprequest.isSet():
-            self.start_ping()
-        else:
-            self.stop_ping()
-
-
-    def excepthook(self, etype, value, tb):
-        """
-        exception hook to log error and display a message dialog.
-        """
-        message = '\nUncaught exception:\n'
-        message += ''.join(traceback.format_exception(etype, value, tb))
-        with open('error.log', 'a') as log:
-            log.write(message)
-
-        d = wx.MessageDialog(self, "{0}: {1}".format(etype.__name__, value),
-                            "Unhandled exception", wx.OK | wx.ICON_ERROR)
-        
-        if etype is wx.PyAssertionError:
-            self.stop_ping()
-        d.ShowModal()
-        d.Destroy()
-
-
-    def ping_it(self, hist_max, host, timeout):
-        """
-        will perform the pinging and plot to the graph
-        """
-        #reset the ping data
-        ping_ms = []   #y-axis
-        ping_date = [] #x-axis
-        
-        with ping(host, timeout) as pinger:
-            while not self.stoprequest.isSet():
-                new_ping_ms, new_ping_date = pinger.next()
-                #trim lists using the maximum length
-                ping_ms = fill_axis(ping_ms, new_ping_ms, hist_max)
-                ping_date = fill_axis(ping_date, new_ping_date, hist_max)
-                
-                wx.PostEvent(self, PingEvent(ping_ms=ping_ms, 
-                            ping_date=ping_date))
-                #explicit wait instead of implicit from the generator
-                sleep(0.3)
-            #cleanup remove the line objects
-            wx.CallAfter(self.plot.clear_lines)
-            #self.plot.sub_plots().axes.lines.remove(line)
-    
-    
-    def onPlotting(self, event):
-        """
-        """
-        hist_len = int(self.history.GetValue())
-        trunc_ping_ms = event.ping_ms[-hist_len:]
-        trunc_ping_date = event.ping_date[-hist_len:]
-        
-        #convert ping time to relative time from current time
-        was_pinged = get_time_diff(trunc_ping_date, time())
-       
-        #generate plot limits
-        x_limit = [-hist_len, 0]
-        limit_value = self.limit.GetValue()
-        plot_lim_new = axis_limit(x_limit, limit_value, trunc_ping_ms)
-
-        #update the y_limit line
-        y_limit = [limit_value]*2
-        
-        #efficient plotting
-        self.line_limit.set_data(x_limit, y_limit)
-        self.line_ping.set_data(was_pinged, trunc_ping_ms)
-        self.line_timeout.set_data(*nan_line_creator(was_pinged, trunc_ping_ms))
-        #only redo the plot limits and grid if needed
-        if not self.plot_lim == plot_lim_new:
-            self.plot_lim = plot_lim_new
-            self.plot.set_limits(self.plot_lim)
-        else:
-            self.plot.update_plot_only([self.line_limit,
-                    self.line_ping, self.line_timeout]
-                    )
-        #update status texts
-        self.set_packet_loss_status(trunc_ping_ms)
-        self.set_ping_avg_status(trunc_ping_ms)
-        
-        
-    def plotting_init(self):
-        """
-        Initializes the plot and saves the lines so that the plot can be
-        manipulated efficiently...
-        """
-        #clear out any previous data
-        self.plot.clear_lines()
-        #initialize data for the first line
-        init_limit = self.limit.GetValue()
-        x_limit = [-100, 0]
-        y_limit = [init_limit]*2
-        self.plot_lim = axis_limit(x_limit, init_limit, [0])
-        
-        
-        self.plot.set_limits(self.plot_lim)
-        self.line_limit = self.plot.redraw(x_limit, y_limit, 
-                                color='r', draw=False)[0]
-        self.line_ping = self.plot.redraw(*([0,0],)*2,
-                                draw=False, color='dodgerblue',
-                                hold=True, marker='x')[0]
-        self.line_timeout = self.plot.redraw(*([0,0],)*2,
-                                draw=False, color='r',
-                                hold=True, marker='', linestyle='--')[0]
-        self.plot.set_limits(self.plot_lim)
-        
-        
-    def set_ping_avg_status(self, ping_ms):
-        """
-        Updates the average ping text
-        """
-        average = np.nanmean(ping_ms)
-        std = np.nanstd(ping_ms)
-        ping_format = u'{0:.0f}±{1:.0f} ms'
-        lbl = u'Ping average: ' + ping_format.format(average, std)
-        wx.CallAfter(self.ping_avg.SetLabel, lbl)
-        
-        #get stats for the last 10 ping packets
-        ping_latest = ping_ms[-10:]
-        average = np.nanmean(ping_latest)
-        std = np.nanstd(ping_latest)
-        lbl = u'Ping average: ' + ping_format.format(average, std)
-        wx.CallAfter(self.ping_avg_latest.SetLabel, lbl)
-        
-    def set_packet_loss_status(self, ping_ms):
-        """
-        Updates the packet loss rate text
-        """
-        loss_count = int(list(np.isnan(ping_ms)).count(True))
-        loss_rate = loss_count / float(len(ping_ms))
-        lbl_format = u'Packet loss: {0:.0f} % ({1:d} packets lost)'
-        lbl = lbl_format.format(loss_rate * 100, loss_count)
-        wx.CallAfter(self.packet_loss.SetLabel, lbl)
-        
-        #get stats for the last 10 ping packets
-        ping_latest = ping_ms[-10:]
-        loss_count = int(list(np.isnan(ping_latest)).count(True))
-        loss_rate = loss_count / float(len(ping_latest))
-        lbl = lbl_format.format(loss_rate * 100, loss_count)
-        wx.CallAfter(self.packet_loss_latest.SetLabel, lbl)
-        
-    
-    def start_ping(self):
-        self.stoprequest.clear()
-        #initialize plot variables with a function
-        #then change so that ping_it doesn't do any UI manipulation and instead
-        #creates a event that does all the UI stuff but all the main data
-        #manipulation is in ping_it
-        self.plotting_init()
-        
-        keyargs = { 'hist_max': self.history.GetMax(),
-                    'host': self.host.GetValue(),
-                    'timeout': self.timeout.GetValue()
-                    }
-        thread = Thread(target=self.ping_it, kwargs=keyargs)
-        thread.setDaemon(True)
-        thread.start()
-        self.start_stop.SetLabel("&Stop")
-    def stop_ping(self):
-        self.stoprequest.set()
-        self.start_stop.SetLabel("&Start")
-
-
-
-def axis_limit(x_limit, min_y, y_data):
-    """
-    Will return the axis limits for a plot to fit the all the y_data within view.
-    Shows the highest y-value + 5
-
-    keyword arguments:
-    x_limit -- a list with 2 integers defining the limits for the x_axis
-    min_y -- the minimum value of the y-axis
-    y_data -- points plotted on the y axis
-    """
-    output = x_limit + [0, np.nanmax([min_y] + y_data) + 5]
-
-    return output
-
-
-def get_time_diff(time_list, ref_time):
-    """
-    Calaculates the time difference between all dates in a list and a
-    reference date
-
-    Keyword arguments:
-    time_list -- a list with dates to calculate the time difference for
-    ref_time -- The reference date to subtract from the time_list
-    """
-
-    #return [element - ref_time for element in time_list]
-    return np.subtract(time_list, ref_time)
-
-
-def fill_axis(axis, value, length=100):
-    """
-    Will append the value to the list untill it reaches the length 100
-    When at full length the oldest value will be popped.
-
-    Keyword arguments:
-    axis -- a list to which the value should be added
-    value -- value to add to the list
-    length -- (optional) how long should the list be (default: 100)
-    """
-    #force it to integer
-    length = int(length)
-    #pop the oldest value if length has been reached
-    if len(axis) == length:
-        axis.pop(0)
-    elif len(axis) > length:
-        for i in range(len(axis) - length):
-            axis.pop(0)
-    #add the new value
-    axis.append(value)
-
-    return axis
-
-
-def list_nan(elements):
-    """
-    Finds all the nan elements in a list and return their indices
-
-    keyword arguments:
-    elements -- a list that is to be checked for nan elements
-    """
-    output = []
-    for i, element in enumerate(np.isnan(elements)):
-        if element:
-            #add the indice of the current nan element
-            output.append(i)
-    return output
-
-
-def nan_insert(data):
-    """
-    inserts a nan element every two elements
-
-    keyword arguments:
-    data -- a list of values
-    """
-    #if len(data) > 2:
-    for index in reversed(xrange(len(data) // 2)):
-        if index != 0:
-            data.insert(index * 2, nan)
-
-    return data
-
-def nan_line_creator(x_axis, y_axis):
-    """
-    Returns an x- and y-axis that can draw lines to span over nan elements
-    in the given y-axis
-
-    keyword arguments:
-    x_axis -- a list that contain the x-axis values
-    y_axis -- a list that contain the y-axis values
-    """
-    nan_elements = list_nan(y_axis)
-
-    x_out = []
-    y_out = []
-
-    #if length of axis vars =1 just exit right here
-    if len(y_axis) <= 1:
-        return (x_out, y_out)
-    #trimming out nan elements that precede each other
-    nan_elements = nan_trim(nan_elements)
-
-
-    #produces one pair of x and y values per iteration
-    for indice in nan_elements:
-        prev_indice = indice - 1
-        next_indice = indice + 1
-        #find first preceeding resp. succeding non-nan element
-        while prev_indice > 0 and np.isnan(y_axis[prev_indice]):
-            prev_indice -= 1
-        while next_indice > len(y_axis) and np.isnan(y_axis[next_indice]):
-            next_indice += 1
-
-        #check if the element is the first element of the axes
-        if indice == 0:
-            #indice is first element
-            x_out.append(x_axis[indice])
-            y_out.append(y_axis[next_indice])
-        else:
-            #standard case
-            x_out.append(x_axis[prev_indice])
-            #check if the prev_indice value is a nan value
-            if np.isnan(y_axis[prev_indice]):
-                #bug when ping starts with 2 timeouts
-                try: y_out.append(y_axis[next_indice])
-                except IndexError: x_out.pop(-1) #trim lists to equal length
-            else:
-                y_out.append(y_axis[prev_indice])
-
-
-        #add the second value for the x and y axes
-        #check if indice is at end of y_axis
-        if indice == len(y_axis)-1:
-            #use last value in x-axis
-            x_out.append(x_axis[indice])
-            #since last value in axis reuse previous non-nan y_value
-            y_out.append(y_axis[prev_indice])
-        else:
-            x_out.append(x_axis[next_indice])
-            y_out.append(y_axis[next_indice])
-
-    #add nan values if more than one line is to be drawn
-    x_out = nan_insert(x_out)
-    y_out = nan_insert(y_out)
-    #return data
-    return (x_out, y_out)
-
-
-def nan_trim(data):
-    """
-    Removes elements whose difference to the next element == 1
-
-    keyword arguments:
-    data -- a list of values
-    """
-    data_diff = np.diff(data)
-
-    for i, diff in reversed(list(enumerate(data_diff))):
-        if diff == 1:
-            data.pop(i)
-
-    return data
-
-
-
-
-def installThreadExcepthook():
-    """
-    Workaround for sys.excepthook thread bug
-    From
-http://spyced.blogspot.com/2007/06/workaround-for-sysexcepthook-bug.html
-
-(https://sourceforge.net/tracker/?func=detail&atid=105470&aid=1230540&
-group_id=5470).
-    Call once from __main__ before creating any threads.
-    If using psyco, call psyco.cannotcompile(threading.Thread.run)
-    since this replaces a new-style class method.
-    """
-    init_old = Thread.__init__
-    def init(self, *args, **kwargs):
-        init_old(self, *args, **kwargs)
-        run_old = self.run
-        def run_with_except_hook(*args, **kw):
-            try:
-                run_old(*args, **kw)
-            except (KeyboardInterrupt, SystemExit):
-                raise
-            except:
-                sys.excepthook(*sys.exc_info())
-        self.run = run_with_except_hook
-    Thread.__init__ = init
-
-
-# Run the program
-if __name__ == "__main__":
-    installThreadExcepthook()
-
-    app = wx.App()
-    frame = MyForm()
-    app.MainLoop()
-
-
+﻿#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+import multiprocessing
+import sys
+import traceback
+
+def excepthook(etype, value, tb):
+    message = '\nUncaught exception:\n'
+    message += ''.join(traceback.format_exception(etype, value, tb))
+    with open('error.log', 'a') as log:
+        log.write(message)
+sys.excepthook = excepthook
+
+from math import ceil
+from numpy import nan
+import numpy as np
+import socket
+from time import time, sleep
+from threading import Thread, Event, Lock
+import re
+import wx
+from wx.lib.agw.floatspin import FloatSpin as FS, EVT_FLOATSPIN
+
+from bus import sample_bus, DROP_OLDEST
+from compress import block_series
+from decimate import minmax, minmax_decimator
+from heatmap import latency_heatmap
+from history import ring_buffer
+from ping_cli import probe, single_ping
+from ping_stats import sliding_stats
+from rollup import rollup_pyramid
+from scheduler import MIN_INTERVAL
+from shared_ring import process_probe
+from sketch import sketch_buckets
+from store import series_path, series_reader, series_writer
+from wxplot import Graph, RenderScheduler
+
+#line colors of the hosts when they share a plot
+TRACE_COLORS = ['dodgerblue', 'lime', 'orange', 'magenta', 'cyan', 'yellow',
+                'tomato', 'white', 'violet', 'springgreen']
+#seconds per bucket of the percentile band
+BAND_WIDTH = 5
+#seconds of pings kept compressed in memory for zooming in
+RECENT = 24 * 3600
+#time columns of the heatmap over the history
+HEATMAP_COLUMNS = 200
+#pings of each host kept in the ring buffers at most, the oldest part of a
+#long history at a short interval isn't drawn
+MAX_SAMPLES = 1000000
+#samples queued for the plot and the storage before the oldest are dropped
+PLOT_QUEUE = 4096
+STORE_QUEUE = 65536
+
+
+class host_trace():
+    """
+    The ping data, stats and plotted lines of one pinged host
+
+    attributes:
+    host -- the pinged server
+    index -- index of the sub-plot the host is drawn in
+    ping_data -- ring_buffer with the pings, shared by the ping thread and
+        the plotting
+    stats -- sliding_stats of the whole history and the latest pings
+    jitter_data -- ring_buffer with the jitter after each ping
+    buckets -- sketch_buckets with the p50 and p99 of the pings over time
+    rollup -- rollup_pyramid of the pings, for views longer than the history
+    recent -- block_series with the compressed pings of the last day
+    heatmap -- latency_heatmap of the pings over the history
+    interval -- seconds between the pings
+    lock -- held while a ping is added to the data of the host, and while
+        the heatmap is swapped for a resized one
+    drawn_seq -- the seq of ping_data when the host was last drawn
+    line_ping, line_timeout -- the plotted lines of the host
+    line_jitter -- the plotted jitter, None when it isn't plotted
+    band -- the plotted p50 to p99 band, None when it isn't plotted
+    label -- text in the plot with the stats of the host, None when the
+        stats are only shown below the plot
+    """
+    def __init__(self, host, index, history, latest_count, interval=1.0):
+        """
+        Keyword arguments:
+        host -- the pinged server
+        index -- index of the sub-plot to draw the host in
+        history -- the seconds of pings to keep
+        latest_count -- number of pings in the window of the latest stats
+        interval -- (optional) seconds between the pings (default: 1.0)
+        """
+        self.host = host
+        self.index = index
+        self.interval = interval
+        self.lock = Lock()
+        samples = self.samples(history)
+        self.ping_data = ring_buffer(samples)
+        self.stats = sliding_stats([samples, latest_count])
+        self.jitter_data = ring_buffer(samples)
+        self.buckets = sketch_buckets(BAND_WIDTH, history // BAND_WIDTH + 2)
+        self.rollup = rollup_pyramid()
+        self.recent = block_series(retention=RECENT)
+        self.heatmap = latency_heatmap(history / float(HEATMAP_COLUMNS),
+                                        HEATMAP_COLUMNS)
+        self.drawn_seq = 0
+        self.decimator = minmax_decimator()
+        self.jitter_decimator = minmax_decimator()
+        self.line_ping = self.line_timeout = self.label = None
+        self.line_jitter = self.band = None
+
+    def samples(self, history):
+        """
+        Returns the number of pings in history seconds
+        """
+        return min(int(ceil(history / float(self.interval))), MAX_SAMPLES)
+
+    def resize(self, history):
+        """
+        Changes how many seconds of ping data are kept
+        """
+        samples = self.samples(history)
+        self.ping_data.resize(samples)
+        self.jitter_data.resize(samples)
+        self.buckets.resize(history // BAND_WIDTH + 2)
+        self.stats.resize(0, samples)
+        #the columns get wider, recount the kept pings. Pings are only
+        #added under the lock, so none is left out of the new heatmap.
+        heatmap = latency_heatmap(history / float(HEATMAP_COLUMNS),
+                                    HEATMAP_COLUMNS)
+        with self.lock:
+            heatmap.extend(*self.ping_data.view())
+            self.heatmap = heatmap
+
+    def load(self, data_dir):
+        """
+        Adds the stored pings of the host to the rollups
+
+        Keyword arguments:
+        data_dir -- directory holding the stored results of all hosts
+        """
+        reader = series_reader(series_path(data_dir, self.host))
+        try:
+            #a segment at a time, a year of pings doesn't fit in memory
+            for ping_date, ping_ms, flags in reader.chunks(
+                    time() - self.rollup.retention()):
+                self.rollup.extend(ping_date, ping_ms)
+        finally:
+            reader.close()
+
+    def view(self, start, end, columns):
+        """
+        Returns the dates and ping times to plot between start and end.
+        They come from the ring buffer if it holds the whole span, else
+        from the compressed pings of the last day for views with less than
+        a second per column, else from the rollup level with about one
+        bucket per column.
+
+        Keyword arguments:
+        start -- the earliest date of the view
+        end -- the latest date of the view
+        columns -- the number of pixel columns of the plot
+        """
+        with self.ping_data.lock:
+            ping_date, ping_ms = self.ping_data.view()
+            in_ring = len(ping_date) and ping_date[0] <= start
+            if in_ring:
+                first = np.searchsorted(ping_date, start)
+                last = np.searchsorted(ping_date, end, 'right')
+                ping_date = ping_date[first:last].copy()
+                ping_ms = ping_ms[first:last].copy()
+        if not in_ring:
+            if end - start > columns * self.rollup.levels[0].width or \
+                    self.recent.oldest() > start:
+                return self.rollup.minmax(start, end, columns)
+            ping_date, ping_ms = self.recent.query(start, end)
+        if len(ping_date) <= 2 * columns:
+            return ping_date, ping_ms
+        return minmax(ping_date, ping_ms, (end - start) / float(columns))[:2]
+
+    def status(self):
+        """
+        Returns the text of the label
+        """
+        stats = self.stats[0]
+        return u'{0!s}: {1:.0f}±{2:.0f} ms, loss {3:.0f} %, MOS {4:.1f}' \
+                .format(self.host, stats.mean, stats.std,
+                        stats.loss_rate * 100, self.stats.quality()[1])
+
+
+class MyForm(wx.Frame):
+    #number of pings in the window of the latest stats
+    latest_count = 10
+    #maximum number of times per second the plot is redrawn
+    max_fps = 10
+    #directory where the ping results are stored, empty to not store them
+    data_dir = 'data'
+
+    def __init__(self, source=None, data_dir=None):
+        """
+        Keyword arguments:
+        source -- (optional) function like ping_cli.probe returning the
+            prober of the hosts, e.g. a replay, None to ping them
+            (default: None)
+        data_dir -- (optional) directory to store the ping results in,
+            empty to not store them, None for the data_dir of the class
+            (default: None)
+        """
+        wx.Frame.__init__(self, None, wx.ID_ANY, "ping graphing program",
+                                   size=(750,600))
+        sys.excepthook = self.excepthook
+        self.source = source
+        if not data_dir == None:
+            self.data_dir = data_dir
+        #used to start stop the ping operation
+        self.stoprequest = Event()
+
+        # Add a panel so it looks the correct on all platforms
+        panel = wx.Panel(self, wx.ID_ANY)
+        self.plot = Graph(panel)
+        with self.plot.batch():
+            self.plot.set_label(xlabel=u'Time (s)', ylabel=u'ping [ms]')
+            self.plot.set_formatter('plain', useOffset = False)
+            #black background
+            self.plot.sub_plots.set_axis_bgcolor('black')
+
+        ###stats###
+        self.ping_avg = wx.StaticText(panel, wx.ID_ANY, u'Ping average: xxx±xx ms')
+        self.packet_loss = wx.StaticText(panel, wx.ID_ANY, u'Packet loss: x %')
+        
+        self.ping_avg_latest = wx.StaticText(panel, wx.ID_ANY, u'Last 10 avg: xxx±xx ms')
+        self.packet_loss_latest = wx.StaticText(panel, wx.ID_ANY, u'Last 10 loss: x %')
+        
+        self.jitter = wx.StaticText(panel, wx.ID_ANY, u'Jitter: xx ms (IPDV xx ms)')
+        self.quality = wx.StaticText(panel, wx.ID_ANY, u'R-factor: xx (MOS x.x)')
+        self.percentiles = wx.StaticText(panel, wx.ID_ANY, u'p50/p95/p99: xx/xx/xx ms')
+        self.queues = wx.StaticText(panel, wx.ID_ANY, u'Queued/dropped: x/x')
+        
+        
+        ###settings###
+        # start stop button
+        self.start_stop = wx.Button(panel, wx.ID_ANY, "&Start")
+        #goes back to the latest pings after zooming or panning
+        self.live = wx.Button(panel, wx.ID_ANY, "Li&ve")
+        self.live.Disable()
+
+        # ping parameters
+        host_lbl = wx.StaticText(panel, wx.ID_ANY, 'Se&rvers')
+        self.host = wx.TextCtrl(panel, wx.ID_ANY,
+                                value = 'ping.sunet.se', size = (200,-1))
+        timeout_lbl = wx.StaticText(panel, wx.ID_ANY, 'Tim&eout')
+        self.timeout = FS(panel, wx.ID_ANY, size = (60, -1), value = 200,
+                            min_val = 100, max_val = 10000,
+                            increment = 10, digits = 0)
+        #seconds between the pings to each server
+        interval_lbl = wx.StaticText(panel, wx.ID_ANY, 'I&nterval (s)')
+        self.interval = FS(panel, wx.ID_ANY, size = (60, -1), value = 1,
+                            min_val = MIN_INTERVAL, max_val = 60,
+                            increment = 0.1, digits = 2)
+        #field for setting limit line in graph
+        limit_lbl = wx.StaticText(panel, wx.ID_ANY, 'Limi&t lvl')
+        self.limit = FS(panel, wx.ID_ANY, size = (50, -1), value = 70,
+                            min_val = 1, max_val = 1000,
+                            increment = 1, digits = 0)
+        #how many point should show on the graph
+        history_lbl = wx.StaticText(panel, wx.ID_ANY, '&History (s)')
+        self.history = FS(panel, wx.ID_ANY, size = (60, -1), value = 100,
+                            min_val = 100, max_val = 1000000,
+                            increment = 10, digits = 0)
+        #draw all servers in one plot instead of a plot each
+        self.shared = wx.CheckBox(panel, wx.ID_ANY, 'Sh&ared plot')
+        #draw the jitter of each server with its pings
+        self.plot_jitter = wx.CheckBox(panel, wx.ID_ANY, 'Plot &jitter')
+        #shade the range between the median and the 99th percentile
+        self.plot_band = wx.CheckBox(panel, wx.ID_ANY, 'p50-p99 &band')
+        #show the ping times as counts per time and ping time bucket
+        self.plot_heatmap = wx.CheckBox(panel, wx.ID_ANY, 'Heat&map')
+        #probe from a process of its own, so redraws can't delay the pings
+        self.separate = wx.CheckBox(panel, wx.ID_ANY, 'Se&parate process')
+
+        #------ Bindings ------#
+        self.start_stop.Bind(wx.EVT_BUTTON, self.onStart_Stop)
+        self.live.Bind(wx.EVT_BUTTON, self.onLive)
+        self.Bind(wx.EVT_CLOSE, self.onClose)
+        self.Bind(wx.EVT_SIZE, self.onResize)
+        self.history.Bind(EVT_FLOATSPIN, self.onHistory)
+
+        #------ Layout ------#
+        vsizer = wx.BoxSizer(wx.VERTICAL) #main sizer
+        hsizer_stats = wx.BoxSizer(wx.HORIZONTAL)
+        hsizer_stats_latest = wx.BoxSizer(wx.HORIZONTAL)
+        hsizer_quality = wx.BoxSizer(wx.HORIZONTAL)
+        hsizer_settings = wx.BoxSizer(wx.HORIZONTAL)
+        vsizer_host = wx.BoxSizer(wx.VERTICAL)
+        vsizer_timeout = wx.BoxSizer(wx.VERTICAL)
+        vsizer_interval = wx.BoxSizer(wx.VERTICAL)
+        vsizer_limit = wx.BoxSizer(wx.VERTICAL)
+        vsizer_history = wx.BoxSizer(wx.VERTICAL)
+        vsizer_options = wx.BoxSizer(wx.VERTICAL)
+
+        #build text input sizers
+        vsizer_host.Add(host_lbl, 0, wx.ALIGN_LEFT)
+        vsizer_host.Add(self.host, 0, wx.ALIGN_LEFT)
+
+        vsizer_timeout.Add(timeout_lbl, 0, wx.ALIGN_LEFT)
+        vsizer_timeout.Add(self.timeout, 0, wx.ALIGN_LEFT)
+
+        vsizer_interval.Add(interval_lbl, 0, wx.ALIGN_LEFT)
+        vsizer_interval.Add(self.interval, 0, wx.ALIGN_LEFT)
+
+        vsizer_limit.Add(limit_lbl, 0, wx.ALIGN_LEFT)
+        vsizer_limit.Add(self.limit, 0, wx.ALIGN_LEFT)
+
+        vsizer_history.Add(history_lbl, 0, wx.ALIGN_LEFT)
+        vsizer_history.Add(self.history, 0, wx.ALIGN_LEFT)
+
+        vsizer_options.Add(self.shared, 0, wx.ALIGN_LEFT)
+        vsizer_options.Add(self.plot_jitter, 0, wx.ALIGN_LEFT)
+        vsizer_options.Add(self.plot_band, 0, wx.ALIGN_LEFT)
+        vsizer_options.Add(self.plot_heatmap, 0, wx.ALIGN_LEFT)
+        vsizer_options.Add(self.separate, 0, wx.ALIGN_LEFT)
+        
+        #sizer with status information
+        hsizer_stats.Add(self.ping_avg, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        hsizer_stats.Add(self.packet_loss, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        #sizer with latest stats (last 10 pings)
+        hsizer_stats_latest.Add(self.ping_avg_latest, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        hsizer_stats_latest.Add(self.packet_loss_latest, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        #sizer with the voice quality
+        hsizer_quality.Add(self.jitter, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        hsizer_quality.Add(self.quality, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        hsizer_quality.Add(self.percentiles, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        hsizer_quality.Add(self.queues, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        
+        #sizer with controls for settings
+        hsizer_settings.Add(self.start_stop, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_BOTTOM,
+                            10)
+        hsizer_settings.Add(self.live, 0,
+                            wx.RIGHT | wx.ALIGN_BOTTOM,
+                            10)
+        hsizer_settings.Add(vsizer_host, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        hsizer_settings.Add(vsizer_timeout, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        hsizer_settings.Add(vsizer_interval, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        hsizer_settings.Add(vsizer_limit, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        hsizer_settings.Add(vsizer_history, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+        hsizer_settings.Add(vsizer_options, 0,
+                            wx.RIGHT | wx.LEFT | wx.ALIGN_CENTER,
+                            10)
+
+        #main layout
+        vsizer.Add(self.plot, 1, wx.EXPAND)
+        vsizer.Add(hsizer_stats, 0, wx.ALIGN_CENTER | wx.TOP, 5)
+        vsizer.Add(hsizer_stats_latest, 0, wx.ALIGN_CENTER, 0)
+        vsizer.Add(hsizer_quality, 0, wx.ALIGN_CENTER | wx.BOTTOM, 5)
+        vsizer.Add(hsizer_settings, 0, wx.ALIGN_CENTER | wx.TOP, 0)
+
+        #finalize
+        panel.SetSizerAndFit(vsizer)
+        #self.SetMinSize(vsizer.GetMinSize())
+        self.GetBestSize()
+        self.Show(True)
+        #the pinged hosts, the labels below the plot show the first one
+        self.traces = []
+        #the heatmap of each sub-plot when they are plotted
+        self.heatmaps = []
+        #carries the pings from the probes to the plot and the storage
+        self.bus = sample_bus()
+        #set while the user looks at a zoomed or panned view of the pings,
+        #drawn relative to the time of the last live frame
+        self.browsing = False
+        self.view_changed = False
+        self.setting_limits = False
+        self.drawn_now = time()
+        #redraws the plot when new pings have arrived
+        self.render = RenderScheduler(self, self.onPlotting,
+                                        self.has_new_pings, self.max_fps)
+        self.stoprequest.set()
+
+
+    ###-----Events bound to specific buttons-----###
+    def onClose(self, event):
+        """
+        Should ensure that a proper exit is done
+        """
+        if not self.stoprequest.isSet():
+            self.stop_ping()
+            #sleep to let the thread have time to halt
+            sleep(max(1, self.timeout.GetValue() // 1000))
+        #death to everything
+        self.Destroy()
+
+    def onHistory(self, event):
+        """
+        Changes how much ping data is kept
+        """
+        for trace in self.traces:
+            trace.resize(self.history.GetValue())
+
+    def onLive(self, event):
+        """
+        Goes back to following the latest pings
+        """
+        self.browsing = False
+        self.live.Disable()
+        self.set_plot_limits()
+
+    def onView(self, axes):
+        """
+        Called when the x-axis limits of a sub-plot change. When it is the
+        user zooming or panning the latest pings are no longer followed.
+        """
+        if self.setting_limits:
+            return
+        if not self.browsing:
+            self.browsing = True
+            self.live.Enable()
+        self.view_changed = True
+
+    def onResize(self, event):
+        self.plot.figure.tight_layout()
+        event.Skip()
+        
+        
+    def onStart_Stop(self, event):
+        """
+        Starts or stops the pinging of the server
+        """
+        if self.stoprequest.isSet():
+            self.start_ping()
+        else:
+            self.stop_ping()
+
+
+    def excepthook(self, etype, value, tb):
+        """
+        exception hook to log error and display a message dialog.
+        """
+        message = '\nUncaught exception:\n'
+        message += ''.join(traceback.format_exception(etype, value, tb))
+        with open('error.log', 'a') as log:
+            log.write(message)
+
+        d = wx.MessageDialog(self, "{0}: {1}".format(etype.__name__, value),
+                            "Unhandled exception", wx.OK | wx.ICON_ERROR)
+        
+        if etype is wx.PyAssertionError:
+            self.stop_ping()
+        d.ShowModal()
+        d.Destroy()
+
+
+    def ping_all(self, hosts, timeout, interval, separate=False):
+        """
+        Pings all hosts from a single socket, or runs the ping program for
+        each host when not allowed to open ICMP sockets. The outputs are
+        read from this thread, except on windows where each host needs a
+        thread and ping.exe pings once a second whatever the interval.
+
+        The pings are published on the bus, the plot data and the storage
+        are updated from threads of their own so that neither can hold up
+        the probes or the other.
+
+        keyword arguments:
+        separate -- (optional) True to probe from a separate process, which
+            takes the timestamps outside the reach of the GUI (default: False)
+        """
+        consumers = [(self.ping_it, 'plot', PLOT_QUEUE)]
+        if self.data_dir:
+            #older pings can be looked at by zooming out
+            for trace in self.traces:
+                trace.load(self.data_dir)
+            consumers.append((self.store_it, 'storage', STORE_QUEUE))
+        self.bus = sample_bus()
+        for consumer, name, capacity in consumers:
+            thread = Thread(target=consumer, args=(self.bus.subscribe(name,
+                            capacity, DROP_OLDEST),))
+            thread.setDaemon(True)
+            thread.start()
+        try:
+            if not self.source == None:
+                probers = [self.source(hosts, timeout, interval)]
+            elif separate:
+                probers = [process_probe(hosts, timeout, interval)]
+            else:
+                probers = [probe(hosts, timeout, interval)]
+        except socket.error:
+            probers = [single_ping(host, timeout) for host in hosts]
+        for prober in probers[1:]:
+            thread = Thread(target=self.bus.run,
+                            args=(prober, self.stoprequest))
+            thread.setDaemon(True)
+            thread.start()
+        try:
+            self.bus.run(probers[0], self.stoprequest)
+        finally:
+            self.bus.close()
+
+    def ping_it(self, pings):
+        """
+        Adds the pings to the plot data and stats of the hosts, until the
+        pinging stops
+
+        keyword arguments:
+        pings -- bus.subscription with (host, (ping_time, date))
+        """
+        traces = dict((trace.host, trace) for trace in self.traces)
+        for host, (new_ping_ms, new_ping_date) in pings:
+            trace = traces[host]
+            with trace.lock:
+                #the ring buffer drops the oldest value when full
+                trace.ping_data.append(new_ping_ms, new_ping_date)
+                trace.stats.add(new_ping_ms)
+                trace.jitter_data.append(trace.stats.jitter.jitter,
+                                        new_ping_date)
+                trace.buckets.add(new_ping_date, new_ping_ms)
+                trace.rollup.add(new_ping_date, new_ping_ms)
+                trace.heatmap.add(new_ping_date, new_ping_ms)
+                trace.recent.append(new_ping_date, new_ping_ms)
+        #cleanup remove the line objects
+        for index in range(self.plot.layout[-1]):
+            wx.CallAfter(self.plot.clear_lines, index)
+
+    def store_it(self, pings):
+        """
+        Stores the pings of every host in the data directory, until the
+        pinging stops
+
+        keyword arguments:
+        pings -- bus.subscription with (host, (ping_time, date))
+        """
+        storage = {}
+        try:
+            for host, (ping_ms, ping_date) in pings:
+                if not host in storage:
+                    storage[host] = series_writer(
+                            series_path(self.data_dir, host))
+                storage[host].append(ping_date, ping_ms)
+        finally:
+            for writer in storage.values():
+                writer.close()
+    
+    
+    def has_new_pings(self):
+        """
+        Checks if pings have arrived or the view has changed since the plot
+        was last drawn
+        """
+        if self.view_changed:
+            return True
+        for trace in self.traces:
+            if not trace.ping_data.seq == trace.drawn_seq:
+                return True
+        return False
+
+    def onPlotting(self):
+        """
+        Draws all pings that have arrived since the last frame, called by
+        the render scheduler. All sub-plots are shown in a single blit.
+        """
+        if self.browsing:
+            self.plot_view()
+            return
+        hist_len = int(self.history.GetValue())
+        now = self.drawn_now = time()
+        x_limit = [-hist_len, 0]
+        limit_value = self.limit.GetValue()
+        #the limits that fit the data of all hosts of each sub-plot
+        wanted = [axis_limit(x_limit, limit_value, [])
+                    for plot_lim in self.plot_lims]
+        plot_lines = [[line_limit] for line_limit in self.limit_lines]
+
+        for trace in self.traces:
+            #consistent copy, the ping thread keeps appending meanwhile
+            trace.drawn_seq, trunc_ping_date, trunc_ping_ms = \
+                    trace.ping_data.snapshot(start=now - hist_len)
+            #no need to draw more than a few points per pixel
+            trunc_ping_date, trunc_ping_ms = trace.decimator.decimate(
+                    trunc_ping_date, trunc_ping_ms, now - hist_len, now,
+                    self.plot.get_pixel_width(trace.index))
+            #convert ping time to relative time from current time
+            was_pinged = get_time_diff(trunc_ping_date, now)
+            
+            #efficient plotting, the heatmap replaces the pings
+            trace.line_ping.set_data(was_pinged, trunc_ping_ms)
+            trace.line_ping.set_visible(not self.heatmaps)
+            trace.line_timeout.set_data(*nan_line_creator(was_pinged,
+                                                        trunc_ping_ms))
+            plot_lines[trace.index] += [trace.line_ping, trace.line_timeout]
+            if not trace.line_jitter == None:
+                jitter_date, jitter_ms = trace.jitter_data.snapshot(
+                        start=now - hist_len)[1:]
+                jitter_date, jitter_ms = trace.jitter_decimator.decimate(
+                        jitter_date, jitter_ms, now - hist_len, now,
+                        self.plot.get_pixel_width(trace.index))
+                trace.line_jitter.set_data(get_time_diff(jitter_date, now),
+                                            jitter_ms)
+                plot_lines[trace.index].append(trace.line_jitter)
+            if not trace.band == None:
+                band_date, band_ms = trace.buckets.band(now - hist_len)
+                self.plot.set_band(trace.band, get_time_diff(band_date, now),
+                                    band_ms[:, 0], band_ms[:, 1])
+                #below the lines
+                plot_lines[trace.index].insert(0, trace.band)
+            if not trace.label == None:
+                trace.label.set_text(trace.status())
+                plot_lines[trace.index].append(trace.label)
+            top = axis_limit(x_limit, limit_value, trunc_ping_ms)[3]
+            wanted[trace.index][3] = max(wanted[trace.index][3], top)
+
+        #the counts of all hosts sharing a sub-plot are added up
+        for index, image in enumerate(self.heatmaps):
+            traces = [trace for trace in self.traces if trace.index == index]
+            counts = 0
+            for trace in traces:
+                column_date, trace_counts = trace.heatmap.matrix(now)
+                counts = counts + trace_counts
+            #the heatmaps of the hosts of a sub-plot have the same rows
+            self.plot.set_heatmap(image, get_time_diff(column_date, now),
+                                    traces[0].heatmap.centers, counts)
+            plot_lines[index].insert(0, image)
+
+        #update the y_limit lines and the plot limits
+        y_limit = [limit_value]*2
+        changed = False
+        for index, line_limit in enumerate(self.limit_lines):
+            line_limit.set_data(x_limit, y_limit)
+            #a single spike shouldn't force a full redraw
+            plot_lim_new = limit_hysteresis(self.plot_lims[index],
+                                            wanted[index])
+            if not self.plot_lims[index] == plot_lim_new:
+                self.plot_lims[index] = plot_lim_new
+                changed = True
+        #only redo the plot limits and grid if needed
+        if changed:
+            self.set_plot_limits()
+        else:
+            self.plot.update_plots_only(list(enumerate(plot_lines)))
+        #update status texts
+        self.set_packet_loss_status()
+        self.set_ping_avg_status()
+        self.set_quality_status()
+        
+    def plot_view(self):
+        """
+        Draws the pings in the zoomed or panned view of each sub-plot,
+        called instead of onPlotting while the user looks at older pings.
+        Views longer than the history are drawn from the rollups.
+        """
+        self.view_changed = False
+        now = self.drawn_now
+        limit_value = self.limit.GetValue()
+        plot_lines = []
+        views = []
+        for index, line_limit in enumerate(self.limit_lines):
+            x1, x2 = self.plot.sub_plots(index).axes.get_xlim()
+            views.append((now + x1, now + x2))
+            line_limit.set_data([x1, x2], [limit_value]*2)
+            plot_lines.append([line_limit])
+
+        for trace in self.traces:
+            trace.drawn_seq = trace.ping_data.seq
+            start, end = views[trace.index]
+            ping_date, ping_ms = trace.view(start, end,
+                    self.plot.get_pixel_width(trace.index))
+            was_pinged = get_time_diff(ping_date, now)
+            trace.line_ping.set_data(was_pinged, ping_ms)
+            trace.line_ping.set_visible(True)
+            trace.line_timeout.set_data(*nan_line_creator(was_pinged,
+                                                        ping_ms))
+            #the band, jitter and labels keep showing the latest pings
+            plot_lines[trace.index] += [artist for artist in (trace.band,
+                    trace.line_ping, trace.line_timeout, trace.line_jitter,
+                    trace.label) if not artist == None]
+        self.plot.update_plots_only(list(enumerate(plot_lines)))
+        self.set_view_status(*views[self.traces[0].index])
+        
+    def set_plot_limits(self):
+        """
+        Sets the limits of all sub-plots with a single draw, without
+        taking it for the user zooming or panning
+        """
+        self.setting_limits = True
+        try:
+            with self.plot.batch():
+                for index, plot_lim in enumerate(self.plot_lims):
+                    self.plot.set_limits(plot_lim, index)
+        finally:
+            self.setting_limits = False
+        
+        
+    def plotting_init(self, hosts, shared):
+        """
+        Initializes the plot and saves the lines so that the plot can be
+        manipulated efficiently...
+
+        keyword arguments:
+        hosts -- list of the servers to plot
+        shared -- True to draw all servers in one plot, else each server
+            gets a plot of its own
+        """
+        count = 1 if shared else len(hosts)
+        #initialize data for the first line
+        init_limit = self.limit.GetValue()
+        x_limit = [-100, 0]
+        y_limit = [init_limit]*2
+        
+        #a single draw when all is set up
+        with self.plot.batch():
+            if self.plot.layout[-1] > count:
+                self.plot.remove_subplots(self.plot.layout[-1] - count)
+            else:
+                self.plot.add_subplots(count - self.plot.layout[-1])
+            self.plot_lims = []
+            self.limit_lines = []
+            self.heatmaps = []
+            for index in range(count):
+                #clear out any previous data
+                self.plot.clear_lines(index)
+                self.plot_lims.append(axis_limit(x_limit, init_limit, [0]))
+                self.plot.set_limits(self.plot_lims[index], index)
+                self.limit_lines += self.plot.redraw(x_limit, y_limit,
+                                    index=index, color='r', draw=False)
+                if self.plot_heatmap.IsChecked():
+                    self.heatmaps.append(self.plot.add_heatmap(index=index,
+                                    draw=False))
+            
+            self.traces = []
+            for i, host in enumerate(hosts):
+                index = 0 if shared else i
+                trace = host_trace(host, index, self.history.GetValue(),
+                                    self.latest_count,
+                                    self.interval.GetValue())
+                color = TRACE_COLORS[i % len(TRACE_COLORS)] \
+                        if shared else 'dodgerblue'
+                trace.line_ping = self.plot.redraw(*([0,0],)*2,
+                                    index=index, draw=False, color=color,
+                                    hold=True, marker='x')[0]
+                trace.line_timeout = self.plot.redraw(*([0,0],)*2,
+                                    index=index, draw=False, color='r',
+                                    hold=True, marker='', linestyle='--')[0]
+                if self.plot_band.IsChecked():
+                    trace.band = self.plot.add_band(index=index, draw=False,
+                                    facecolor=color, edgecolor='none',
+                                    alpha=0.3)
+                if self.plot_jitter.IsChecked():
+                    trace.line_jitter = self.plot.redraw(*([0,0],)*2,
+                                    index=index, draw=False, color=color,
+                                    hold=True, marker='', linestyle=':')[0]
+                if len(hosts) > 1:
+                    #stack the labels of the hosts sharing a plot
+                    row = i if shared else 0
+                    trace.label = self.plot.add_text(0.01, 0.97 - 0.06 * row,
+                                    trace.status(), index=index, draw=False,
+                                    color=color if shared else 'white',
+                                    verticalalignment='top', fontsize=10)
+                self.traces.append(trace)
+            self.set_plot_limits()
+        #follow the zooming and panning of the toolbar
+        for index in range(count):
+            self.plot.sub_plots(index).axes.callbacks.connect(
+                    'xlim_changed', self.onView)
+        
+        
+    def set_ping_avg_status(self):
+        """
+        Updates the average ping text
+        """
+        ping_format = u'{0:.0f}±{1:.0f} ms'
+        stats = self.traces[0].stats[0]
+        lbl = u'Ping average: ' + ping_format.format(stats.mean, stats.std)
+        self.ping_avg.SetLabel(lbl)
+        
+        #get stats for the latest ping packets
+        stats = self.traces[0].stats[1]
+        lbl = u'Last {0:d} avg: '.format(self.latest_count)
+        lbl += ping_format.format(stats.mean, stats.std)
+        self.ping_avg_latest.SetLabel(lbl)
+        
+    def set_view_status(self, start, end):
+        """
+        Updates the average and packet loss texts with the stats of the
+        pings in view
+
+        keyword arguments:
+        start -- the earliest date in view
+        end -- the latest date in view
+        """
+        count, loss_rate, mean, std = self.traces[0].rollup.summary(start,
+                                                                    end)
+        self.ping_avg.SetLabel(u'View average: {0:.0f}±{1:.0f} ms'.format(
+                                mean, std))
+        self.packet_loss.SetLabel(u'View loss: {0:.0f} % of {1:d} packets'
+                                .format(loss_rate * 100, count))
+        
+    def set_quality_status(self):
+        """
+        Updates the jitter and voice quality texts
+        """
+        stats = self.traces[0].stats
+        self.jitter.SetLabel(u'Jitter: {0:.1f} ms (IPDV {1:+.1f} ms)'.format(
+                                stats.jitter.jitter, stats.jitter.ipdv))
+        self.quality.SetLabel(u'R-factor: {0:.0f} (MOS {1:.1f})'.format(
+                                *stats.quality()))
+        self.percentiles.SetLabel(u'p50/p95/p99: {0:.0f}/{1:.0f}/{2:.0f} ms'
+                                .format(*stats[0].percentiles()))
+        #samples waiting for and dropped by each consumer of the pings
+        self.queues.SetLabel(u'Queued/dropped: ' + u', '.join(
+                                u'{0!s} {1:d}/{2:d}'.format(*report)
+                                for report in self.bus.report()))
+        
+    def set_packet_loss_status(self):
+        """
+        Updates the packet loss rate text
+        """
+        lbl_format = u'{0:.0f} % ({1:d} packets lost)'
+        stats = self.traces[0].stats[0]
+        lbl = u'Packet loss: ' + lbl_format.format(stats.loss_rate * 100,
+                                                    stats.loss_count)
+        self.packet_loss.SetLabel(lbl)
+        
+        #get stats for the latest ping packets
+        stats = self.traces[0].stats[1]
+        lbl = u'Last {0:d} loss: '.format(self.latest_count)
+        lbl += lbl_format.format(stats.loss_rate * 100, stats.loss_count)
+        self.packet_loss_latest.SetLabel(lbl)
+        
+    
+    def start_ping(self):
+        hosts = split_hosts(self.host.GetValue())
+        if not hosts:
+            return
+        self.stoprequest.clear()
+        self.browsing = False
+        self.live.Disable()
+        #initialize plot variables and the ping data of every host
+        #ping_all doesn't do any UI manipulation, the plot is drawn by the
+        #render scheduler from the data the ping threads store
+        self.plotting_init(hosts, self.shared.IsChecked())
+        self.render.start()
+        keyargs = { 'hosts': hosts,
+                    'timeout': self.timeout.GetValue(),
+                    'interval': self.interval.GetValue(),
+                    'separate': self.separate.IsChecked()
+                    }
+        thread = Thread(target=self.ping_all, kwargs=keyargs)
+        thread.setDaemon(True)
+        thread.start()
+        self.start_stop.SetLabel("&Stop")
+    def stop_ping(self):
+        self.stoprequest.set()
+        self.render.stop()
+        self.start_stop.SetLabel("&Start")
+
+
+
+def split_hosts(text):
+    """
+    Returns the servers in a text where they are separated by spaces,
+    commas or semicolons, without duplicates
+
+    keyword arguments:
+    text -- the text with the servers
+    """
+    hosts = []
+    for host in re.split(r'[\s,;]+', text):
+        if host and not host in hosts:
+            hosts.append(host)
+    return hosts
+
+
+def axis_limit(x_limit, min_y, y_data):
+    """
+    Will return the axis limits for a plot to fit the all the y_data within view.
+    Shows the highest y-value + 5
+
+    keyword arguments:
+    x_limit -- a list with 2 integers defining the limits for the x_axis
+    min_y -- the minimum value of the y-axis
+    y_data -- points plotted on the y axis
+    """
+    output = x_limit + [0, np.nanmax(np.append(y_data, min_y)) + 5]
+
+    return output
+
+
+def limit_hysteresis(current, wanted, shrink=0.5):
+    """
+    Returns axis limits where the top of the y-axis only changes in steps.
+    It grows to the nearest round number above the wanted top and only
+    shrinks when the wanted top is below a fraction of the current one, so
+    that the limits, and the plot with them, rarely have to be redrawn.
+
+    keyword arguments:
+    current -- the current axis limits [x1, x2, y1, y2]
+    wanted -- the limits that would fit the data [x1, x2, y1, y2]
+    shrink -- (optional) the fraction of the current top below which the
+        axis shrinks (default: 0.5)
+    """
+    top = wanted[3]
+    if current[3] >= top and top >= current[3] * shrink:
+        return wanted[:3] + [current[3]]
+
+    #nearest of 1, 1.5, 2, 3, 5, 7 times a power of ten
+    decade = 10 ** np.floor(np.log10(top))
+    steps = np.array([1, 1.5, 2, 3, 5, 7, 10]) * decade
+    return wanted[:3] + [float(steps[np.searchsorted(steps, top)])]
+
+
+def get_time_diff(time_list, ref_time):
+    """
+    Calaculates the time difference between all dates in a list and a
+    reference date
+
+    Keyword arguments:
+    time_list -- a list with dates to calculate the time difference for
+    ref_time -- The reference date to subtract from the time_list
+    """
+
+    #return [element - ref_time for element in time_list]
+    return np.subtract(time_list, ref_time)
+
+
+def nan_line_creator(x_axis, y_axis):
+    """
+    Returns an x- and y-axis that can draw lines to span over nan elements
+    in the given y-axis. Each run of nan elements gives one line from the
+    preceding to the succeeding value, a run at the start or end of the
+    axis is drawn flat from its only neighbour. The lines are separated by
+    nan elements.
+
+    keyword arguments:
+    x_axis -- a list or array that contain the x-axis values
+    y_axis -- a list or array that contain the y-axis values
+    """
+    x_axis = np.asarray(x_axis, dtype=np.float64)
+    y_axis = np.asarray(y_axis, dtype=np.float64)
+    length = len(y_axis)
+    is_nan = np.isnan(y_axis)
+
+    #if length of axis vars =1 or nothing to span between just exit here
+    if length <= 1 or is_nan.all() or not is_nan.any():
+        return ([], [])
+
+    #indices where runs of nan elements start resp. have ended
+    edges = np.flatnonzero(is_nan[1:] != is_nan[:-1]) + 1
+    if is_nan[0]:
+        edges = np.concatenate(([0], edges))
+    if is_nan[-1]:
+        edges = np.append(edges, length)
+    before = edges[0::2] - 1
+    after = edges[1::2]
+    first = before < 0
+    last = after == length
+    before_valid = np.where(first, after, before)
+    after_valid = np.where(last, before, after)
+
+    #one row per line: start, end and a nan element separating the lines
+    x_out = np.empty((len(before), 3))
+    y_out = np.empty((len(before), 3))
+    x_out[:, 0] = x_axis[np.maximum(before, 0)]
+    x_out[:, 1] = x_axis[np.minimum(after, length - 1)]
+    y_out[:, 0] = y_axis[before_valid]
+    y_out[:, 1] = y_axis[after_valid]
+    x_out = x_out.ravel()[:-1].tolist()
+    y_out = y_out.ravel()[:-1].tolist()
+    x_out[2::3] = y_out[2::3] = [nan] * (len(before) - 1)
+
+    return (x_out, y_out)
+
+
+
+
+def installThreadExcepthook():
+    """
+    Workaround for sys.excepthook thread bug
+    From
+http://spyced.blogspot.com/2007/06/workaround-for-sysexcepthook-bug.html
+
+(https://sourceforge.net/tracker/?func=detail&atid=105470&aid=1230540&
+group_id=5470).
+    Call once from __main__ before creating any threads.
+    If using psyco, call psyco.cannotcompile(threading.Thread.run)
+    since this replaces a new-style class method.
+    """
+    init_old = Thread.__init__
+    def init(self, *args, **kwargs):
+        init_old(self, *args, **kwargs)
+        run_old = self.run
+        def run_with_except_hook(*args, **kw):
+            try:
+                run_old(*args, **kw)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except:
+                sys.excepthook(*sys.exc_info())
+        self.run = run_with_except_hook
+    Thread.__init__ = init
+
+
+def main(source=None, data_dir=None):
+    """
+    Runs the program
+
+    Keyword arguments:
+    source -- (optional) function like ping_cli.probe returning the prober
+        of the hosts, None to ping them (default: None)
+    data_dir -- (optional) directory to store the ping results in, empty
+        to not store them, None for MyForm.data_dir (default: None)
+    """
+    installThreadExcepthook()
+
+    app = wx.App()
+    frame = MyForm(source, data_dir)
+    app.MainLoop()
+
+
+# Run the program
+if __name__ == "__main__":
+    #the prober process of a frozen program starts here
+    multiprocessing.freeze_support()
+    main()
+
+
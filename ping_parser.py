@@ -0,0 +1,120 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Parsing of the output from the ping programs of different platforms.
+
+Understands the output of windows ping.exe, linux iputils, busybox and
+BSD/macOS ping. All patterns are compiled once and work directly on the
+bytes read from the pipe, several lines at a time.
+"""
+from collections import namedtuple
+from numpy import NaN
+import re
+
+#time is NaN when a timeout occured, the other fields are None if unknown
+reply = namedtuple('reply', ['time', 'seq', 'ttl', 'size'])
+
+#64 bytes from 1.2.3.4: icmp_seq=1 ttl=55 time=12.3 ms (iputils, BSD)
+#64 bytes from 1.2.3.4: seq=0 ttl=64 time=0.094 ms (busybox)
+_UNIX = (br'(?P<usize>\d+) bytes from [^\n]*?seq=(?P<useq>\d+) '
+        br'ttl=(?P<uttl>\d+) time[=<](?P<utime>\d+(?:\.\d+)?) ?ms')
+#Reply from 1.2.3.4: bytes=32 time=12ms TTL=55 (also localized versions)
+_WINDOWS = (br'=(?P<wsize>\d+) [^\s=]+[=<](?P<wtime>\d+)ms '
+            br'TTL=(?P<wttl>\d+)')
+#Request timed out. / Request timeout for icmp_seq 5 /
+#no answer yet for icmp_seq=5, at the start of the line
+_TIMEOUT = br'(?P<timeout>request timed? ?out|no answer)'
+#From 1.2.3.4 icmp_seq=1 Destination Host Unreachable /
+#PING: transmit failed. General failure.
+#Both are several words, which the host name in the header and statistics
+#lines can't be, so e.g. PING unreachable.example.com isn't a timeout
+_FAILURE = br'(?P<failure>destination [^\s:]+ unreachable|general failure)'
+
+LINE_PATTERN = re.compile(br'^(?:' + _TIMEOUT + br'|[^\n]*?(?:' + _UNIX +
+                            br'|' + _WINDOWS + br'|' + _FAILURE +
+                            br'))[^\n]*', re.I | re.M)
+SEQ_PATTERN = re.compile(br'seq[= ](\d+)')
+#--- 1.2.3.4 ping statistics --- / Ping statistics for 1.2.3.4:, printed
+#when the ping program ends
+STATS_PATTERN = re.compile(br'^(?:--- [^\n]* ping statistics ---|'
+                            br'Ping statistics for )', re.I | re.M)
+
+
+def _to_reply(match):
+    """
+    Creates a reply from a match of LINE_PATTERN
+    """
+    utime, wtime = match.group('utime', 'wtime')
+    if not utime == None:
+        return reply(float(utime), int(match.group('useq')),
+                    int(match.group('uttl')), int(match.group('usize')))
+    if not wtime == None:
+        return reply(float(wtime), None,
+                    int(match.group('wttl')), int(match.group('wsize')))
+    #ping timeout occured set time to Not a number
+    seq = SEQ_PATTERN.search(match.group(0))
+    if not seq == None:
+        seq = int(seq.group(1))
+    return reply(NaN, seq, None, None)
+
+
+def parse_line(line):
+    """
+    Parses a single line of ping output.
+    Returns a reply or None if the line doesn't contain a reply or timeout.
+
+    Keyword arguments:
+    line -- a line of output from the ping program
+    """
+    match = LINE_PATTERN.match(line)
+    if match == None:
+        return None
+    return _to_reply(match)
+
+
+def parse_chunk(data):
+    """
+    Parses all complete lines in a chunk of ping output.
+    Returns a list of replies, lines without a reply are skipped.
+
+    Keyword arguments:
+    data -- output from the ping program containing any number of lines
+    """
+    return [_to_reply(match) for match in LINE_PATTERN.finditer(data)]
+
+
+class ping_stream():
+    """
+    Parses ping output that arrives in chunks of arbitrary size, as they are
+    read from a pipe. Partial lines are kept until the rest arrives.
+
+    attributes:
+    ended -- True once the statistics printed at the end have been read
+    """
+    def __init__(self):
+        self.buffer = b''
+        self.ended = False
+
+    def feed(self, chunk):
+        """
+        Adds a chunk of output and returns the replies of all lines that
+        have been completed.
+
+        Keyword arguments:
+        chunk -- bytes read from the ping program
+        """
+        data = self.buffer + chunk
+        end = data.rfind(b'\n') + 1
+        self.buffer = data[end:]
+        if end == 0:
+            return []
+        if STATS_PATTERN.search(data, 0, end):
+            self.ended = True
+        return parse_chunk(data[:end])
+
+    def flush(self):
+        """
+        Parses and returns whatever is left of a last unterminated line
+        """
+        data, self.buffer = self.buffer, b''
+        return parse_chunk(data)
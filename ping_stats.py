@@ -0,0 +1,302 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+from collections import deque
+from math import isnan, sqrt
+from numpy import NaN
+import numpy as np
+from threading import Lock
+
+from sketch import ddsketch
+
+
+class window_stats():
+    """
+    Running statistics over the latest samples of a window.
+
+    The mean and variance use Welford's update, extended to also remove
+    samples, so that adding a sample and dropping the oldest one is O(1).
+    Timeouts (NaN) are only counted as lost packets. The percentiles come
+    from a ddsketch that samples are added to and removed from alike.
+
+    attributes:
+    length -- the number of samples in a full window
+    count -- the number of samples currently in the window, lost included
+    loss_count -- the number of lost packets in the window
+    sketch -- ddsketch of the ping times in the window
+    """
+
+    def __init__(self, length):
+        """
+        Keyword arguments:
+        length -- number of samples in the window
+        """
+        self.length = int(length)
+        self.count = 0
+        self.loss_count = 0
+        self.sketch = ddsketch()
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        #monotonic queues of (sample index, value) for the min and max
+        self._min = deque()
+        self._max = deque()
+
+    def add(self, ping_ms, index):
+        """
+        Adds a sample to the window
+
+        Keyword arguments:
+        ping_ms -- the ping time, NaN for a lost packet
+        index -- running index of the sample
+        """
+        self.count += 1
+        if isnan(ping_ms):
+            self.loss_count += 1
+            return
+        self._n += 1
+        delta = ping_ms - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (ping_ms - self._mean)
+        self.sketch.add(ping_ms)
+
+        while self._min and self._min[-1][1] >= ping_ms:
+            self._min.pop()
+        self._min.append((index, ping_ms))
+        while self._max and self._max[-1][1] <= ping_ms:
+            self._max.pop()
+        self._max.append((index, ping_ms))
+
+    def remove(self, ping_ms, index):
+        """
+        Removes the oldest sample from the window
+
+        Keyword arguments:
+        ping_ms -- the ping time of the oldest sample
+        index -- running index of the oldest sample
+        """
+        self.count -= 1
+        if isnan(ping_ms):
+            self.loss_count -= 1
+            return
+        self._n -= 1
+        self.sketch.remove(ping_ms)
+        if self._n == 0:
+            self._mean = self._m2 = 0.0
+        else:
+            delta = ping_ms - self._mean
+            self._mean -= delta / self._n
+            #rounding may leave a tiny negative number
+            self._m2 = max(self._m2 - delta * (ping_ms - self._mean), 0.0)
+
+        if self._min and self._min[0][0] <= index:
+            self._min.popleft()
+        if self._max and self._max[0][0] <= index:
+            self._max.popleft()
+
+    @property
+    def mean(self):
+        return self._mean if self._n else NaN
+
+    @property
+    def std(self):
+        """
+        Population standard deviation, as given by numpy.nanstd
+        """
+        return sqrt(self._m2 / self._n) if self._n else NaN
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else NaN
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else NaN
+
+    @property
+    def loss_rate(self):
+        return self.loss_count / float(self.count) if self.count else NaN
+
+    def percentiles(self, qs=(0.5, 0.95, 0.99)):
+        """
+        Returns a list with the ping times at the quantiles, within 1 %
+
+        Keyword arguments:
+        qs -- (optional) sorted quantiles between 0 and 1
+            (default: (0.5, 0.95, 0.99))
+        """
+        return self.sketch.quantiles(qs)
+
+
+class jitter_stats():
+    """
+    Delay variation of the replies, updated in O(1) per sample.
+
+    The jitter is the interarrival jitter of RFC 3550, a running average of
+    the absolute difference between consecutive delays with a gain of
+    1/16, here taken from the round trip times. Lost packets are skipped,
+    so the differences are between consecutive replies.
+
+    attributes:
+    jitter -- the jitter in ms, NaN before the second reply
+    ipdv -- the delay variation of the latest reply to the one before
+        (RFC 3393) in ms, NaN before the second reply
+    """
+
+    def __init__(self):
+        self.jitter = NaN
+        self.ipdv = NaN
+        self._last = NaN
+
+    def add(self, ping_ms):
+        """
+        Adds a sample
+
+        Keyword arguments:
+        ping_ms -- the ping time, NaN for a lost packet
+        """
+        if isnan(ping_ms):
+            return
+        if not isnan(self._last):
+            self.ipdv = ping_ms - self._last
+            jitter = 0.0 if isnan(self.jitter) else self.jitter
+            self.jitter = jitter + (abs(self.ipdv) - jitter) / 16.0
+        self._last = ping_ms
+
+
+def r_factor(ping_ms, jitter_ms, loss_rate):
+    """
+    Estimates the E-model (ITU-T G.107) rating factor of a G.711 call over
+    the link, using the simplified delay impairment by Cole and Rosenbluth.
+    The one way delay is taken as half the round trip time plus twice the
+    jitter for the jitter buffer and 10 ms for the codec.
+
+    Keyword arguments:
+    ping_ms -- the average round trip time in ms
+    jitter_ms -- the jitter in ms
+    loss_rate -- the fraction of lost packets
+    """
+    delay = ping_ms / 2.0 + 2 * jitter_ms + 10
+    impairment = 0.024 * delay
+    if delay > 177.3:
+        impairment += 0.11 * (delay - 177.3)
+    #random loss without packet loss concealment, Bpl = 4.3 (G.113)
+    loss = loss_rate * 100
+    impairment += 95 * loss / (loss + 4.3)
+    return 93.2 - impairment
+
+
+def mos(rating):
+    """
+    Converts an E-model rating factor to a mean opinion score between 1
+    and 4.5
+
+    Keyword arguments:
+    rating -- the rating factor, see r_factor
+    """
+    if isnan(rating):
+        return NaN
+    if rating <= 0:
+        return 1.0
+    if rating >= 100:
+        return 4.5
+    return 1 + 0.035 * rating + 7e-6 * rating * (rating - 60) * (100 - rating)
+
+
+class sliding_stats():
+    """
+    Keeps window_stats for several window lengths at once, e.g. the last 10
+    samples and the whole history. The samples are kept once, in a circular
+    array as long as the longest window, from which each window finds the
+    sample that falls out of it.
+
+    attributes:
+    windows -- list of window_stats, in the order of the given lengths
+    jitter -- jitter_stats of all samples
+    lock -- held while adding or resizing
+    """
+
+    def __init__(self, lengths):
+        """
+        Keyword arguments:
+        lengths -- a list with the number of samples of each window
+        """
+        self.lock = Lock()
+        self.windows = [window_stats(length) for length in lengths]
+        self.jitter = jitter_stats()
+        self.samples = np.empty(max(lengths), dtype=np.float64)
+        #total number of samples added
+        self.index = 0
+
+    def __getitem__(self, index):
+        return self.windows[index]
+
+    def add(self, ping_ms):
+        """
+        Adds a sample to all windows, dropping the oldest sample of windows
+        that are full.
+
+        Keyword arguments:
+        ping_ms -- the ping time, NaN for a lost packet
+        """
+        with self.lock:
+            capacity = len(self.samples)
+            index = self.index
+            for window in self.windows:
+                if window.count == window.length:
+                    old = index - window.length
+                    window.remove(self.samples[old % capacity], old)
+                window.add(ping_ms, index)
+            self.samples[index % capacity] = ping_ms
+            self.index += 1
+            self.jitter.add(ping_ms)
+
+    def quality(self, window=0):
+        """
+        Returns the E-model rating factor and the mean opinion score from
+        the average ping time and loss of a window and the jitter
+
+        Keyword arguments:
+        window -- (optional) index of the window (default: 0)
+        """
+        stats = self.windows[window]
+        rating = r_factor(stats.mean, self.jitter.jitter, stats.loss_rate)
+        return rating, mos(rating)
+
+    def resize(self, window, length):
+        """
+        Changes the length of a window. The window is recalculated from the
+        kept samples, which is O(length) but only happens on resize.
+
+        Keyword arguments:
+        window -- index of the window to resize
+        length -- new number of samples in the window
+        """
+        length = int(length)
+        with self.lock:
+            capacity = len(self.samples)
+            kept = min(self.index, capacity)
+            #the oldest kept samples in order
+            order = np.arange(self.index - kept, self.index)
+            kept_samples = self.samples[order % capacity]
+            if length > capacity:
+                self.samples = np.empty(length, dtype=np.float64)
+                self.samples[order % length] = kept_samples
+
+            stats = window_stats(length)
+            for i in range(max(kept - length, 0), kept):
+                stats.add(kept_samples[i], order[i])
+            self.windows[window] = stats
+            if length < capacity:
+                #the longest window may have shrunk
+                self._shrink()
+
+    def _shrink(self):
+        """
+        Frees the kept samples not needed by any window
+        """
+        capacity = max(window.length for window in self.windows)
+        if capacity < len(self.samples):
+            order = np.arange(max(self.index - capacity, 0), self.index)
+            samples = np.empty(capacity, dtype=np.float64)
+            samples[order % capacity] = self.samples[order % len(self.samples)]
+            self.samples = samples
@@ -1,100 +1,363 @@
-#!/usr/bin/python2
-# -*- coding: UTF-8 -*-
-from numpy import NaN
-from os import system
-import re
-import subprocess
-import sys
-import traceback
-from time import sleep, time
-
-def excepthook(etype, value, tb):
-    message = '\nUncaught exception:\n'
-    message += ''.join(traceback.format_exception(etype, value, tb))
-    with open('error.log', 'a') as log:
-        log.write(message)
-#sys.excepthook = excepthook
-
-#needs some kind of threading support I think
-
-def get_ping_time(ping_string):
-    """
-    Retrieves the time for ping from the stdout string of ping.
-    Will set the time to NaN if timeout occured.
-
-    Keyword arguments:
-    ping_string -- return from the ping program
-    """
-    regex = '[<>=]([\d]+)?ms'
-    try:
-        ping_time = int(re.search(regex, ping_string).groups()[0])
-    except AttributeError:
-        pattern = '(time(d|out)|unreachable|General failure)'
-        flags = re.IGNORECASE
-        if not re.search(pattern, ping_string, flags) == None:
-            #ping timeout occured set return to Not a number
-            ping_time = NaN
-        else:
-            raise Exception("faulty ping string: {0!s}".format(ping_string))
-
-    return ping_time, time()
-
-class ping():
-
-    def __init__(self, server, timeout):
-        """
-        Will ping the specified server using the given timeout
-
-        Keyword arguments:
-        server -- the server url to ping
-        timeout -- the time to timeout in milliseconds (ms)
-        """
-        #convert timeout to int as float is not unexpected
-        cmd = 'ping {0!s} -t -w {1:d}'.format(server, int(timeout))
-
-        startupinfo = subprocess.STARTUPINFO()
-        #startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        startupinfo.dwFlags |= subprocess._subprocess.STARTF_USESHOWWINDOW
-        self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
-                                    stdin=subprocess.PIPE, shell=False,
-                                    startupinfo=startupinfo)
-        self.server = server
-        self.timeout = timeout
-
-    def __exit__(self, type, value, traceback):
-        #terminate the process
-        self.proc.kill()
-
-    def __enter__(self):
-        i=0
-        #dump the two first rows as they don't contain anything interesting
-        output = self.proc.stdout.readline()
-        output = self.proc.stdout.readline()
-
-        while not output == '':
-            output = self.proc.stdout.readline()
-            #if output.find('statistics') > -1:
-            if output.find('stat') > -1:
-                #end of data stream
-                break
-
-            yield get_ping_time(output)
-            i+=1
-
-        if i == 0:
-            raise Exception("cmd failed to run properly: {0!s}".format(output))
-
-class ping_native():
-    def __init__(self, server, timeout):
-        """
-        Will ping the specified server using the given timeout
-
-        Keyword arguments:
-        server -- the server url to ping
-        timeout -- the time to timeout in milliseconds (ms)
-        """
-
-        self.server = server
-        self.timeout = timeout
-
-
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+import errno
+from math import ceil
+from numpy import NaN
+from os import system, read, O_NONBLOCK
+import select
+import socket
+import struct
+import subprocess
+import sys
+import traceback
+from time import sleep
+try:
+    import fcntl
+except ImportError:
+    #windows, where pipes can't be selected anyway
+    fcntl = None
+
+from ping_parser import parse_line, ping_stream
+from scheduler import counter_ns, to_date
+
+def excepthook(etype, value, tb):
+    message = '\nUncaught exception:\n'
+    message += ''.join(traceback.format_exception(etype, value, tb))
+    with open('error.log', 'a') as log:
+        log.write(message)
+#sys.excepthook = excepthook
+
+#needs some kind of threading support I think
+
+def get_ping_time(ping_string):
+    """
+    Retrieves the time for ping from the stdout string of ping.
+    Will set the time to NaN if timeout occured.
+    Returns None if the string doesn't contain a reply or a timeout.
+
+    Keyword arguments:
+    ping_string -- return from the ping program
+    """
+    parsed = parse_line(ping_string)
+    if parsed == None:
+        return None
+
+    return parsed.time, to_date(counter_ns())
+
+
+def ping_command(server, timeout, interval=1.0, platform=sys.platform):
+    """
+    Returns the arguments that run the ping program of a platform until it
+    is killed, printing a line for every reply and timeout
+
+    Keyword arguments:
+    server -- the server url to ping
+    timeout -- the time to timeout in milliseconds (ms)
+    interval -- (optional) seconds between pings, ignored on windows
+        (default: 1.0)
+    platform -- (optional) the platform as in sys.platform
+    """
+    #convert timeout to int as float is not unexpected
+    if platform == 'win32':
+        #ping.exe pings once a second
+        return ['ping', server, '-t', '-w', '{0:d}'.format(int(timeout))]
+    interval = '{0:g}'.format(interval)
+    if platform.startswith('linux'):
+        #iputils takes the timeout in whole seconds, -O prints timeouts
+        return ['ping', '-n', '-O', '-i', interval, '-W',
+                '{0:d}'.format(int(ceil(timeout / 1000.0))), server]
+    #BSD and macOS take the timeout in ms and print timeouts anyway
+    return ['ping', '-n', '-i', interval, '-W',
+            '{0:d}'.format(int(timeout)), server]
+
+
+class ping():
+
+    def __init__(self, server, timeout, interval=1.0):
+        """
+        Will ping the specified server using the given timeout
+
+        Keyword arguments:
+        server -- the server url to ping
+        timeout -- the time to timeout in milliseconds (ms)
+        interval -- (optional) seconds between pings, ignored on windows
+            (default: 1.0)
+        """
+        options = {}
+        if sys.platform == 'win32':
+            startupinfo = subprocess.STARTUPINFO()
+            #startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            startupinfo.dwFlags |= subprocess._subprocess.STARTF_USESHOWWINDOW
+            options['startupinfo'] = startupinfo
+        self.proc = subprocess.Popen(ping_command(server, timeout, interval),
+                                    stdout=subprocess.PIPE,
+                                    stdin=subprocess.PIPE, shell=False,
+                                    **options)
+        self.server = server
+        self.timeout = timeout
+
+    def __exit__(self, type, value, traceback):
+        #terminate the process
+        self.proc.kill()
+
+    def __enter__(self):
+        i=0
+        stream = ping_stream()
+        output = ''
+        fd = self.proc.stdout.fileno()
+
+        while True:
+            #read whatever is available instead of a line at a time
+            chunk = read(fd, 4096)
+            if chunk == b'':
+                #end of data stream
+                break
+            #the replies in the chunk arrived before it was read
+            date = to_date(counter_ns())
+            if i == 0:
+                #kept for the error message in case nothing is parsed
+                output += chunk
+            for parsed in stream.feed(chunk):
+                yield parsed.time, date
+                i+=1
+            if stream.ended:
+                #the statistics are printed last
+                break
+
+        if i == 0:
+            raise Exception("cmd failed to run properly: {0!s}".format(output))
+
+class _pipe_poller():
+    """
+    Waits for any of a number of pipes to become readable. Uses epoll or
+    poll where available, which unlike select aren't limited to file
+    descriptors below FD_SETSIZE (usually 1024), and falls back to select
+    elsewhere.
+    """
+    def __init__(self):
+        self._fds = set()
+        if hasattr(select, 'epoll'):
+            self._poll = select.epoll()
+            self._events = select.EPOLLIN
+        elif hasattr(select, 'poll'):
+            self._poll = select.poll()
+            self._events = select.POLLIN
+        else:
+            self._poll = None
+
+    def register(self, fd):
+        self._fds.add(fd)
+        if not self._poll == None:
+            self._poll.register(fd, self._events)
+
+    def unregister(self, fd):
+        self._fds.discard(fd)
+        if not self._poll == None:
+            self._poll.unregister(fd)
+
+    def wait(self):
+        """
+        Returns the registered pipes that can be read or have been closed,
+        waiting until there is at least one
+        """
+        if self._poll == None:
+            return select.select(list(self._fds), [], [])[0]
+        while True:
+            try:
+                return [fd for fd, event in self._poll.poll()]
+            except (IOError, select.error) as error:
+                #interrupted by a signal
+                if not error.args[0] == errno.EINTR:
+                    raise
+
+    def close(self):
+        if hasattr(self._poll, 'close'):
+            self._poll.close()
+
+
+class ping_reader():
+    """
+    Runs the ping program for several servers and reads the output of all
+    of them from one thread, so the number of threads stays the same
+    whatever the number of servers. The pipes are made non-blocking and
+    waited on together with epoll or poll, see _pipe_poller. Whatever has
+    arrived is read and split into lines by a ping_stream per server.
+
+    Pipes can only be selected on POSIX systems, on windows each server
+    needs a ping of its own in a thread.
+    """
+    def __init__(self, servers, timeout, interval=1.0, command=ping_command):
+        """
+        Keyword arguments:
+        servers -- list of the server urls to ping
+        timeout -- the time to timeout in milliseconds (ms)
+        interval -- (optional) seconds between pings (default: 1.0)
+        command -- (optional) function returning the arguments of the ping
+            program from server, timeout and interval (default: ping_command)
+        """
+        if fcntl == None:
+            raise OSError("Pipes can't be polled on this platform")
+        #server and process of each pipe
+        self.procs = {}
+        try:
+            for server in servers:
+                proc = subprocess.Popen(command(server, timeout, interval),
+                                        stdout=subprocess.PIPE,
+                                        stdin=subprocess.PIPE, shell=False)
+                self.procs[proc.stdout.fileno()] = server, proc
+        except:
+            self.__exit__(None, None, None)
+            raise
+
+    def __exit__(self, type, value, traceback):
+        for server, proc in self.procs.values():
+            if proc.poll() == None:
+                proc.kill()
+            proc.wait()
+            proc.stdout.close()
+            proc.stdin.close()
+
+    def __enter__(self):
+        streams = {}
+        poller = _pipe_poller()
+        for fd in self.procs:
+            flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+            fcntl.fcntl(fd, fcntl.F_SETFL, flags | O_NONBLOCK)
+            streams[fd] = ping_stream()
+            poller.register(fd)
+        try:
+            for sample in self._read(streams, poller):
+                yield sample
+        finally:
+            poller.close()
+
+    def _read(self, streams, poller):
+        """
+        Yields the replies of all pipes until every ping program has ended
+        """
+        while streams:
+            ready = poller.wait()
+            #the replies in the chunks arrived before they were read
+            date = to_date(counter_ns())
+            for fd in ready:
+                try:
+                    chunk = read(fd, 4096)
+                except OSError as error:
+                    if error.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                        continue
+                    raise
+                if chunk == b'':
+                    #the ping program has ended
+                    replies = streams.pop(fd).flush()
+                    poller.unregister(fd)
+                else:
+                    replies = streams[fd].feed(chunk)
+                for parsed in replies:
+                    yield self.procs[fd][0], (parsed.time, date)
+
+
+class ping_native():
+    def __init__(self, server, timeout, interval=1.0):
+        """
+        Will ping the specified server using the given timeout.
+        The echo requests are sent from an ICMP socket owned by this object
+        instead of going through the ping program, by a multi_ping of the
+        single server, see multiping.multi_ping. The generator yields
+        (ping_time, date) like ping.
+
+        Keyword arguments:
+        server -- the server url to ping
+        timeout -- the time to timeout in milliseconds (ms)
+        interval -- (optional) seconds between echo requests, down to
+            scheduler.MIN_INTERVAL (default: 1.0)
+        """
+        #multiping imports the ICMP functions from this module
+        from multiping import multi_ping
+        self.server = server
+        self.pinger = multi_ping([server], timeout, interval)
+
+    def __exit__(self, type, value, traceback):
+        #release the socket
+        self.pinger.__exit__(type, value, traceback)
+
+    def __enter__(self):
+        for server, result in self.pinger.__enter__():
+            yield result
+
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+#same payload as the windows ping program
+ECHO_PAYLOAD = b'abcdefghijklmnopqrstuvwabcdefghi'
+
+def icmp_socket():
+    """
+    Opens a socket for sending ICMP echo requests.
+    Returns the socket and True if it is a raw socket, False if it is an
+    unprivileged datagram socket.
+    """
+    icmp = socket.getprotobyname('icmp')
+    try:
+        return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, icmp), False
+    except socket.error:
+        #raw sockets needs administrator or root privileges
+        return socket.socket(socket.AF_INET, socket.SOCK_RAW, icmp), True
+
+
+def checksum(data):
+    """
+    Calculates the internet checksum (RFC 1071) of a packet
+
+    Keyword arguments:
+    data -- the packet as a byte string
+    """
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack('!{0:d}H'.format(len(data) // 2), data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def echo_request(ident, seq, payload=ECHO_PAYLOAD):
+    """
+    Builds an ICMP echo request packet
+
+    Keyword arguments:
+    ident -- identifier of the request
+    seq -- sequence number of the request
+    payload -- (optional) data sent with the request
+    """
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    chksum = checksum(header + payload)
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, chksum, ident, seq)
+    return header + payload
+
+
+def parse_echo_reply(data):
+    """
+    Retrieves the type, identifier and sequence number of a received ICMP
+    packet. Error messages carry the header of the request that caused them,
+    so the identifier and sequence number are taken from the request.
+    Returns None for packets that don't concern an echo request.
+
+    Keyword arguments:
+    data -- received packet, with or without the IP header
+    """
+    if len(data) >= 20 and struct.unpack('!B', data[:1])[0] >> 4 == 4:
+        #strip the IP header, raw sockets always include it
+        data = data[(struct.unpack('!B', data[:1])[0] & 0x0F) * 4:]
+    if len(data) < 8:
+        return None
+
+    icmp_type, code, chksum, ident, seq = struct.unpack('!BBHHH', data[:8])
+    if icmp_type == ICMP_ECHO_REPLY:
+        return icmp_type, ident, seq
+    if icmp_type in (3, 11) and len(data) >= 36:
+        #unreachable or time exceeded, look at the original request
+        inner = data[8:]
+        inner = inner[(struct.unpack('!B', inner[:1])[0] & 0x0F) * 4:]
+        if struct.unpack('!B', inner[:1])[0] == ICMP_ECHO_REQUEST:
+            ident, seq = struct.unpack('!HH', inner[4:8])
+            return icmp_type, ident, seq
+    return None
@@ -0,0 +1,233 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Recorded and synthetic ping results, to run and measure the stats, storage
+and plotting without a network.
+
+All probers here work like ping_cli.probe, their generator yields
+(host, (ping_time, date)). A recorder passes on the pings of another
+prober and writes them to a file, one ping per line:
+
+    date<TAB>host<TAB>ping time in ms, nan for a timeout
+
+Lines starting with # are comments. A replay yields the pings of such a
+file, and synthetic makes them up with a configurable ping time
+distribution, loss bursts and spikes.
+
+At a speed of 1 the pings are yielded with the same time between them as
+recorded, at a speed of N N times faster. The dates are moved so that the
+first ping is at the start of the replay and scaled by the speed, so the
+plot and the stats see the pings as if they arrived now. With speed None
+the pings are yielded as fast as possible and keep their dates, which
+makes runs repeatable for benchmarks.
+"""
+import numpy as np
+from time import sleep, time
+
+from scheduler import counter_ns, to_date
+
+
+def _paced(samples, speed):
+    """
+    Yields the samples no sooner than their dates tell, sped up by speed
+
+    Keyword arguments:
+    samples -- iterable of (host, (ping_time, date)) in the order of date
+    speed -- how many times faster than recorded, None for as fast as
+        possible
+    """
+    if speed == None:
+        for sample in samples:
+            yield sample
+        return
+    first = None
+    for host, (ping_ms, ping_date) in samples:
+        if first == None:
+            first = ping_date
+            start = counter_ns()
+        due = start + int((ping_date - first) / speed * 1e9)
+        delay = due - counter_ns()
+        if delay > 0:
+            sleep(delay / 1e9)
+        yield host, (ping_ms, to_date(due))
+
+
+def read_recording(file_path, hosts=None):
+    """
+    Yields the recorded (host, (ping_time, date)) of a file
+
+    Keyword arguments:
+    file_path -- the file written by a recorder
+    hosts -- (optional) list of the hosts to read, None for all
+        (default: None)
+    """
+    with open(file_path, 'r') as recording:
+        for line in recording:
+            if line.startswith('#') or not line.strip():
+                continue
+            ping_date, host, ping_ms = line.rstrip('\r\n').split('\t')
+            if hosts == None or host in hosts:
+                yield host, (float(ping_ms), float(ping_date))
+
+
+class recorder():
+    """
+    Passes on the pings of a prober and writes them to a file that can be
+    replayed
+    """
+
+    def __init__(self, prober, file_path):
+        """
+        Keyword arguments:
+        prober -- context manager yielding (host, (ping_time, date)), see
+            ping_cli.probe
+        file_path -- the file to write, it is replaced
+        """
+        self.prober = prober
+        self.file_path = file_path
+        self.recording = None
+
+    def _record(self, pinger):
+        for host, (ping_ms, ping_date) in pinger:
+            #repr keeps every digit of the floats
+            self.recording.write('{0!r}\t{1!s}\t{2!r}\n'.format(ping_date,
+                                host, ping_ms))
+            yield host, (ping_ms, ping_date)
+
+    def __enter__(self):
+        self.recording = open(self.file_path, 'w')
+        self.recording.write('#date\thost\tping_ms\n')
+        return self._record(self.prober.__enter__())
+
+    def __exit__(self, type, value, traceback):
+        try:
+            self.prober.__exit__(type, value, traceback)
+        finally:
+            if not self.recording == None:
+                self.recording.close()
+
+
+def recorded(source, file_path):
+    """
+    Returns a function like source whose probers record their pings
+
+    Keyword arguments:
+    source -- function returning a prober from hosts, timeout and interval,
+        see ping_cli.probe
+    file_path -- the file to write, it is replaced
+    """
+    def recorded_source(hosts, timeout, interval):
+        return recorder(source(hosts, timeout, interval), file_path)
+    return recorded_source
+
+
+class replay():
+    """
+    Yields the pings of a file written by a recorder
+    """
+
+    def __init__(self, file_path, speed=1.0, hosts=None):
+        """
+        Keyword arguments:
+        file_path -- the file written by a recorder
+        speed -- (optional) how many times faster than recorded, None for
+            as fast as possible (default: 1.0)
+        hosts -- (optional) list of the hosts to replay, None for all
+            (default: None)
+        """
+        self.file_path = file_path
+        self.speed = speed
+        self.hosts = hosts
+
+    def __enter__(self):
+        return _paced(read_recording(self.file_path, self.hosts), self.speed)
+
+    def __exit__(self, type, value, traceback):
+        pass
+
+
+class synthetic():
+    """
+    Yields made up pings of the hosts, staggered over the interval like the
+    probes of a multi_ping. The ping times follow a gamma distribution.
+    Timeouts come in bursts: a host starts a burst with a probability that
+    gives the asked loss rate on average, and every ping of a burst ends
+    it with the probability 1 / burst. Spikes add an exponentially
+    distributed time to single pings, pings slower than the timeout are
+    timeouts.
+    """
+
+    def __init__(self, hosts, timeout, interval=1.0, rtt=20.0, jitter=5.0,
+                loss=0.01, burst=3.0, spikes=0.01, spike_ms=100.0,
+                rounds=None, speed=1.0, start=None, seed=0):
+        """
+        Keyword arguments:
+        hosts -- list of the made up servers
+        timeout -- the time to timeout in milliseconds (ms)
+        interval -- (optional) seconds between pings to each host
+            (default: 1.0)
+        rtt -- (optional) the mean ping time in ms (default: 20.0)
+        jitter -- (optional) the standard deviation of the ping time in ms
+            (default: 5.0)
+        loss -- (optional) the fraction of pings that time out
+            (default: 0.01)
+        burst -- (optional) the mean number of timeouts in a row
+            (default: 3.0)
+        spikes -- (optional) the fraction of pings with a spike
+            (default: 0.01)
+        spike_ms -- (optional) the mean time in ms added by a spike
+            (default: 100.0)
+        rounds -- (optional) the number of pings of each host, None to go
+            on until stopped (default: None)
+        speed -- (optional) how many times faster than real time, None for
+            as fast as possible (default: 1.0)
+        start -- (optional) the date of the first ping, None for now
+            (default: None)
+        seed -- (optional) seed of the random numbers (default: 0)
+        """
+        self.hosts = list(hosts)
+        self.timeout = timeout
+        self.interval = float(interval)
+        self.shape = (rtt / float(jitter)) ** 2
+        self.scale = jitter ** 2 / float(rtt)
+        #chance to start a burst, so that on average loss of the pings are
+        #in a burst
+        self.start_burst = loss / (burst * (1.0 - loss))
+        self.end_burst = 1.0 / burst
+        self.spikes = spikes
+        self.spike_ms = spike_ms
+        self.rounds = rounds
+        self.speed = speed
+        self.start = start
+        self.seed = seed
+
+    def _samples(self):
+        """
+        Yields the made up pings in the order of their dates
+        """
+        random = np.random.RandomState(self.seed)
+        count = len(self.hosts)
+        start = time() if self.start == None else self.start
+        offsets = np.arange(count) * self.interval / count
+        in_burst = np.zeros(count, dtype=bool)
+        number = 0
+        while self.rounds == None or number < self.rounds:
+            ping_ms = random.gamma(self.shape, self.scale, count)
+            spiked = random.uniform(size=count) < self.spikes
+            ping_ms[spiked] += random.exponential(self.spike_ms,
+                                                    spiked.sum())
+            draw = random.uniform(size=count)
+            in_burst = np.where(in_burst, draw >= self.end_burst,
+                                draw < self.start_burst)
+            ping_ms[in_burst | (ping_ms > self.timeout)] = np.nan
+            ping_date = start + number * self.interval + offsets
+            for host, value, date in zip(self.hosts, ping_ms.tolist(),
+                                        ping_date.tolist()):
+                yield host, (value, date)
+            number += 1
+
+    def __enter__(self):
+        return _paced(self._samples(), self.speed)
+
+    def __exit__(self, type, value, traceback):
+        pass
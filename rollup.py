@@ -0,0 +1,257 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Multi-resolution rollups of ping results.
+
+Each level sums up the pings in buckets of a fixed width, aligned to
+absolute time: the number of pings, lost pings, the min, max, sum and sum
+of squares of the ping times. All levels are updated as the pings arrive,
+so a view of any span can be drawn from the level with about one bucket
+per pixel, whatever the number of pings in it.
+"""
+from math import isnan
+import numpy as np
+from threading import Lock
+
+#(seconds per bucket, number of buckets) of each level, from fine to coarse
+LEVELS = ((1, 6 * 3600), (10, 8640), (60, 10080), (3600, 8784))
+
+
+class rollup_level():
+    """
+    Buckets of one width in a ring, the bucket with number n (counted from
+    the epoch) is kept in slot n % capacity as long as it is one of the
+    newest capacity buckets.
+
+    attributes:
+    width -- seconds per bucket
+    capacity -- the number of buckets kept
+    numbers -- the bucket number in each slot, -1 for empty slots
+    count, loss, min, max, sum, sum2 -- the fields of the buckets
+    """
+    fields = ('count', 'loss', 'min', 'max', 'sum', 'sum2')
+
+    def __init__(self, width, capacity):
+        """
+        Keyword arguments:
+        width -- seconds per bucket
+        capacity -- the number of buckets kept
+        """
+        self.width = float(width)
+        self.capacity = int(capacity)
+        self.numbers = np.full(self.capacity, -1, dtype=np.int64)
+        for name in self.fields:
+            setattr(self, name, np.empty(self.capacity, dtype=np.float64))
+        self.newest = -1
+
+    def _reset(self, slots, numbers):
+        """
+        Empties the slots to hold the buckets with the given numbers
+        """
+        self.numbers[slots] = numbers
+        self.count[slots] = self.loss[slots] = 0
+        self.sum[slots] = self.sum2[slots] = 0
+        self.min[slots] = np.inf
+        self.max[slots] = -np.inf
+
+    def add(self, ping_date, ping_ms):
+        """
+        Adds a ping to its bucket, pings older than the kept buckets are
+        dropped
+
+        Keyword arguments:
+        ping_date -- the date of the ping
+        ping_ms -- the ping time, NaN for a timeout
+        """
+        number = int(ping_date // self.width)
+        if number <= self.newest - self.capacity:
+            return
+        self.newest = max(self.newest, number)
+        slot = number % self.capacity
+        if not self.numbers[slot] == number:
+            self._reset(slot, number)
+        self.count[slot] += 1
+        if isnan(ping_ms):
+            self.loss[slot] += 1
+            return
+        self.sum[slot] += ping_ms
+        self.sum2[slot] += ping_ms * ping_ms
+        if ping_ms < self.min[slot]:
+            self.min[slot] = ping_ms
+        if ping_ms > self.max[slot]:
+            self.max[slot] = ping_ms
+
+    def extend(self, ping_date, ping_ms):
+        """
+        Adds many pings at once, e.g. when loading stored results
+
+        Keyword arguments:
+        ping_date -- sorted array with the dates of the pings
+        ping_ms -- array with the ping times, NaN for timeouts
+        """
+        if len(ping_date) == 0:
+            return
+        numbers = np.floor_divide(ping_date, self.width).astype(np.int64)
+        self.newest = max(self.newest, int(numbers[-1]))
+        keep = numbers > self.newest - self.capacity
+        numbers, ping_ms = numbers[keep], ping_ms[keep]
+        if len(numbers) == 0:
+            return
+
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(numbers)) + 1))
+        lost = np.isnan(ping_ms)
+        valid_ms = np.where(lost, 0, ping_ms)
+        bucket = numbers[starts]
+        slots = bucket % self.capacity
+        stale = ~(self.numbers[slots] == bucket)
+        self._reset(slots[stale], bucket[stale])
+
+        self.count[slots] += np.diff(np.append(starts, len(numbers)))
+        self.loss[slots] += np.add.reduceat(lost.astype(np.int64), starts)
+        self.sum[slots] += np.add.reduceat(valid_ms, starts)
+        self.sum2[slots] += np.add.reduceat(valid_ms * valid_ms, starts)
+        self.min[slots] = np.minimum(self.min[slots], np.minimum.reduceat(
+                                    np.where(lost, np.inf, ping_ms), starts))
+        self.max[slots] = np.maximum(self.max[slots], np.maximum.reduceat(
+                                    np.where(lost, -np.inf, ping_ms), starts))
+
+    def oldest(self):
+        """
+        Returns the start date of the oldest bucket that can be kept
+        """
+        return (self.newest - self.capacity + 1) * self.width
+
+    def query(self, start, end):
+        """
+        Returns the bucket numbers between start and end, oldest first,
+        with a copy of each field for them. Empty buckets are left out.
+
+        Keyword arguments:
+        start -- the earliest date
+        end -- the latest date
+        """
+        first = max(int(start // self.width), self.newest - self.capacity + 1)
+        last = min(int(end // self.width), self.newest)
+        numbers = np.arange(first, last + 1)
+        slots = numbers % self.capacity
+        used = self.numbers[slots] == numbers
+        slots = slots[used]
+        return numbers[used], dict((name, getattr(self, name)[slots])
+                                    for name in self.fields)
+
+
+class rollup_pyramid():
+    """
+    Keeps rollup levels of several widths up to date and picks the level
+    that fits a view.
+
+    attributes:
+    levels -- list of rollup_level from fine to coarse
+    lock -- held while adding or reading
+    """
+
+    def __init__(self, levels=LEVELS):
+        """
+        Keyword arguments:
+        levels -- (optional) list of (seconds per bucket, number of buckets)
+            of each level, from fine to coarse (default: LEVELS)
+        """
+        self.levels = [rollup_level(width, capacity)
+                        for width, capacity in levels]
+        self.lock = Lock()
+
+    def add(self, ping_date, ping_ms):
+        """
+        Adds a ping to all levels
+
+        Keyword arguments:
+        ping_date -- the date of the ping
+        ping_ms -- the ping time, NaN for a timeout
+        """
+        with self.lock:
+            for level in self.levels:
+                level.add(ping_date, ping_ms)
+
+    def extend(self, ping_date, ping_ms):
+        """
+        Adds many pings at once to all levels
+
+        Keyword arguments:
+        ping_date -- sorted array with the dates of the pings
+        ping_ms -- array with the ping times, NaN for timeouts
+        """
+        ping_date = np.asarray(ping_date, dtype=np.float64)
+        ping_ms = np.asarray(ping_ms, dtype=np.float64)
+        with self.lock:
+            for level in self.levels:
+                level.extend(ping_date, ping_ms)
+
+    def retention(self):
+        """
+        Returns the number of seconds kept by the coarsest level
+        """
+        level = self.levels[-1]
+        return level.width * level.capacity
+
+    def level(self, start, end, buckets):
+        """
+        Returns the finest level that has at most the given number of
+        buckets between start and end and still holds start, else the
+        coarsest level
+
+        Keyword arguments:
+        start -- the earliest date of the view
+        end -- the latest date of the view
+        buckets -- the largest number of buckets wanted
+        """
+        for level in self.levels:
+            if (end - start) / level.width <= buckets and \
+                    level.oldest() <= start:
+                return level
+        return self.levels[-1]
+
+    def minmax(self, start, end, columns):
+        """
+        Returns the dates and ping times to plot between start and end,
+        like decimate.minmax: the minimum at the start and the maximum at
+        the end of each bucket, NaN for buckets with only timeouts.
+
+        Keyword arguments:
+        start -- the earliest date of the view
+        end -- the latest date of the view
+        columns -- the number of pixel columns of the plot
+        """
+        with self.lock:
+            level = self.level(start, end, columns)
+            numbers, fields = level.query(start, end)
+        lost = fields['count'] == fields['loss']
+        x_out = np.column_stack((numbers, numbers + 1)) * level.width
+        y_out = np.column_stack((fields['min'], fields['max']))
+        y_out[lost] = np.nan
+        return x_out.ravel(), y_out.ravel()
+
+    def summary(self, start, end, buckets=5000):
+        """
+        Returns the number of pings, the loss rate, the mean and the
+        population standard deviation of the ping times between start and
+        end, rounded to whole buckets of the level that fits
+
+        Keyword arguments:
+        start -- the earliest date
+        end -- the latest date
+        buckets -- (optional) the largest number of buckets read
+            (default: 5000)
+        """
+        with self.lock:
+            numbers, fields = self.level(start, end, buckets).query(start,
+                                                                    end)
+        count = fields['count'].sum()
+        replies = count - fields['loss'].sum()
+        if count == 0:
+            return 0, np.nan, np.nan, np.nan
+        if replies == 0:
+            return int(count), 1.0, np.nan, np.nan
+        mean = fields['sum'].sum() / replies
+        variance = max(fields['sum2'].sum() / replies - mean * mean, 0)
+        return (int(count), 1 - replies / float(count), mean,
+                np.sqrt(variance))
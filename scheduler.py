@@ -0,0 +1,184 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Timing of the probes on a monotonic clock.
+
+Send and receive times are taken with counter_ns, in integer nanoseconds
+of the most precise monotonic clock available (time.perf_counter_ns from
+python 3.7). They are only converted to dates with to_date for display and
+storage, so the measured round trip times don't change when the wall clock
+is adjusted.
+
+Python 2 has no monotonic clock in the time module, there clock_gettime
+with CLOCK_MONOTONIC is called through ctypes, or time.clock is used on
+windows where it reads QueryPerformanceCounter.
+"""
+import ctypes
+import ctypes.util
+import heapq
+import sys
+import time
+
+#shortest supported interval between probes of a target in seconds
+MIN_INTERVAL = 0.01
+
+#CLOCK_MONOTONIC of clock_gettime, it differs between the platforms
+if sys.platform == 'darwin':
+    CLOCK_MONOTONIC = 6
+elif 'bsd' in sys.platform:
+    CLOCK_MONOTONIC = 4
+else:
+    CLOCK_MONOTONIC = 1
+
+
+class _timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+
+def _clock_gettime():
+    """
+    Returns a function returning CLOCK_MONOTONIC in nanoseconds, read with
+    clock_gettime of the C library. Raises OSError if there is none.
+    """
+    #the symbols already loaded, the C library among them, are looked in
+    #first as find_library runs external programs, which is slow.
+    #older glibc has clock_gettime in librt only
+    for name in (None, 'rt'):
+        library = name if name == None else ctypes.util.find_library(name)
+        if name and library == None:
+            continue
+        function = getattr(ctypes.CDLL(library, use_errno=True),
+                            'clock_gettime', None)
+        if not function == None:
+            break
+    else:
+        raise OSError("No monotonic clock: clock_gettime wasn't found")
+    #called without argtypes, which make each call several times slower,
+    #clock_gettime is called for every probe and reply
+    byref = ctypes.byref
+    if function(CLOCK_MONOTONIC, byref(_timespec())):
+        raise OSError("No monotonic clock: clock_gettime failed with errno "
+                        "{0:d}".format(ctypes.get_errno()))
+
+    def counter_ns():
+        """
+        Returns the monotonic clock in nanoseconds
+        """
+        #a timespec per call, ctypes releases the GIL during the call so
+        #a shared one could be written by other threads meanwhile
+        spec = _timespec()
+        function(CLOCK_MONOTONIC, byref(spec))
+        return spec.tv_sec * 1000000000 + spec.tv_nsec
+    return counter_ns
+
+
+if hasattr(time, 'perf_counter_ns'):
+    counter_ns = time.perf_counter_ns
+elif hasattr(time, 'perf_counter'):
+    def counter_ns():
+        """
+        Returns the monotonic clock in nanoseconds
+        """
+        return int(time.perf_counter() * 1e9)
+elif sys.platform == 'win32':
+    def counter_ns():
+        """
+        Returns the monotonic clock in nanoseconds
+        """
+        return int(time.clock() * 1e9)
+else:
+    counter_ns = _clock_gettime()
+
+#the date at a known counter value, used to convert counter values to dates
+_EPOCH = (time.time(), counter_ns())
+
+
+def to_date(ns):
+    """
+    Returns the date of a counter value
+
+    Keyword arguments:
+    ns -- a value returned by counter_ns
+    """
+    return _EPOCH[0] + (ns - _EPOCH[1]) / 1e9
+
+
+class probe_scheduler():
+    """
+    Tells when to send the probes to a number of targets at a fixed
+    interval. The first probes are spread out evenly over the interval, so
+    that the targets are never probed in a burst.
+
+    Every due time is calculated from the start instead of from the
+    previous probe, so late probes don't make the rest drift. A target
+    that is more than an interval late skips the probes it missed instead
+    of sending them all at once.
+
+    attributes:
+    interval_ns -- nanoseconds between probes of a target
+    skipped -- number of probes skipped because they were missed
+    """
+
+    def __init__(self, count, interval, start=None):
+        """
+        Keyword arguments:
+        count -- the number of targets
+        interval -- seconds between the probes of each target
+        start -- (optional) counter_ns value of the first probe, None for
+            now (default: None)
+        """
+        if interval < MIN_INTERVAL:
+            raise ValueError("The interval can't be shorter than "
+                            "{0:g} s".format(MIN_INTERVAL))
+        self.count = count
+        self.interval_ns = int(round(interval * 1e9))
+        self.start = counter_ns() if start == None else start
+        self.skipped = 0
+        #heap of (due time, target index, probe number)
+        self.schedule = [(self._offset(i), i, 0) for i in range(count)]
+        heapq.heapify(self.schedule)
+
+    def _offset(self, index):
+        """
+        Returns the due time of the first probe of the target at index
+        """
+        return self.start + self.interval_ns * index // self.count
+
+    def next_due(self):
+        """
+        Returns the counter_ns value at which the next probe is due
+        """
+        return self.schedule[0][0]
+
+    def delay(self, now=None):
+        """
+        Returns the seconds until the next probe is due, 0 if it is late
+
+        Keyword arguments:
+        now -- (optional) the counter_ns value to use as now (default: None)
+        """
+        now = counter_ns() if now == None else now
+        return max(self.next_due() - now, 0) / 1e9
+
+    def pop_due(self, now=None):
+        """
+        Returns the indices of the targets with a probe due, and schedules
+        their next probes.
+
+        Keyword arguments:
+        now -- (optional) the counter_ns value to use as now (default: None)
+        """
+        now = counter_ns() if now == None else now
+        due = []
+        while self.schedule and self.schedule[0][0] <= now:
+            index, number = heapq.heappop(self.schedule)[1:]
+            due.append(index)
+            offset = self._offset(index)
+            #the first probe number that isn't already in the past
+            following = max(number + 1,
+                            (now - offset) // self.interval_ns + 1)
+            self.skipped += following - number - 1
+            heapq.heappush(self.schedule,
+                            (offset + following * self.interval_ns, index,
+                                following))
+        return due
@@ -0,0 +1,314 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Probing of very large target lists from several worker processes.
+
+A shard_pool splits the targets over a number of worker processes, by
+default one per CPU core. Each worker pings its share with a multi_ping of
+its own and writes the results into a ring in shared memory (see
+shared_ring), along with running totals and a heartbeat that tell how the
+shard is doing. The pool reads all rings from one thread.
+
+Targets can be added and removed while pinging. The shards are then
+rebalanced so that their sizes differ by at most one target, and only the
+shards that changed restart their multi_ping. Workers that can't open ICMP
+sockets fall back to the ping program like ping_cli.probe. A worker that
+dies is started again with the same targets, one that can't ping at all
+sends its error to the pool, which raises it.
+"""
+from collections import namedtuple
+from math import isnan
+import multiprocessing
+from numpy import NaN
+import signal
+import socket
+from threading import Lock
+from time import sleep, time
+
+from ping_cli import probe
+from scheduler import counter_ns
+from shared_ring import ring_buffer, ring_reader, ring_writer
+
+#fields of the health array of a shard
+HEARTBEAT, SAMPLES, LOST, SUM_MS, TARGETS = range(5)
+#nanoseconds between heartbeats and checks for new targets of a worker
+CHECK_NS = 100 * 1000000
+#seconds before a dead worker is started again, also between the checks
+RESTART_DELAY = 1.0
+
+shard_health = namedtuple('shard_health', ['targets', 'alive', 'restarts',
+                        'samples', 'loss_rate', 'mean', 'silence', 'lost'])
+
+
+def _shard_main(buffer, capacity, health, control, timeout, interval):
+    """
+    Runs in a worker process. Pings the targets sent over the control pipe
+    as a dict of {target id: host} and writes the results to the ring,
+    until None is sent. If the targets can't be pinged the error is sent
+    back over the control pipe and the worker ends.
+    """
+    #the pool stops the worker on ctrl-c
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    writer = ring_writer(buffer, capacity)
+    targets = control.recv()
+    while not targets == None:
+        health[TARGETS] = len(targets)
+        health[HEARTBEAT] = time()
+        if not targets:
+            #nothing to ping, just wait for targets
+            if control.poll(CHECK_NS / 1e9):
+                targets = control.recv()
+            continue
+        ids = dict((host, target) for target, host in targets.iteritems())
+        next_check = counter_ns() + CHECK_NS
+        try:
+            prober = probe(targets.values(), timeout, interval)
+        except (socket.error, OSError) as error:
+            #restarting won't help, the pool raises it instead
+            control.send(error)
+            return
+        with prober as pinger:
+            for host, (ping_ms, ping_date) in pinger:
+                writer.append(ids[host], ping_date, ping_ms)
+                health[SAMPLES] += 1
+                if isnan(ping_ms):
+                    health[LOST] += 1
+                else:
+                    health[SUM_MS] += ping_ms
+                if counter_ns() >= next_check:
+                    next_check += CHECK_NS
+                    health[HEARTBEAT] = time()
+                    if control.poll():
+                        targets = control.recv()
+                        break
+
+
+class _shard():
+    """
+    The worker process, ring and targets of one shard
+    """
+    def __init__(self, capacity):
+        self.targets = {}
+        self.buffer = ring_buffer(capacity)
+        self.reader = ring_reader(self.buffer, capacity)
+        self.health = multiprocessing.RawArray('d', 5)
+        self.process = self.control = None
+        self.restarts = 0
+        self.next_start = 0
+
+    def error(self):
+        """
+        Returns the error sent by the worker, None if it sent none
+        """
+        try:
+            if self.control.poll():
+                return self.control.recv()
+        except (EOFError, IOError):
+            #the worker ended without sending anything
+            pass
+        return None
+
+
+class shard_pool():
+    """
+    Pings the targets from several worker processes like ping_cli.probe.
+    Its generator yields (host, (ping_time, date)) as they are read from
+    the rings of the shards.
+
+    attributes:
+    shards -- list of the shards
+    monitor -- function called with the report of the shards every time
+        the workers are checked, also while no results arrive, or None
+    """
+
+    def __init__(self, hosts, timeout, interval=1.0, workers=None,
+                capacity=65536, poll=0.01):
+        """
+        Keyword arguments:
+        hosts -- list of servers to ping
+        timeout -- the time to timeout in milliseconds (ms)
+        interval -- (optional) seconds between pings to each host
+            (default: 1.0)
+        workers -- (optional) the number of worker processes, None for one
+            per CPU core (default: None)
+        capacity -- (optional) the number of records of the ring of each
+            shard (default: 65536)
+        poll -- (optional) seconds between reads of the rings when nothing
+            has arrived (default: 0.01)
+        """
+        workers = workers or multiprocessing.cpu_count()
+        self.timeout = timeout
+        self.interval = interval
+        self.capacity = capacity
+        self.poll = poll
+        self.shards = [_shard(capacity) for i in range(workers)]
+        self.monitor = None
+        self.started = False
+        self.lock = Lock()
+        #host of each target id and the other way around
+        self.names = {}
+        self.ids = {}
+        self._next_id = 0
+        self.add(hosts)
+
+    def _start(self, shard):
+        """
+        Starts the worker process of a shard
+        """
+        if not shard.control == None:
+            shard.control.close()
+        shard.control, child = multiprocessing.Pipe()
+        shard.process = multiprocessing.Process(target=_shard_main,
+                args=(shard.buffer, self.capacity, shard.health, child,
+                    self.timeout, self.interval))
+        shard.process.daemon = True
+        shard.process.start()
+        #the worker has its own copy of the other end
+        child.close()
+        shard.control.send(dict(shard.targets))
+        shard.next_start = time() + RESTART_DELAY
+
+    def _update(self, shards):
+        """
+        Sends the new targets to the workers of the shards
+        """
+        if not self.started:
+            return
+        for shard in shards:
+            shard.control.send(dict(shard.targets))
+
+    def _rebalance(self):
+        """
+        Moves targets from the largest to the smallest shard until their
+        sizes differ by at most one. Returns the set of changed shards.
+        """
+        changed = set()
+        while True:
+            largest = max(self.shards, key=lambda shard: len(shard.targets))
+            smallest = min(self.shards, key=lambda shard: len(shard.targets))
+            if len(largest.targets) - len(smallest.targets) <= 1:
+                return changed
+            target, host = largest.targets.popitem()
+            smallest.targets[target] = host
+            changed.update((largest, smallest))
+
+    def add(self, hosts):
+        """
+        Adds targets to the smallest shards, hosts that are already pinged
+        are skipped
+
+        Keyword arguments:
+        hosts -- list of servers to ping
+        """
+        with self.lock:
+            changed = set()
+            for host in hosts:
+                if host in self.ids:
+                    continue
+                target = self._next_id
+                self._next_id += 1
+                self.ids[host] = target
+                self.names[target] = host
+                shard = min(self.shards, key=lambda shard: len(shard.targets))
+                shard.targets[target] = host
+                changed.add(shard)
+            self._update(changed)
+
+    def remove(self, hosts):
+        """
+        Stops pinging targets and rebalances the shards
+
+        Keyword arguments:
+        hosts -- list of servers to stop pinging
+        """
+        with self.lock:
+            changed = set()
+            for host in hosts:
+                target = self.ids.pop(host, None)
+                if target == None:
+                    continue
+                del self.names[target]
+                for shard in self.shards:
+                    if shard.targets.pop(target, None):
+                        changed.add(shard)
+            changed.update(self._rebalance())
+            self._update(changed)
+
+    def _check(self):
+        """
+        Starts the workers that have died again, calls the monitor and
+        raises the error of a worker that couldn't ping its targets
+        """
+        error = None
+        with self.lock:
+            for shard in self.shards:
+                if shard.process.is_alive() or time() < shard.next_start:
+                    continue
+                failure = shard.error()
+                if failure == None:
+                    shard.restarts += 1
+                    self._start(shard)
+                else:
+                    error = failure
+        if not self.monitor == None:
+            self.monitor(self.report())
+        if not error == None:
+            raise error
+
+    def __enter__(self):
+        with self.lock:
+            for shard in self.shards:
+                self._start(shard)
+            self.started = True
+        next_check = counter_ns() + int(RESTART_DELAY * 1e9)
+        while True:
+            #busy rings mustn't keep the dead workers from being restarted
+            if counter_ns() >= next_check:
+                next_check = counter_ns() + int(RESTART_DELAY * 1e9)
+                self._check()
+            count = 0
+            for shard in self.shards:
+                targets, dates, pings = shard.reader.read()
+                count += len(dates)
+                for target, date, ping_ms in zip(targets.tolist(),
+                                            dates.tolist(), pings.tolist()):
+                    #results of removed targets may still be in the ring
+                    host = self.names.get(target)
+                    if not host == None:
+                        yield host, (ping_ms, date)
+            if count == 0:
+                sleep(self.poll)
+
+    def __exit__(self, type, value, traceback):
+        for shard in self.shards:
+            if shard.process == None:
+                continue
+            if shard.process.is_alive():
+                shard.control.send(None)
+                shard.process.join(1)
+            if shard.process.is_alive():
+                shard.process.terminate()
+
+    def report(self):
+        """
+        Returns a shard_health for each shard: the number of targets, if
+        the worker is alive, the number of restarts, samples, the loss
+        rate and mean ping time of all samples, the seconds since the last
+        heartbeat and the number of results overwritten before they were
+        read
+        """
+        output = []
+        now = time()
+        for shard in self.shards:
+            health = list(shard.health)
+            replies = health[SAMPLES] - health[LOST]
+            output.append(shard_health(int(health[TARGETS]),
+                    not shard.process == None and shard.process.is_alive(),
+                    shard.restarts, int(health[SAMPLES]),
+                    health[LOST] / health[SAMPLES] if health[SAMPLES]
+                    else NaN,
+                    health[SUM_MS] / replies if replies else NaN,
+                    now - health[HEARTBEAT] if health[HEARTBEAT]
+                    else NaN,
+                    shard.reader.lost))
+        return output
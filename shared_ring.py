@@ -0,0 +1,226 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Probing in a separate process, with the results passed on through a ring
+of fixed width records in shared memory.
+
+The prober process takes its own timestamps, so redraws holding the GIL
+of the GUI process can't delay them and distort the measured ping times.
+The ring is a multiprocessing.RawArray, which works on python 2 and on
+windows alike, read and written through numpy views without any
+serialization.
+
+There is a single writer. Each record carries a sequence number, which is
+odd while the record is written and 2 * (n + 1) once record n is complete
+(a seqlock), so a reader that is overtaken by the writer notices it and
+drops the overwritten records instead of returning torn ones.
+
+The prober process tells over a pipe if it could start probing, its error
+is raised in the GUI process, so that it can fall back like it does when
+probe fails there.
+"""
+import ctypes
+import multiprocessing
+import numpy as np
+import socket
+from time import sleep
+
+from ping_cli import probe
+
+RECORD = np.dtype([('seq', '<i8'), ('date', '<f8'), ('ping_ms', '<f8'),
+                    ('host', '<i8')])
+
+
+def ring_views(buffer, capacity):
+    """
+    Returns numpy views of the header, which holds the number of records
+    written, and of the records of a ring
+
+    Keyword arguments:
+    buffer -- the shared memory, see ring_buffer
+    capacity -- the number of records of the ring
+    """
+    data = np.ctypeslib.as_array(buffer)
+    #the header is one record wide to keep the records aligned
+    header = data[:RECORD.itemsize].view('<i8')[:1]
+    records = data[RECORD.itemsize:].view(RECORD)[:capacity]
+    return header, records
+
+
+def ring_buffer(capacity):
+    """
+    Returns shared memory for a ring with capacity records, that can be
+    passed on to a multiprocessing.Process
+
+    Keyword arguments:
+    capacity -- the number of records of the ring
+    """
+    return multiprocessing.RawArray(ctypes.c_uint8,
+                                    (capacity + 1) * RECORD.itemsize)
+
+
+class ring_writer():
+    """
+    Appends records to a ring in shared memory, overwriting the oldest
+    """
+
+    def __init__(self, buffer, capacity):
+        """
+        Keyword arguments:
+        buffer -- the shared memory, see ring_buffer
+        capacity -- the number of records of the ring
+        """
+        self.capacity = capacity
+        self.header, self.records = ring_views(buffer, capacity)
+        self.count = int(self.header[0])
+
+    def append(self, host, ping_date, ping_ms):
+        """
+        Writes a ping result
+
+        Keyword arguments:
+        host -- the index of the pinged host
+        ping_date -- the date of the ping
+        ping_ms -- the ping time, NaN for a timeout
+        """
+        number = self.count
+        slot = number % self.capacity
+        seq = self.records['seq']
+        seq[slot] = 2 * number + 1
+        self.records['date'][slot] = ping_date
+        self.records['ping_ms'][slot] = ping_ms
+        self.records['host'][slot] = host
+        seq[slot] = 2 * number + 2
+        #publish the record to readers only after it has been written
+        self.count = self.header[0] = number + 1
+
+
+class ring_reader():
+    """
+    Reads the records appended to a ring in shared memory since the last
+    read
+
+    attributes:
+    lost -- the number of records overwritten before they were read
+    """
+
+    def __init__(self, buffer, capacity):
+        """
+        Keyword arguments:
+        buffer -- the shared memory, see ring_buffer
+        capacity -- the number of records of the ring
+        """
+        self.capacity = capacity
+        self.header, self.records = ring_views(buffer, capacity)
+        self.next = 0
+        self.lost = 0
+
+    def read(self):
+        """
+        Returns arrays with the host indices, dates and ping times of the
+        records written since the last read
+        """
+        count = int(self.header[0])
+        first = max(self.next, count - self.capacity)
+        numbers = np.arange(first, count, dtype=np.int64)
+        slots = numbers % self.capacity
+        records = self.records[slots]
+        #valid if the record was complete and unchanged during the copy
+        expected = 2 * numbers + 2
+        valid = (records['seq'] == expected) & \
+                (self.records['seq'][slots] == expected)
+        self.lost += first - self.next + len(valid) - int(valid.sum())
+        self.next = count
+        records = records[valid]
+        return (records['host'].astype(np.intp), records['date'],
+                records['ping_ms'])
+
+
+def _probe_main(buffer, capacity, hosts, timeout, interval, stop, status):
+    """
+    Runs in the prober process, writes the results of all hosts to the
+    ring until stop is set. Sends None over the status pipe once the hosts
+    are probed, or the error if they can't be.
+    """
+    writer = ring_writer(buffer, capacity)
+    index = dict((host, i) for i, host in enumerate(hosts))
+    try:
+        prober = probe(hosts, timeout, interval)
+    except (socket.error, OSError) as error:
+        status.send(error)
+        return
+    status.send(None)
+    with prober as pinger:
+        for host, (ping_ms, ping_date) in pinger:
+            writer.append(index[host], ping_date, ping_ms)
+            if stop.is_set():
+                break
+
+
+class process_probe():
+    """
+    Probes the hosts from a separate process like ping_cli.probe. Its
+    generator yields (host, (ping_time, date)) as they are read from the
+    shared ring. The process is started right away, and the error is
+    raised if it can't probe the hosts, like probe raises it.
+
+    attributes:
+    reader -- the ring_reader, its lost count tells how many results were
+        overwritten before they were read
+    """
+
+    def __init__(self, hosts, timeout, interval=1.0, capacity=65536,
+                poll=0.01):
+        """
+        Keyword arguments:
+        hosts -- list of servers to ping
+        timeout -- the time to timeout in milliseconds (ms)
+        interval -- (optional) seconds between pings to each host
+            (default: 1.0)
+        capacity -- (optional) the number of records of the ring
+            (default: 65536)
+        poll -- (optional) seconds between reads of the ring when nothing
+            has arrived (default: 0.01)
+        """
+        self.hosts = list(hosts)
+        self.poll = poll
+        buffer = ring_buffer(capacity)
+        self.reader = ring_reader(buffer, capacity)
+        self.stop = multiprocessing.Event()
+        status, child = multiprocessing.Pipe(False)
+        self.process = multiprocessing.Process(target=_probe_main,
+                args=(buffer, capacity, self.hosts, timeout, interval,
+                    self.stop, child))
+        self.process.daemon = True
+        self.process.start()
+        #the prober process has its own copy of the sending end
+        child.close()
+        try:
+            error = status.recv()
+        except EOFError:
+            error = OSError("The prober process ended before probing")
+        finally:
+            status.close()
+        if not error == None:
+            self.process.join()
+            raise error
+
+    def __enter__(self):
+        while True:
+            alive = self.process.is_alive()
+            hosts, dates, pings = self.reader.read()
+            for host, date, ping_ms in zip(hosts.tolist(), dates.tolist(),
+                                            pings.tolist()):
+                yield self.hosts[host], (ping_ms, date)
+            if not len(dates):
+                if not alive:
+                    #everything written before the process ended is read
+                    break
+                sleep(self.poll)
+
+    def __exit__(self, type, value, traceback):
+        self.stop.set()
+        if self.process.is_alive():
+            self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
@@ -0,0 +1,248 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Quantile sketches of ping times.
+
+A ddsketch (Masson et al., DDSketch, VLDB 2019) puts each value in a bin
+of logarithmic width, so every quantile it returns is within a relative
+accuracy of the exact one. Adding and removing values is O(1) and
+sketches with the same accuracy can be merged by adding their bins, which
+makes percentiles over long ranges cheap to get from sketches of shorter
+time buckets.
+"""
+from collections import deque
+from math import ceil, floor, isnan, log
+from numpy import NaN
+import numpy as np
+from threading import Lock
+
+
+class ddsketch():
+    """
+    Quantile sketch with relative accuracy
+
+    attributes:
+    relative_accuracy -- the largest relative error of a quantile
+    count -- the number of values in the sketch
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        """
+        Keyword arguments:
+        relative_accuracy -- (optional) the largest relative error of a
+            quantile (default: 0.01)
+        """
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = log(self.gamma)
+        #number of values in each bin and of values that are zero
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, value):
+        return int(ceil(log(value) / self._log_gamma))
+
+    def add(self, value):
+        """
+        Adds a value, NaN is ignored
+
+        Keyword arguments:
+        value -- the ping time
+        """
+        if isnan(value):
+            return
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        key = self._key(value)
+        self.bins[key] = self.bins.get(key, 0) + 1
+
+    def remove(self, value):
+        """
+        Removes a value that was added before, NaN is ignored
+
+        Keyword arguments:
+        value -- the ping time
+        """
+        if isnan(value):
+            return
+        self.count -= 1
+        if value <= 0:
+            self.zero_count -= 1
+            return
+        key = self._key(value)
+        if self.bins[key] == 1:
+            del self.bins[key]
+        else:
+            self.bins[key] -= 1
+
+    def merge(self, other):
+        """
+        Adds the values of another sketch with the same accuracy
+
+        Keyword arguments:
+        other -- the ddsketch to add
+        """
+        if not other.gamma == self.gamma:
+            raise ValueError("Only sketches with the same accuracy can be "
+                            "merged")
+        for key, count in other.bins.iteritems():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q):
+        """
+        Returns the value at the quantile, NaN for an empty sketch
+
+        Keyword arguments:
+        q -- the quantile between 0 and 1, e.g. 0.99 for the 99th percentile
+        """
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs):
+        """
+        Returns a list with the values at several quantiles, all found in a
+        single pass over the bins
+
+        Keyword arguments:
+        qs -- sorted list of quantiles between 0 and 1
+        """
+        if self.count == 0:
+            return [NaN] * len(qs)
+        output = []
+        ranks = iter([q * (self.count - 1) for q in qs])
+        rank = next(ranks)
+        total = self.zero_count
+        while total > rank:
+            output.append(0.0)
+            rank = next(ranks, None)
+            if rank == None:
+                return output
+        for key in sorted(self.bins):
+            total += self.bins[key]
+            while total > rank:
+                #the middle of the bin in relative terms
+                output.append(2 * self.gamma ** key / (self.gamma + 1))
+                rank = next(ranks, None)
+                if rank == None:
+                    return output
+        return output
+
+
+class sketch_buckets():
+    """
+    Sketches of the ping times in consecutive time buckets of a fixed
+    width, aligned to absolute time. The quantiles of a bucket are
+    calculated once when it is complete, so only the newest bucket needs
+    to be looked at again when the quantiles over time are drawn.
+
+    attributes:
+    width -- seconds per bucket
+    qs -- the quantiles kept for complete buckets
+    lock -- held while adding or reading
+    """
+
+    def __init__(self, width, capacity, qs=(0.5, 0.99),
+                relative_accuracy=0.01):
+        """
+        Keyword arguments:
+        width -- seconds per bucket
+        capacity -- the number of buckets kept
+        qs -- (optional) the quantiles kept for complete buckets
+            (default: (0.5, 0.99))
+        relative_accuracy -- (optional) accuracy of the sketches
+            (default: 0.01)
+        """
+        self.width = float(width)
+        self.qs = list(qs)
+        self.relative_accuracy = relative_accuracy
+        self.lock = Lock()
+        #bucket numbers, sketches and quantiles of the complete buckets
+        self.numbers = deque(maxlen=int(capacity))
+        self.sketches = deque(maxlen=int(capacity))
+        self.values = deque(maxlen=int(capacity))
+
+    def resize(self, capacity):
+        """
+        Changes the number of buckets kept, dropping the oldest
+
+        Keyword arguments:
+        capacity -- the new number of buckets
+        """
+        with self.lock:
+            for name in ('numbers', 'sketches', 'values'):
+                setattr(self, name, deque(getattr(self, name),
+                                        maxlen=int(capacity)))
+
+    def add(self, ping_date, ping_ms):
+        """
+        Adds a ping to the bucket of its date. Pings older than the oldest
+        kept bucket are dropped.
+
+        Keyword arguments:
+        ping_date -- the date of the ping
+        ping_ms -- the ping time, NaN for a timeout
+        """
+        number = int(floor(ping_date / self.width))
+        with self.lock:
+            if not self.numbers or number > self.numbers[-1]:
+                if self.numbers:
+                    #the newest bucket is complete
+                    self.values[-1] = self.sketches[-1].quantiles(self.qs)
+                self.numbers.append(number)
+                self.sketches.append(ddsketch(self.relative_accuracy))
+                self.values.append(None)
+                self.sketches[-1].add(ping_ms)
+                return
+            #late ping for an older bucket
+            for i in xrange(len(self.numbers) - 1, -1, -1):
+                if self.numbers[i] == number:
+                    self.sketches[i].add(ping_ms)
+                    if not self.values[i] == None:
+                        self.values[i] = self.sketches[i].quantiles(self.qs)
+                    return
+                if self.numbers[i] < number:
+                    return
+
+    def band(self, start=-np.inf):
+        """
+        Returns the middle date of each bucket from start on and an array
+        with a column of values for each of the quantiles. Buckets without
+        replies are left out.
+
+        Keyword arguments:
+        start -- (optional) the earliest date (default: -inf)
+        """
+        with self.lock:
+            first = int(floor(start / self.width)) if start > -np.inf \
+                    else None
+            numbers = [n for n in self.numbers
+                        if first == None or n >= first]
+            count = len(numbers)
+            values = list(self.values)[len(self.values) - count:]
+            if values:
+                values[-1] = self.sketches[-1].quantiles(self.qs)
+        dates = (np.array(numbers, dtype=np.float64) + 0.5) * self.width
+        values = np.array(values, dtype=np.float64).reshape(-1, len(self.qs))
+        valid = ~np.isnan(values).any(axis=1)
+        return dates[valid], values[valid]
+
+    def merged(self, start=-np.inf, end=np.inf):
+        """
+        Returns a ddsketch with all pings between start and end, rounded
+        to whole buckets
+
+        Keyword arguments:
+        start -- (optional) the earliest date (default: -inf)
+        end -- (optional) the date to stop at (default: inf)
+        """
+        output = ddsketch(self.relative_accuracy)
+        with self.lock:
+            for number, sketch in zip(self.numbers, self.sketches):
+                if start < (number + 1) * self.width and \
+                        number * self.width < end:
+                    output.merge(sketch)
+        return output
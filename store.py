@@ -0,0 +1,253 @@
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+"""
+Append-only storage of ping results on disk.
+
+Each target gets a directory of segment files. A segment is a memory mapped
+file with a small header followed by fixed width records. The header holds
+the number of records written, which the writer updates after each record,
+so readers can map the same file while it is being appended to.
+"""
+import numpy as np
+from os import listdir, makedirs, path
+import re
+
+#record layout, timeouts are stored with a NaN ping time and TIMEOUT set
+RECORD = np.dtype([('date', '<f8'), ('ping_ms', '<f4'), ('flags', '<u4')])
+TIMEOUT = 1
+#the header is one record wide: number of records, reserved
+HEADER = np.dtype([('count', '<u8'), ('reserved', '<u8')])
+#records per segment file, 16 bytes each
+SEGMENT_RECORDS = 2 ** 16
+SEGMENT_NAME = '{0:08d}.seg'
+
+
+def series_path(root, host):
+    """
+    Returns the directory used to store the results of a host
+
+    Keyword arguments:
+    root -- directory holding the stored results of all hosts
+    host -- the pinged server
+    """
+    return path.join(root, re.sub(r'[^\w.-]', '_', host))
+
+
+def _segment_numbers(directory):
+    """
+    Returns the sorted numbers of the segment files in a directory
+    """
+    if not path.isdir(directory):
+        return []
+    return sorted(int(name[:-4]) for name in listdir(directory)
+                    if re.match(r'^\d{8}\.seg$', name))
+
+
+class _segment():
+    """
+    A memory mapped segment file
+
+    attributes:
+    header -- the header record, header['count'] is the number of records
+    records -- all record slots of the file, only the first count are valid
+    """
+    def __init__(self, file_path, mode, records=SEGMENT_RECORDS):
+        """
+        Keyword arguments:
+        file_path -- path of the segment file
+        mode -- 'r' to read, 'w+' to create a new segment
+        records -- (optional) number of records of a new segment
+        """
+        if mode == 'w+':
+            size = HEADER.itemsize + records * RECORD.itemsize
+            with open(file_path, 'wb') as segment_file:
+                segment_file.truncate(size)
+            mode = 'r+'
+        self.header = np.memmap(file_path, dtype=HEADER, mode=mode, shape=(1,))
+        self.records = np.memmap(file_path, dtype=RECORD, mode=mode,
+                                offset=HEADER.itemsize)
+
+    def __len__(self):
+        return int(self.header['count'][0])
+
+    def valid(self):
+        """
+        Returns a view of the records written so far
+        """
+        return self.records[:len(self)]
+
+    def close(self):
+        """
+        Flushes and unmaps the segment
+        """
+        for array in (self.header, self.records):
+            if array.mode == 'r+':
+                array.flush()
+        del self.header, self.records
+
+
+class series_writer():
+    """
+    Appends ping results of one host to its segment files. Only one writer
+    should be open for a host at a time. The dates must not go backwards,
+    readers find the records by binary search.
+    """
+    def __init__(self, directory, segment_records=SEGMENT_RECORDS):
+        """
+        Keyword arguments:
+        directory -- directory of the host, see series_path
+        segment_records -- (optional) number of records per segment file
+        """
+        if not path.isdir(directory):
+            makedirs(directory)
+        self.directory = directory
+        self.segment_records = segment_records
+        numbers = _segment_numbers(directory)
+        self.number = numbers[-1] if numbers else 0
+        self.segment = self._open(self.number, not numbers)
+        #date of the last stored record
+        records = self.segment.valid()
+        self.last_date = records['date'][-1] if len(records) else -np.inf
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _open(self, number, create):
+        file_path = path.join(self.directory, SEGMENT_NAME.format(number))
+        if create:
+            return _segment(file_path, 'w+', self.segment_records)
+        return _segment(file_path, 'r+')
+
+    def append(self, ping_date, ping_ms, flags=0):
+        """
+        Stores a ping result
+
+        Keyword arguments:
+        ping_date -- the date of the ping
+        ping_ms -- the ping time, NaN for a timeout
+        flags -- (optional) extra flags of the record (default: 0)
+        """
+        if ping_date < self.last_date:
+            raise ValueError("Can't store a ping dated before the last "
+                            "stored one")
+        count = len(self.segment)
+        if count == len(self.segment.records):
+            #segment is full, continue in a new one
+            self.segment.close()
+            self.number += 1
+            self.segment = self._open(self.number, True)
+            count = 0
+        if np.isnan(ping_ms):
+            flags |= TIMEOUT
+        self.segment.records[count] = (ping_date, ping_ms, flags)
+        #publish the record to readers only after it has been written
+        self.segment.header['count'] = count + 1
+        self.last_date = ping_date
+
+    def flush(self):
+        """
+        Writes the pending changes to disk
+        """
+        self.segment.header.flush()
+        self.segment.records.flush()
+
+    def close(self):
+        self.segment.close()
+
+
+class series_reader():
+    """
+    Reads the ping results of one host, while they may still be appended
+    to by a writer. The first date of each segment is kept as an index, so
+    a query only touches the segments it overlaps and finds its records
+    within them by binary search.
+    """
+    def __init__(self, directory):
+        """
+        Keyword arguments:
+        directory -- directory of the host, see series_path
+        """
+        self.directory = directory
+        self.segments = []
+        #first date of each segment
+        self.first_dates = []
+        self.refresh()
+
+    def refresh(self):
+        """
+        Looks for segments created since the last refresh
+        """
+        numbers = _segment_numbers(self.directory)
+        for number in numbers[len(self.segments):]:
+            file_path = path.join(self.directory, SEGMENT_NAME.format(number))
+            segment = _segment(file_path, 'r')
+            self.segments.append(segment)
+            self.first_dates.append(segment.records['date'][0]
+                                    if len(segment) else np.inf)
+        #segments may have been empty when they were opened, and filled
+        #since, also when newer segments have been created after them
+        for index, first_date in enumerate(self.first_dates):
+            if np.isinf(first_date) and len(self.segments[index]):
+                self.first_dates[index] = \
+                        self.segments[index].records['date'][0]
+
+    def __len__(self):
+        return sum(len(segment) for segment in self.segments)
+
+    def query(self, start=-np.inf, end=np.inf):
+        """
+        Returns copies of the records with start <= date < end as arrays of
+        dates, ping times and flags.
+
+        Keyword arguments:
+        start -- (optional) the earliest date (default: -inf)
+        end -- (optional) the date to stop at (default: inf)
+        """
+        parts = list(self._records(start, end))
+        if parts:
+            records = np.concatenate(parts)
+        else:
+            records = np.empty(0, dtype=RECORD)
+        return (records['date'].copy(),
+                records['ping_ms'].astype(np.float64),
+                records['flags'].copy())
+
+    def _records(self, start, end):
+        """
+        Yields views of the records with start <= date < end, one segment
+        at a time
+        """
+        self.refresh()
+        first = max(np.searchsorted(self.first_dates, start, 'right') - 1, 0)
+        last = np.searchsorted(self.first_dates, end, 'left')
+        for segment in self.segments[first:last]:
+            records = segment.valid()
+            dates = records['date']
+            part = records[np.searchsorted(dates, start, 'left'):
+                            np.searchsorted(dates, end, 'left')]
+            if len(part):
+                yield part
+
+    def chunks(self, start=-np.inf, end=np.inf):
+        """
+        Yields the records with start <= date < end like query, but as
+        one chunk of at most a segment at a time, so that long spans can
+        be read without holding them in memory at once.
+
+        Keyword arguments:
+        start -- (optional) the earliest date (default: -inf)
+        end -- (optional) the date to stop at (default: inf)
+        """
+        for records in self._records(start, end):
+            yield (records['date'].copy(),
+                    records['ping_ms'].astype(np.float64),
+                    records['flags'].copy())
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+        self.first_dates = []
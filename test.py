@@ -1,187 +1,1234 @@
-#!/usr/bin/python2
-# -*- coding: UTF-8 -*-
-import numpy as np
-from numpy import nan
-import unittest
-import pipe
-import ping_gui
-from time import time, sleep
-
-class TestPing(unittest.TestCase):
-    def test_output(self):
-        host = 'ping.sunet.se'
-        timeout = 200
-        with pipe.ping(host, timeout) as pinger:
-            ms, date = pinger.next()
-
-        #check that the date is about correct
-        self.assertAlmostEqual(date, time(), 0,
-                                msg="invalid date:{}".format(date))
-        #check that the time is expressed in either int or nan
-        self.assertTrue(isinstance(ms, int) or np.isnan(ms))
-
-
-
-class TestMain(unittest.TestCase):
-    def test_axis_limit(self):
-        """
-        Tests the axis limit function
-        """
-        arg1 = [-100, 0]
-        arg2 = 70
-        arg3 = [nan, 30, 10, 90]
-        arg4 = [nan, 30, 10, 50]
-        result1 = [-100, 0, 0, 95]
-        result2 = [-100, 0, 0, 75]
-        output1 = ping_gui.axis_limit(arg1, arg2, arg3)
-        output2 = ping_gui.axis_limit(arg1, arg2, arg4)
-
-        self.assertListEqual(output1, result1)
-        self.assertListEqual(output2, result2)
-
-
-    def test_fill_axis(self):
-        """
-        Tests the fill axis function
-        extending, appending and truncating lists
-        """
-        f = ping_gui.fill_axis
-        data = range(99)
-        result = range(100)
-        output = f(data, 99)
-
-        self.assertListEqual(output, result, msg='problem with appending')
-        #check that default length is set to 100
-        self.assertEqual(len(f(range(100), 5)), 100, msg='def length != 100')
-        #check that first element is removed when maximum length is reached
-        data = range(50)
-        result = range(1, 51)
-        self.assertListEqual(f(data, 50, 50), result, msg='list poping problem')
-        #check that it can truncate list
-        data = range(50)
-        output = f(data, 50, 25)
-        result = range(25,51)
-        self.assertListEqual(output, result)
-
-
-    def test_list_nan(self):
-        """
-        Tests the list_nan function
-        finding all the nan values in a list
-        """
-        data = [3, nan, 1, 2, nan, 78, nan]
-        result = [1, 4, 6]
-        output = ping_gui.list_nan(data)
-        #check that the output returns the indices of all the nan elements
-        self.assertIsInstance(output, list, msg='Must return a list')
-        self.assertEqual(output, result, 'faulty indices')
-
-
-    def test_time_diff(self):
-        """
-        Tests the time diff function.
-        Subtracts a value from a list of values
-        """
-        data = [1.0, 2.0, 3.0]
-        result = [0.0, 1.0, 2.0]
-        diff = ping_gui.get_time_diff(data, 1.0)
-        #check that the value 1.0 has been subtracted from each element
-        self.assertListEqual(diff, result)
-
-
-    def test_nan_insert(self):
-        """
-        Test nan_insert function
-        Should insert a nan value every 2 elements in a list
-        """
-        data = range(10)
-        result = [0, 1, nan, 2, 3, nan, 4,5, nan, 6,7, nan, 8,9]
-        output = ping_gui.nan_insert(data)
-
-        self.assertListEqual(output, result)
-
-
-    def test_nan_line_creator(self):
-        """
-        test nan_line_creator
-        """
-        x_data = range(5)
-        y_data = [1, nan, 3, 1, 2]
-        x_res = [0, 2]
-        y_res = [1, 3]
-
-        #short name for the function under test
-        f = ping_gui.nan_line_creator
-        #first simple test
-        x_out, y_out = f(x_data, y_data)
-
-        self.assertListEqual(x_out, x_res)
-        self.assertListEqual(y_out, y_res)
-
-        #a nan element in the as the first and last element
-        x_data = range(5)
-        y_data = [nan, 4, 3, 1, nan]
-        x_res = [0, 1, nan, 3, 4]
-        y_res = [4, 4, nan, 1, 1]
-
-        x_out, y_out = f(x_data, y_data)
-        self.assertListEqual(x_out, x_res)
-        self.assertListEqual(y_out, y_res)
-
-        #test handling of multiple consecutive nan elements
-        x_data = range(8)
-        y_data = [3, nan, nan, nan, 2, nan, nan, 5]
-        x_res = [0, 4, nan, 4, 7]
-        y_res = [3, 2, nan, 2, 5]
-
-        x_out, y_out = f(x_data, y_data)
-        self.assertListEqual(x_out, x_res)
-        self.assertListEqual(y_out, y_res)
-
-
-        #test handling of multiple consecutive nan elements at start
-        x_data = range(10)
-        y_data = [nan, nan, nan, nan, 2, nan, nan, 5, nan, nan]
-        x_res = [0, 4, nan, 4, 7, nan, 7, 9]
-        y_res = [2, 2, nan, 2, 5, nan, 5, 5]
-
-        x_out, y_out = f(x_data, y_data)
-        self.assertListEqual(x_out, x_res)
-        self.assertListEqual(y_out, y_res)
-
-        #test that a single nan element causes no error
-        x_data = [0]
-        y_data = [nan]
-        x_out, y_out = f(x_data, y_data)
-
-    def test_nan_trim(self):
-        """
-        Tests nan_trim
-        Removes adjacent nan values
-        """
-        data = [1, 2, 3, 5, 6, 9]
-        result = [3, 6, 9]
-
-        output = ping_gui.nan_trim(data)
-        self.assertListEqual(output, result)
-
-
-
-
-if __name__ == '__main__' or True:
-    
-    tests_to_run = [TestPing, TestMain]
-    suites_list = []
-    for test_class in tests_to_run:
-        suite = unittest.TestLoader().loadTestsFromTestCase(test_class)
-        suites_list.append(suite)
-    big_suite = unittest.TestSuite(suites_list)
-    unittest.TextTestRunner(verbosity=2).run(big_suite)
-    
-    #sleep(3)
-
-
-
-
-
-
+#!/usr/bin/python2
+# -*- coding: UTF-8 -*-
+import errno
+import numpy as np
+from numpy import nan
+import os
+from os import path
+import shutil
+import socket
+from StringIO import StringIO
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+import pipe
+import multiping
+import ping_parser
+import heatmap
+import history
+import ping_stats
+import sketch
+import bus
+import compress
+import decimate
+import replay
+import rollup
+import store
+import ping_cli
+import scheduler
+import shared_ring
+import shards
+import ping_gui
+import wxplot
+from time import time, sleep
+
+class TestPing(unittest.TestCase):
+    def test_stat_host(self):
+        """
+        A host name containing "stat" doesn't end the output
+        """
+        directory = tempfile.mkdtemp()
+        fake = path.join(directory, 'ping')
+        with open(fake, 'w') as fake_file:
+            fake_file.write('#!/bin/sh\necho "PING stats.example.com '
+                        '(10.0.0.1) 56(84) bytes of data."\nsleep 0.1\n'
+                        'echo "64 bytes from 10.0.0.1: icmp_seq=1 ttl=64 '
+                        'time=1.5 ms"\n')
+        os.chmod(fake, 0o755)
+        old_path = os.environ['PATH']
+        os.environ['PATH'] = directory + os.pathsep + old_path
+        try:
+            with pipe.ping('stats.example.com', 200) as pinger:
+                self.assertEqual(pinger.next()[0], 1.5)
+        finally:
+            os.environ['PATH'] = old_path
+            shutil.rmtree(directory)
+
+    def test_output(self):
+        host = 'ping.sunet.se'
+        timeout = 200
+        with pipe.ping(host, timeout) as pinger:
+            ms, date = pinger.next()
+
+        #check that the date is about correct
+        self.assertAlmostEqual(date, time(), 0,
+                                msg="invalid date:{}".format(date))
+        #check that the time is expressed in either float or nan
+        self.assertTrue(isinstance(ms, float) or np.isnan(ms))
+
+
+#prints a reply in two writes and a timeout like iputils ping -O
+FAKE_PING = (r"import sys, time; w = sys.stdout.write; "
+            r"w('64 bytes from {0}: icmp_seq=1 ttl=64 ti'); "
+            r"sys.stdout.flush(); time.sleep(0.05); w('me=1.5 ms\n'); "
+            r"w('no answer yet for icmp_seq=2\n')")
+
+class TestPingReader(unittest.TestCase):
+    def test_output(self):
+        """
+        The output of all ping programs is read from a single thread
+        """
+        hosts = ['a', 'b', 'c']
+        command = lambda server, timeout, interval: [sys.executable, '-c',
+                                                    FAKE_PING.format(server)]
+        results = {}
+        with pipe.ping_reader(hosts, 200, command=command) as pinger:
+            for host, (ms, date) in pinger:
+                results.setdefault(host, []).append(ms)
+        self.assertItemsEqual(results.keys(), hosts)
+        for ms in results.values():
+            self.assertEqual(ms[0], 1.5)
+            self.assertTrue(np.isnan(ms[1]))
+
+    def test_many_fds(self):
+        """
+        Pipes with file descriptors above FD_SETSIZE are read as well
+        """
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if not hard == resource.RLIM_INFINITY and hard < 2048:
+            return
+        resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, 2048), hard))
+        #push the pipes of the ping programs above 1024
+        fillers = [os.open(os.devnull, os.O_RDONLY) for i in range(1100)]
+        command = lambda server, timeout, interval: [sys.executable, '-c',
+                                                    FAKE_PING.format(server)]
+        try:
+            reader = pipe.ping_reader(['a'], 200, command=command)
+            self.assertTrue(min(reader.procs) >= 1024)
+            with reader as pinger:
+                results = [ms for host, (ms, date) in pinger]
+        finally:
+            for fd in fillers:
+                os.close(fd)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+        self.assertEqual(results[0], 1.5)
+
+    def test_command(self):
+        self.assertListEqual(pipe.ping_command('host', 200, 1, 'win32'),
+                            ['ping', 'host', '-t', '-w', '200'])
+        self.assertListEqual(pipe.ping_command('host', 1500, 0.2, 'linux2'),
+                            ['ping', '-n', '-O', '-i', '0.2', '-W', '2',
+                            'host'])
+        self.assertListEqual(pipe.ping_command('host', 200, 1, 'darwin'),
+                            ['ping', '-n', '-i', '1', '-W', '200', 'host'])
+
+
+class TestPingNative(unittest.TestCase):
+    def test_output(self):
+        host = '127.0.0.1'
+        timeout = 200
+        with pipe.ping_native(host, timeout, interval=0.1) as pinger:
+            ms, date = pinger.next()
+            ms2, date2 = pinger.next()
+
+        #check that the date is about correct
+        self.assertAlmostEqual(date, time(), 0,
+                                msg="invalid date:{}".format(date))
+        #loopback should always answer, with sub-millisecond precision
+        self.assertIsInstance(ms, float)
+        self.assertFalse(np.isnan(ms))
+        #check that the interval is kept between the requests
+        self.assertGreaterEqual(date2 - date, 0.05)
+
+    def test_echo_request(self):
+        packet = pipe.echo_request(0x1234, 7)
+        #a packet including its checksum sums to zero
+        self.assertEqual(pipe.checksum(packet), 0)
+        self.assertEqual(pipe.parse_echo_reply(packet), None)
+
+        reply = b'\x00' + packet[1:]
+        self.assertEqual(pipe.parse_echo_reply(reply),
+                        (pipe.ICMP_ECHO_REPLY, 0x1234, 7))
+
+class TestMultiPing(unittest.TestCase):
+    def test_output(self):
+        hosts = ['127.0.0.1', '127.0.0.2', '127.0.0.3']
+        timeout = 200
+        results = {}
+        with multiping.multi_ping(hosts, timeout, interval=0.1) as pinger:
+            for host, (ms, date) in pinger:
+                results.setdefault(host, []).append(ms)
+                if min(len(r) for r in results.values()) >= 2 and \
+                        len(results) == len(hosts):
+                    break
+
+        #every host should be answered with a float time
+        self.assertItemsEqual(results.keys(), hosts)
+        for ms in sum(results.values(), []):
+            self.assertIsInstance(ms, float)
+            self.assertFalse(np.isnan(ms))
+
+    def test_in_flight(self):
+        """
+        Unanswered requests are found by seq alone, as for errors, and a
+        seq that is used again replaces the old request
+        """
+        pinger = multiping.multi_ping(['127.0.0.1', '127.0.0.2'], 200)
+        try:
+            keys = [pinger.send(0), pinger.send(1)]
+            self.assertDictEqual(pinger.keys,
+                                dict((key[1], key) for key in keys))
+            self.assertEqual(pinger.pop(pinger.keys[keys[1][1]])[0], 1)
+            self.assertEqual(pinger.pop(keys[1]), None)
+            pinger.seq = keys[0][1] - 1
+            key = pinger.send(1)
+            self.assertListEqual(pinger.in_flight.keys(), [key])
+            self.assertDictEqual(pinger.keys, {keys[0][1]: key})
+        finally:
+            pinger.__exit__(None, None, None)
+
+class fake_prober():
+    """
+    Yields count samples of host 'a' like ping_cli.probe
+    """
+    def __init__(self, count):
+        self.count = count
+
+    def __enter__(self):
+        for i in range(self.count):
+            yield 'a', (i, i)
+
+    def __exit__(self, type, value, traceback):
+        pass
+
+
+class TestSharedRing(unittest.TestCase):
+    def test_overrun(self):
+        """
+        Records overwritten before they are read are counted as lost
+        """
+        buffer = shared_ring.ring_buffer(4)
+        writer = shared_ring.ring_writer(buffer, 4)
+        reader = shared_ring.ring_reader(buffer, 4)
+        for i in range(3):
+            writer.append(i % 2, 100 + i, 10.5 + i)
+        hosts, dates, pings = reader.read()
+        self.assertListEqual(list(hosts), [0, 1, 0])
+        self.assertListEqual(list(pings), [10.5, 11.5, 12.5])
+        for i in range(6):
+            writer.append(1, 200 + i, nan)
+        #a record in the middle of being written
+        writer.records['seq'][1] += 1
+        hosts, dates, pings = reader.read()
+        self.assertListEqual(list(dates), [203, 204, 205])
+        self.assertEqual(reader.lost, 3)
+        self.assertEqual(len(reader.read()[0]), 0)
+
+    def test_process(self):
+        hosts = ['127.0.0.1', '127.0.0.2']
+        results = {}
+        with shared_ring.process_probe(hosts, 200, 0.1) as pinger:
+            for host, (ms, date) in pinger:
+                results.setdefault(host, []).append(ms)
+                if len(results) == len(hosts):
+                    break
+        self.assertItemsEqual(results.keys(), hosts)
+        self.assertAlmostEqual(date, time(), 0)
+
+    def test_process_error(self):
+        """
+        The error of a prober process that can't probe is raised in the
+        parent, like that of probe
+        """
+        def failing_probe(hosts, timeout, interval):
+            raise socket.error(errno.EPERM, 'Operation not permitted')
+        probe = shared_ring.probe
+        #the prober process is forked with the failing probe
+        shared_ring.probe = failing_probe
+        try:
+            self.assertRaises(socket.error, shared_ring.process_probe,
+                            ['127.0.0.1'], 200, 0.1)
+        finally:
+            shared_ring.probe = probe
+
+
+class TestShards(unittest.TestCase):
+    def test_rebalance(self):
+        """
+        Targets go to the smallest shards and removing them rebalances
+        """
+        pool = shards.shard_pool(['127.0.0.{0:d}'.format(i)
+                                for i in range(1, 11)], 200, 0.1, 3)
+        self.assertListEqual(sorted(len(shard.targets)
+                                    for shard in pool.shards), [3, 3, 4])
+        pool.remove(['127.0.0.{0:d}'.format(i) for i in range(1, 7)])
+        self.assertListEqual(sorted(len(shard.targets)
+                                    for shard in pool.shards), [1, 1, 2])
+        pool.add(['127.0.0.7', '127.0.1.1'])
+        self.assertListEqual(sorted(len(shard.targets)
+                                    for shard in pool.shards), [1, 2, 2])
+
+    def test_run(self):
+        hosts = ['127.0.0.{0:d}'.format(i) for i in range(1, 5)]
+        results = {}
+        pool = shards.shard_pool(hosts, 200, 0.1, 2)
+        with pool as pinger:
+            for host, (ms, date) in pinger:
+                results.setdefault(host, []).append(ms)
+                if len(results) == len(hosts):
+                    break
+        self.assertItemsEqual(results.keys(), hosts)
+        self.assertAlmostEqual(date, time(), 0)
+        report = pool.report()
+        self.assertListEqual([health.targets for health in report], [2, 2])
+        self.assertEqual(sum(health.samples for health in report) > 0, True)
+
+    def test_restart(self):
+        """
+        A dead worker is started again while the other shards are busy
+        """
+        hosts = ['127.0.0.{0:d}'.format(i) for i in range(1, 5)]
+        pool = shards.shard_pool(hosts, 200, 0.01, 2)
+        end = time() + 5
+        with pool as pinger:
+            for host, (ms, date) in pinger:
+                if pool.shards[0].restarts or time() > end:
+                    break
+                if pool.shards[0].process.is_alive():
+                    pool.shards[0].process.terminate()
+        self.assertEqual(pool.shards[0].restarts, 1)
+
+    def test_error(self):
+        """
+        A worker that can't ping is not restarted, its error is raised by
+        the pool after the health has been reported
+        """
+        def failing_probe(hosts, timeout, interval):
+            raise socket.error(errno.EPERM, 'Operation not permitted')
+        reports = []
+        probe = shards.probe
+        #the workers are forked with the failing probe
+        shards.probe = failing_probe
+        try:
+            pool = shards.shard_pool(['127.0.0.1', '127.0.0.2'], 200, 0.1, 2)
+            pool.monitor = reports.append
+            with pool as pinger:
+                self.assertRaises(socket.error, list, pinger)
+        finally:
+            shards.probe = probe
+        self.assertListEqual([shard.restarts for shard in pool.shards],
+                            [0, 0])
+        self.assertListEqual([health.alive for health in reports[-1]],
+                            [False, False])
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.recording = path.join(self.directory, 'recording.tsv')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_synthetic(self):
+        """
+        The made up pings are repeatable and have the asked loss
+        """
+        def run(seed):
+            with replay.synthetic(['a', 'b'], 200, 0.5, loss=0.05,
+                        rounds=20000, speed=None, start=100,
+                        seed=seed) as pinger:
+                return list(pinger)
+        results = run(0)
+        self.assertListEqual([(host, date) for host, (ms, date)
+                            in results[:3]],
+                            [('a', 100.0), ('b', 100.25), ('a', 100.5)])
+        ping_ms = np.array([ms for host, (ms, date) in results])
+        self.assertAlmostEqual(np.isnan(ping_ms).mean(), 0.05, 2)
+        self.assertEqual(np.nanmax(ping_ms) <= 200, True)
+        np.testing.assert_array_equal(ping_ms,
+                                    [ms for host, (ms, date) in run(0)])
+        self.assertEqual(np.array_equal(ping_ms[:100],
+                        [ms for host, (ms, date) in run(1)[:100]]), False)
+
+    def test_record(self):
+        """
+        Replays the recorded pings, timeouts included
+        """
+        source = replay.synthetic(['a', 'b'], 200, loss=0.3, rounds=20,
+                                speed=None, start=100)
+        with replay.recorder(source, self.recording) as pinger:
+            samples = list(pinger)
+        with replay.replay(self.recording, None) as pinger:
+            results = list(pinger)
+        self.assertListEqual([(host, date) for host, (ms, date) in results],
+                            [(host, date) for host, (ms, date) in samples])
+        ping_ms = [ms for host, (ms, date) in results]
+        self.assertEqual(np.isnan(ping_ms).any(), True)
+        np.testing.assert_array_equal(ping_ms,
+                                    [ms for host, (ms, date) in samples])
+        with replay.replay(self.recording, None, ['b']) as pinger:
+            self.assertEqual(len(list(pinger)), 20)
+        #at 100 times the speed the pings are 5 ms apart from now on
+        start = time()
+        with replay.replay(self.recording, 100) as pinger:
+            dates = [date for host, (ms, date) in pinger]
+        self.assertAlmostEqual(time() - start, 0.195, 1)
+        self.assertAlmostEqual(dates[0], start, 1)
+        self.assertAlmostEqual(dates[2] - dates[0], 0.01, 6)
+
+    def test_cli(self):
+        """
+        Replays a recording from the command line
+        """
+        with replay.recorder(replay.synthetic(['a'], 200, rounds=30,
+                            speed=None), self.recording) as pinger:
+            list(pinger)
+        options = ping_cli.parse_args(['a', '--replay', self.recording,
+                                    '--speed', '0', '-r', '10', '-d', '',
+                                    '-q'])
+        out = StringIO()
+        ping_cli.run(options, out)
+        self.assertEqual(out.getvalue().count('a: last'), 2)
+        #made up pings aren't stored with the real ones unless asked for
+        self.assertEqual(ping_cli.data_dir(ping_cli.parse_args(['a',
+                        '--synthetic'])), '')
+        self.assertEqual(ping_cli.data_dir(ping_cli.parse_args(['a'])),
+                        'data')
+        self.assertEqual(ping_cli.data_dir(ping_cli.parse_args(['a',
+                        '--replay', self.recording, '-d', 'replayed'])),
+                        'replayed')
+
+
+class TestBus(unittest.TestCase):
+    def test_policies(self):
+        sample_bus = bus.sample_bus()
+        oldest = sample_bus.subscribe('oldest', 2, bus.DROP_OLDEST)
+        latest = sample_bus.subscribe('latest', 2, bus.COALESCE)
+        for i in range(4):
+            sample_bus.publish(('a', (i, i)))
+        sample_bus.publish(('b', (4, 4)))
+        sample_bus.publish(('c', (5, 5)))
+        self.assertListEqual(sample_bus.report(),
+                            [('oldest', 2, 4), ('latest', 2, 4)])
+        sample_bus.close()
+        self.assertListEqual([host for host, result in oldest], ['b', 'c'])
+        self.assertListEqual([result for host, result in latest],
+                            [(4, 4), (5, 5)])
+        self.assertRaises(ValueError, bus.subscription, 'x', 1, 'x')
+
+    def test_block(self):
+        """
+        A blocking subscription gets every sample of the probe, the others
+        are not held up beyond their queue
+        """
+        sample_bus = bus.sample_bus()
+        everything = sample_bus.subscribe('everything', 2, bus.BLOCK)
+        stalled = sample_bus.subscribe('stalled', 2, bus.DROP_OLDEST)
+        thread = threading.Thread(target=sample_bus.run,
+                                args=(fake_prober(100),))
+        thread.start()
+        received = [everything.get() for i in range(100)]
+        thread.join()
+        self.assertEqual(received[-1], ('a', (99, 99)))
+        self.assertEqual(everything.dropped, 0)
+        self.assertEqual(stalled.dropped, 98)
+
+
+class TestParser(unittest.TestCase):
+    def test_parse_line(self):
+        """
+        Tests parsing the output of the different ping programs
+        """
+        f = ping_parser.parse_line
+        #windows
+        self.assertEqual(f('Reply from 192.36.125.18: bytes=32 time=12ms TTL=55'),
+                        (12.0, None, 55, 32))
+        self.assertEqual(f('Reply from 127.0.0.1: bytes=32 time<1ms TTL=128'),
+                        (1.0, None, 128, 32))
+        self.assertEqual(f('Svar fr\xe5n 10.0.0.1: byte=32 tid=3ms TTL=64'),
+                        (3.0, None, 64, 32))
+        #linux iputils and BSD/macOS
+        line = '64 bytes from 192.36.125.18: icmp_seq=7 ttl=55 time=12.3 ms'
+        self.assertEqual(f(line), (12.3, 7, 55, 64))
+        line = '64 bytes from ping.sunet.se (192.36.125.18): icmp_seq=2 ' \
+                'ttl=55 time=0.045 ms'
+        self.assertEqual(f(line), (0.045, 2, 55, 64))
+        #busybox
+        line = '64 bytes from 127.0.0.1: seq=0 ttl=64 time=0.094 ms'
+        self.assertEqual(f(line), (0.094, 0, 64, 64))
+
+    def test_timeout(self):
+        """
+        Tests that timeouts are parsed as NaN and that other lines are
+        ignored
+        """
+        f = ping_parser.parse_line
+        for line in ['Request timed out.', 'General failure.',
+                    'Reply from 10.0.0.1: Destination host unreachable.',
+                    'From 10.0.0.1 icmp_seq=1 Destination Host Unreachable',
+                    'PING: transmit failed. General failure.',
+                    'no answer yet for icmp_seq=5',
+                    'Request timeout for icmp_seq 5']:
+            self.assertTrue(np.isnan(f(line).time), msg=line)
+        self.assertEqual(f('Request timeout for icmp_seq 5').seq, 5)
+
+        for line in ['', 'Pinging ping.sunet.se [192.36.125.18] with 32 '
+                    'bytes of data:', '--- ping.sunet.se ping statistics ---',
+                    'PING 127.0.0.1 (127.0.0.1) 56(84) bytes of data.',
+                    #host names that look like timeouts
+                    'PING timeout.example.com (10.0.0.1) 56(84) bytes of '
+                    'data.', 'Pinging unreachable.example.com [10.0.0.1] '
+                    'with 32 bytes of data:', 'Ping statistics for '
+                    'timedout.example.com:', '--- no-answer.example.com '
+                    'ping statistics ---']:
+            self.assertEqual(f(line), None, msg=line)
+
+    def test_stream(self):
+        """
+        Tests that chunks split in the middle of lines are parsed
+        """
+        stream = ping_parser.ping_stream()
+        data = 'PING 127.0.0.1 (127.0.0.1) 56(84) bytes of data.\n' \
+            '64 bytes from 127.0.0.1: icmp_seq=1 ttl=64 time=0.05 ms\n' \
+            'no answer yet for icmp_seq=2\n' \
+            '64 bytes from 127.0.0.1: icmp_seq=3 ttl=64 time=0.07 ms\n'
+        output = stream.feed(data[:70]) + stream.feed(data[70:130])
+        output += stream.feed(data[130:]) + stream.flush()
+
+        self.assertEqual([parsed.seq for parsed in output], [1, 2, 3])
+        self.assertEqual(output[0].time, 0.05)
+        self.assertTrue(np.isnan(output[1].time))
+        self.assertFalse(stream.ended)
+
+    def test_stream_end(self):
+        """
+        Only the statistics line ends the output, not a host name
+        """
+        stream = ping_parser.ping_stream()
+        stream.feed('PING stats.example.com (10.0.0.1) 56(84) bytes of '
+                    'data.\n--- stats.example.com ping stat')
+        self.assertFalse(stream.ended)
+        stream.feed('istics ---\n')
+        self.assertTrue(stream.ended)
+        stream = ping_parser.ping_stream()
+        stream.feed('\r\nPing statistics for 10.0.0.1:\r\n')
+        self.assertTrue(stream.ended)
+
+class TestRingBuffer(unittest.TestCase):
+    def test_append(self):
+        """
+        Tests appending to the ring buffer, with and without wrapping around
+        """
+        data = history.ring_buffer(5)
+        for i in range(3):
+            data.append(i * 10, i)
+        ping_date, ping_ms = data.view()
+        self.assertListEqual(list(ping_date), [0, 1, 2])
+        self.assertListEqual(list(ping_ms), [0, 10, 20])
+
+        #check that the oldest elements are removed when full
+        for i in range(3, 12):
+            data.append(i * 10, i)
+        ping_date, ping_ms = data.view()
+        self.assertEqual(len(data), 5)
+        self.assertListEqual(list(ping_date), range(7, 12))
+        self.assertListEqual(list(data.view(2)[1]), [100, 110])
+        #the ordered data is a view and not a copy
+        self.assertFalse(ping_ms.flags.owndata)
+
+    def test_snapshot(self):
+        """
+        Tests that snapshots are copies with the current sequence number
+        """
+        data = history.ring_buffer(3)
+        for i in range(4):
+            data.append(i, i)
+        seq, ping_date, ping_ms = data.snapshot(2)
+        self.assertEqual(seq, 4)
+        self.assertListEqual(list(ping_ms), [2, 3])
+        data.append(4, 4)
+        data.append(5, 5)
+        self.assertListEqual(list(ping_ms), [2, 3])
+        self.assertEqual(data.snapshot()[0], 6)
+        self.assertListEqual(list(data.snapshot(start=3.5)[1]), [4, 5])
+        self.assertListEqual(list(data.snapshot(2, 5)[1]), [5])
+
+    def test_nan(self):
+        data = history.ring_buffer(3)
+        data.append(nan, 1.0)
+        self.assertTrue(np.isnan(data.view()[1][0]))
+
+    def test_resize(self):
+        """
+        Tests that resizing keeps the latest elements in order
+        """
+        data = history.ring_buffer(10)
+        for i in range(13):
+            data.append(i, i)
+        #check that it can truncate
+        data.resize(4)
+        self.assertListEqual(list(data.view()[0]), range(9, 13))
+        data.append(13, 13)
+        self.assertListEqual(list(data.view()[0]), range(10, 14))
+        #check that it can grow
+        data.resize(8)
+        for i in range(14, 17):
+            data.append(i, i)
+        self.assertListEqual(list(data.view()[0]), range(10, 17))
+
+class TestStats(unittest.TestCase):
+    def test_windows(self):
+        """
+        Compares the running stats with numpy over the same windows
+        """
+        random = np.random.RandomState(0)
+        data = random.uniform(5, 50, 300)
+        data[random.uniform(size=300) < 0.1] = nan
+        stats = ping_stats.sliding_stats([100, 10])
+
+        for i, ping_ms in enumerate(data):
+            stats.add(ping_ms)
+            for window in stats.windows:
+                latest = data[max(i + 1 - window.length, 0):i + 1]
+                self.assertEqual(window.count, len(latest))
+                self.assertEqual(window.loss_count, np.isnan(latest).sum())
+                if np.isnan(latest).all():
+                    self.assertTrue(np.isnan(window.mean))
+                    continue
+                self.assertAlmostEqual(window.mean, np.nanmean(latest))
+                self.assertAlmostEqual(window.std, np.nanstd(latest))
+                self.assertEqual(window.min, np.nanmin(latest))
+                self.assertEqual(window.max, np.nanmax(latest))
+
+    def test_resize(self):
+        stats = ping_stats.sliding_stats([20, 5])
+        for ping_ms in range(30):
+            stats.add(ping_ms)
+        #shrink and grow the longest window
+        stats.resize(0, 8)
+        self.assertEqual((stats[0].count, stats[0].min), (8, 22))
+        stats.resize(0, 50)
+        self.assertEqual((stats[0].count, stats[0].min), (8, 22))
+        for ping_ms in range(30, 40):
+            stats.add(ping_ms)
+        self.assertEqual((stats[0].count, stats[0].mean), (18, 30.5))
+        self.assertEqual((stats[1].count, stats[1].mean), (5, 37))
+
+    def test_jitter(self):
+        """
+        RFC 3550 jitter and IPDV between consecutive replies
+        """
+        stats = ping_stats.sliding_stats([50, 10])
+        stats.add(10)
+        self.assertTrue(np.isnan(stats.jitter.jitter))
+        for ping_ms in [20, nan, 15]:
+            stats.add(ping_ms)
+        self.assertAlmostEqual(stats.jitter.jitter, 0.625 + 4.375 / 16)
+        self.assertEqual(stats.jitter.ipdv, -5)
+
+    def test_quality(self):
+        """
+        E-model rating and MOS
+        """
+        f = ping_stats.r_factor
+        self.assertAlmostEqual(f(0, 0, 0), 92.96)
+        #delays above 177.3 ms one way are penalised harder
+        self.assertAlmostEqual(f(400, 0, 0), 93.2 - 0.024 * 210 -
+                                0.11 * (210 - 177.3))
+        self.assertTrue(f(20, 2, 0.01) < f(20, 2, 0))
+        self.assertAlmostEqual(ping_stats.mos(92.96), 4.4046, places=4)
+        self.assertEqual(ping_stats.mos(-5), 1)
+        self.assertEqual(ping_stats.mos(120), 4.5)
+        self.assertTrue(np.isnan(ping_stats.sliding_stats([5]).quality()[1]))
+
+class TestSketch(unittest.TestCase):
+    def test_accuracy(self):
+        """
+        The quantiles are within the relative accuracy of numpy's
+        """
+        data = np.random.RandomState(0).lognormal(3, 1, 5000)
+        s = sketch.ddsketch(0.01)
+        for value in data:
+            s.add(value)
+        s.add(nan)
+        self.assertEqual(s.count, 5000)
+        qs = [0.1, 0.5, 0.95, 0.99]
+        for q, value in zip(qs, s.quantiles(qs)):
+            exact = np.percentile(data, q * 100, interpolation='lower')
+            self.assertTrue(abs(value - exact) <= 0.0101 * exact)
+
+    def test_remove_merge(self):
+        a = sketch.ddsketch()
+        b = sketch.ddsketch()
+        for value in [0, 10, 20, 30]:
+            a.add(value)
+        a.remove(30)
+        b.add(40)
+        a.merge(b)
+        self.assertEqual(a.count, 4)
+        self.assertEqual(a.quantile(0), 0)
+        self.assertAlmostEqual(a.quantile(1), 40, delta=0.4)
+        self.assertRaises(ValueError, a.merge, sketch.ddsketch(0.05))
+        self.assertTrue(np.isnan(sketch.ddsketch().quantile(0.5)))
+
+    def test_buckets(self):
+        """
+        Time buckets, their band and merging them
+        """
+        buckets = sketch.sketch_buckets(10, 3)
+        for date in range(0, 50, 2):
+            buckets.add(date, date % 10 + 1.0)
+        #a late ping and a timeout only bucket
+        buckets.add(39, 100)
+        buckets.add(55, nan)
+        dates, values = buckets.band()
+        self.assertListEqual(list(dates), [35, 45])
+        self.assertAlmostEqual(values[1, 0], 5, delta=0.05)
+        self.assertAlmostEqual(values[0, 1], 9, delta=0.1)
+        self.assertListEqual(list(buckets.band(40)[0]), [45])
+        self.assertEqual(buckets.merged(30, 50).count, 11)
+        buckets.resize(1)
+        self.assertEqual(buckets.merged().count, 0)
+
+    def test_window(self):
+        stats = ping_stats.sliding_stats([4])
+        for ping_ms in [100, 1, 2, 3, 4]:
+            stats.add(ping_ms)
+        self.assertAlmostEqual(stats[0].percentiles([1])[0], 4, delta=0.04)
+
+
+class TestDecimate(unittest.TestCase):
+    def test_minmax(self):
+        """
+        Tests that spikes and timeouts are kept when downsampling
+        """
+        ping_date = np.arange(10.0)
+        ping_ms = np.array([1, 9, 2, 3, nan, 4, 5, 6, 7, 8.0])
+        x_out, y_out, columns = decimate.minmax(ping_date, ping_ms, 5.0)
+        #min and max of each column, nan where there was a timeout
+        self.assertListEqual(list(x_out), [0, 4, 4, 5, 9])
+        self.assertListEqual(list(y_out[[0, 1, 3, 4]]), [1, 9, 4, 8])
+        self.assertTrue(np.isnan(y_out[2]))
+        self.assertListEqual(list(columns), [0, 0, 0, 1, 1])
+
+    def test_incremental(self):
+        """
+        Tests that the cached columns give the same result as starting over
+        """
+        random = np.random.RandomState(0)
+        ping_date = np.arange(3000.0)
+        ping_ms = random.uniform(5, 50, 3000)
+        ping_ms[random.uniform(size=3000) < 0.05] = nan
+        decimator = decimate.minmax_decimator()
+        for end in range(1000, 3000, 7):
+            start = end - 1000.0
+            #whole columns, so that the history doesn't start mid column
+            data = slice(int(start) // 10 * 10, end)
+            x_out, y_out = decimator.decimate(ping_date[data],
+                                    ping_ms[data], start, end, 100)
+            x_res, y_res = decimate.minmax_decimator().decimate(
+                            ping_date[data], ping_ms[data], start, end, 100)
+            self.assertListEqual(list(x_out), list(x_res))
+            self.assertListEqual(list(np.isnan(y_out)), list(np.isnan(y_res)))
+            self.assertListEqual(list(np.nan_to_num(y_out)),
+                                list(np.nan_to_num(y_res)))
+            #at most 3 points for each of the 101 columns
+            self.assertLessEqual(len(x_out), 303)
+
+    def test_short(self):
+        ping_date = np.arange(10.0)
+        output = decimate.minmax_decimator().decimate(ping_date, ping_date,
+                                                        0, 10, 100)
+        self.assertIs(output[0], ping_date)
+
+class TestRollup(unittest.TestCase):
+    def test_add_extend(self):
+        """
+        Adding pings one at a time and all at once give the same buckets
+        """
+        dates = np.arange(1000, 1100, 0.5)
+        ping_ms = np.random.RandomState(0).uniform(10, 20, len(dates))
+        ping_ms[::7] = nan
+        a = rollup.rollup_pyramid(((1, 50), (10, 20)))
+        b = rollup.rollup_pyramid(((1, 50), (10, 20)))
+        for date, value in zip(dates, ping_ms):
+            a.add(date, value)
+        b.extend(dates[:60], ping_ms[:60])
+        b.extend(dates[60:], ping_ms[60:])
+        for level_a, level_b in zip(a.levels, b.levels):
+            numbers, fields = level_a.query(0, 2000)
+            self.assertListEqual(list(numbers), list(level_b.query(0, 2000)[0]))
+            for name, values in level_b.query(0, 2000)[1].items():
+                np.testing.assert_allclose(fields[name], values)
+        #the fine level only keeps the newest 50 seconds
+        self.assertEqual(a.levels[0].oldest(), 1050)
+        self.assertEqual(len(a.levels[0].query(0, 2000)[0]), 50)
+
+    def test_level(self):
+        pyramid = rollup.rollup_pyramid(((1, 50), (10, 20)))
+        pyramid.add(1099, 5)
+        self.assertEqual(pyramid.level(1060, 1100, 100).width, 1)
+        #too many buckets, or older than the fine level holds
+        self.assertEqual(pyramid.level(1060, 1100, 10).width, 10)
+        self.assertEqual(pyramid.level(1000, 1100, 100).width, 10)
+        self.assertEqual(pyramid.retention(), 200)
+
+    def test_minmax_summary(self):
+        pyramid = rollup.rollup_pyramid(((1, 100),))
+        for date, value in [(10.2, 5), (10.7, 15), (11.5, nan), (12, 10)]:
+            pyramid.add(date, value)
+        x, y = pyramid.minmax(10, 13, 10)
+        self.assertListEqual(list(x), [10, 11, 11, 12, 12, 13])
+        np.testing.assert_array_equal(y, [5, 15, nan, nan, 10, 10])
+        count, loss_rate, mean, std = pyramid.summary(10, 13)
+        self.assertEqual(count, 4)
+        self.assertAlmostEqual(loss_rate, 0.25)
+        self.assertAlmostEqual(mean, 10)
+        self.assertAlmostEqual(std, np.std([5, 15, 10]))
+        self.assertEqual(pyramid.summary(20, 30)[0], 0)
+
+
+class TestCompress(unittest.TestCase):
+    def test_round_trip(self):
+        """
+        Dates come back to the ms and ping times as 32 bit floats, with
+        timeouts, repeated values and gaps
+        """
+        random = np.random.RandomState(0)
+        ping_date = 1.5e9 + np.arange(3000) + random.uniform(0, 0.01, 3000)
+        ping_date[2000:] += 86400 * 30
+        ping_ms = random.gamma(4, 3, 3000) + 10
+        ping_ms[random.uniform(size=3000) < 0.05] = nan
+        ping_ms[100:110] = 12.5
+        ping_ms[200] = 0
+        encoder = compress.block_encoder()
+        for date, value in zip(ping_date, ping_ms):
+            encoder.append(date, value)
+        block = encoder.block()
+        dates, values = block.decode()
+        self.assertTrue(np.abs(dates - ping_date).max() <= 0.0005)
+        np.testing.assert_array_equal(values,
+                                    ping_ms.astype(np.float32))
+        self.assertTrue(len(block.data) < 6 * 3000)
+
+    def test_series(self):
+        series = compress.block_series(block_size=100, retention=500)
+        for date in range(1000):
+            series.append(date, date % 7 or nan)
+        #blocks ending more than 500 s before the latest ping are dropped
+        self.assertEqual(len(series), 600)
+        self.assertEqual(series.oldest(), 400)
+        dates, values = series.query(450, 720)
+        self.assertListEqual(list(dates), range(450, 720))
+        self.assertEqual(values[6], 456 % 7)
+        self.assertTrue(np.isnan(values[462 - 450]))
+        self.assertEqual(len(series.query(990)[0]), 10)
+        self.assertTrue(series.nbytes() < 2 * len(series))
+
+
+class TestHeatmap(unittest.TestCase):
+    def test_rows(self):
+        counts = heatmap.latency_heatmap(1, 10, low=1, high=1000, rows=3)
+        self.assertEqual(counts._row(0.5), 0)
+        self.assertEqual(counts._row(9.9), 0)
+        self.assertEqual(counts._row(10.1), 1)
+        self.assertEqual(counts._row(500), 2)
+        self.assertEqual(counts._row(1e6), 2)
+        self.assertAlmostEqual(counts.centers[1], np.sqrt(1000))
+
+    def test_rolling(self):
+        """
+        Old columns are reused and pings older than the kept columns are
+        left out
+        """
+        counts = heatmap.latency_heatmap(10, 3, low=1, high=1000, rows=3)
+        for date, ping_ms in [(0, 5), (5, 5), (12, 50), (15, nan),
+                            (25, 500), (31, 5), (3, 5)]:
+            counts.add(date, ping_ms)
+        dates, matrix = counts.matrix(39)
+        self.assertListEqual(list(dates), [15, 25, 35])
+        self.assertListEqual(matrix.tolist(), [[0, 0, 1], [1, 0, 0],
+                                                [0, 1, 0]])
+        self.assertEqual(counts.matrix(69)[1].sum(), 0)
+
+    def test_extend(self):
+        """
+        Counting many pings at once is the same as adding them one by one
+        """
+        ping_date = np.array([0, 5, 12, 15, 25, 31, 3, 41, 44], dtype=float)
+        ping_ms = np.array([5, 0, 50, nan, 500, 5, 5, 1e6, -1])
+        added = heatmap.latency_heatmap(10, 3, low=1, high=1000, rows=3)
+        for date, value in zip(ping_date, ping_ms):
+            added.add(date, value)
+        extended = heatmap.latency_heatmap(10, 3, low=1, high=1000, rows=3)
+        extended.extend(ping_date, ping_ms)
+        self.assertListEqual(extended.matrix(49)[1].tolist(),
+                            added.matrix(49)[1].tolist())
+        self.assertEqual(extended.counts.sum(), 4)
+
+
+class TestStore(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_query(self):
+        """
+        Tests storing and querying over several segment files
+        """
+        directory = store.series_path(self.root, 'ping.sunet.se')
+        writer = store.series_writer(directory, segment_records=100)
+        reader = store.series_reader(directory)
+        for i in range(250):
+            writer.append(1000.0 + i, nan if i % 10 == 0 else i / 2.0)
+
+        ping_date, ping_ms, flags = reader.query(1095.5, 1205)
+        self.assertListEqual(list(ping_date), range(1096, 1205))
+        self.assertEqual(ping_ms[1], 48.5)
+        #timeouts are flagged and kept as nan
+        self.assertEqual(flags[4], store.TIMEOUT)
+        self.assertTrue(np.isnan(ping_ms[4]))
+        self.assertEqual(len(reader.query()[0]), 250)
+        self.assertEqual(len(reader.query(2000)[0]), 0)
+        #the same records a segment at a time
+        chunks = list(reader.chunks(1095.5, 1205))
+        self.assertListEqual([len(chunk[0]) for chunk in chunks],
+                            [4, 100, 5])
+        self.assertListEqual(list(np.concatenate([chunk[0]
+                            for chunk in chunks])), range(1096, 1205))
+
+        #a new writer continues where the last one stopped
+        writer.close()
+        with store.series_writer(directory, segment_records=100) as writer:
+            writer.append(2000.0, 1.0)
+            #the reader sees records appended while it is open
+            self.assertListEqual(list(reader.query(1249)[0]), [1249, 2000])
+            #dates can't go backwards, nor after reopening
+            self.assertRaises(ValueError, writer.append, 1999.0, 1.0)
+        with store.series_writer(directory, segment_records=100) as writer:
+            self.assertRaises(ValueError, writer.append, 1999.0, 1.0)
+        reader.close()
+
+    def test_empty_segment(self):
+        """
+        A reader opened while the last segment is empty finds its records
+        after the writer has moved on to newer segments
+        """
+        directory = store.series_path(self.root, 'host')
+        writer = store.series_writer(directory, segment_records=4)
+        reader = store.series_reader(directory)
+        for i in range(12):
+            writer.append(100.0 + i, 1.0)
+        self.assertListEqual(list(reader.query(100, 102)[0]), [100, 101])
+        self.assertListEqual(list(reader.query(101, 105)[0]),
+                            [101, 102, 103, 104])
+        writer.close()
+        reader.close()
+
+class TestCli(unittest.TestCase):
+    def test_no_gui_imports(self):
+        """
+        Tests that the command line program doesn't import the GUI stack
+        """
+        code = 'import sys, ping_cli; ' \
+            'print(sorted(m for m in sys.modules if m.split(".")[0] in ' \
+            '("wx", "matplotlib", "wxplot", "ping_gui")))'
+        output = subprocess.check_output([sys.executable, '-c', code],
+                                        cwd=path.dirname(path.abspath(__file__)))
+        self.assertEqual(output.strip(), '[]')
+
+    def test_stats(self):
+        options = ping_cli.parse_args(['127.0.0.1', '-t', '500', '-H', '50'])
+        self.assertEqual((options.hosts, options.timeout, options.history),
+                        (['127.0.0.1'], 500, 50))
+        stats = ping_stats.sliding_stats([50, 10])
+        for ping_ms in [10, 20, nan, 30]:
+            stats.add(ping_ms)
+        self.assertEqual(ping_cli.format_stats('host', stats),
+            'host: last 4: 20.0+-8.2 ms (min 10.0, max 30.0), loss 25 % | '
+            'last 4: 20.0+-8.2 ms (min 10.0, max 30.0), loss 25 %')
+
+
+class TestScheduler(unittest.TestCase):
+    def test_stagger(self):
+        """
+        The first probes are spread evenly over the interval
+        """
+        s = scheduler.probe_scheduler(4, 1.0, start=0)
+        self.assertListEqual(s.pop_due(0), [0])
+        self.assertEqual(s.next_due(), 250000000)
+        self.assertListEqual(s.pop_due(999999999), [1, 2, 3])
+        self.assertListEqual(s.pop_due(10**9), [0])
+
+    def test_no_drift(self):
+        """
+        Late probes don't move the following ones, missed ones are skipped
+        """
+        s = scheduler.probe_scheduler(1, 0.01, start=0)
+        s.pop_due(0)
+        #late by most of an interval
+        self.assertListEqual(s.pop_due(19000000), [0])
+        self.assertEqual(s.next_due(), 20000000)
+        self.assertAlmostEqual(s.delay(15000000), 0.005)
+        #three intervals late
+        s.pop_due(55000000)
+        self.assertEqual(s.next_due(), 60000000)
+        self.assertEqual(s.skipped, 3)
+        self.assertEqual(s.delay(70000000), 0)
+        self.assertRaises(ValueError, scheduler.probe_scheduler, 1, 0.001)
+
+    def test_clock(self):
+        """
+        Counter values map to dates
+        """
+        now = scheduler.counter_ns()
+        self.assertTrue(scheduler.counter_ns() >= now)
+        self.assertAlmostEqual(scheduler.to_date(now), time(), places=1)
+        self.assertAlmostEqual(scheduler.to_date(now + 1500000000) -
+                                scheduler.to_date(now), 1.5)
+        #a monotonic clock counts from boot or so, not from the epoch
+        self.assertTrue(abs(now / 1e9 - time()) > 3600)
+
+    def test_threads(self):
+        """
+        The clock never goes backwards in any of several threads reading it
+        at once
+        """
+        backwards = []
+        def read():
+            last = scheduler.counter_ns()
+            for i in range(20000):
+                now = scheduler.counter_ns()
+                if now < last:
+                    backwards.append((last, now))
+                last = now
+        threads = [threading.Thread(target=read) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertListEqual(backwards, [])
+
+
+class TestLayout(unittest.TestCase):
+    def test_grow(self):
+        """
+        Plots fill the free room before the layout is expanded
+        """
+        vertical, horizontal = wxplot.wx.VERTICAL, wxplot.wx.HORIZONTAL
+        self.assertEqual(wxplot._grow_layout((1, 1, 1), vertical),
+                        (2, 1, 2))
+        self.assertEqual(wxplot._grow_layout((1, 1, 1), horizontal),
+                        (1, 2, 2))
+        self.assertEqual(wxplot._grow_layout((2, 2, 3), vertical),
+                        (2, 2, 4))
+        self.assertEqual(wxplot._grow_layout((1, 1, 0), horizontal),
+                        (1, 1, 1))
+
+    def test_shrink(self):
+        """
+        A row or column is dropped as soon as the plots fit without it
+        """
+        layouts = [(2, 2, 4)]
+        while layouts[-1][-1]:
+            layouts.append(wxplot._shrink_layout(layouts[-1]))
+        self.assertListEqual(layouts, [(2, 2, 4), (2, 2, 3), (1, 2, 2),
+                                        (1, 1, 1), (1, 1, 0)])
+        self.assertEqual(wxplot._shrink_layout((2, 3, 6)), (2, 3, 5))
+        self.assertEqual(wxplot._shrink_layout((2, 3, 5)), (2, 2, 4))
+
+    def test_cells(self):
+        """
+        The plots on a last row that isn't full are widened to fill it
+        """
+        self.assertListEqual(wxplot._subplot_cells((1, 1, 0)), [])
+        self.assertListEqual(wxplot._subplot_cells((2, 2, 3)),
+                            [(0, 0, 2), (0, 1, 2), (1, 0, 1)])
+        self.assertListEqual(wxplot._subplot_cells((2, 3, 5)),
+                            [(0, 0, 3), (0, 1, 3), (0, 2, 3), (1, 0, 2),
+                            (1, 1, 2)])
+
+    def test_hundred(self):
+        """
+        Growing to 100 plots and shrinking back keeps every plot in a cell
+        of its own
+        """
+        layout = (1, 1, 1)
+        for i in range(99):
+            layout = wxplot._grow_layout(layout, wxplot.wx.VERTICAL)
+        self.assertEqual(layout, (100, 1, 100))
+        self.assertEqual(len(set(wxplot._subplot_cells(layout))), 100)
+        self.assertEqual(len(set(wxplot._subplot_cells((10, 10, 95)))),
+                        95)
+        layout = (10, 10, 100)
+        while layout[-1] > 1:
+            layout = wxplot._shrink_layout(layout)
+            rows, cols, count = layout
+            self.assertTrue(rows * cols >= count)
+            #no row or column is left empty
+            self.assertTrue((rows - 1) * cols < count or rows == 1)
+        self.assertEqual(layout, (1, 1, 1))
+
+    def test_remove_twin(self):
+        """
+        Removing a plot also removes its secondary y-axis from the figure
+        """
+        figure = wxplot.Figure()
+        plots = wxplot._plot_list(figure)
+        plots.append(figure.add_subplot(211), '')
+        plots.append(figure.add_subplot(212), '')
+        plots(1).y2_axis = plots(1).axes.twinx()
+        plots.remove()
+        self.assertListEqual(figure.axes, [plots(0).axes])
+
+
+class TestMain(unittest.TestCase):
+    def test_axis_limit(self):
+        """
+        Tests the axis limit function
+        """
+        arg1 = [-100, 0]
+        arg2 = 70
+        arg3 = [nan, 30, 10, 90]
+        arg4 = [nan, 30, 10, 50]
+        result1 = [-100, 0, 0, 95]
+        result2 = [-100, 0, 0, 75]
+        output1 = ping_gui.axis_limit(arg1, arg2, arg3)
+        output2 = ping_gui.axis_limit(arg1, arg2, arg4)
+
+        self.assertListEqual(output1, result1)
+        self.assertListEqual(output2, result2)
+
+
+    def test_limit_hysteresis(self):
+        """
+        Tests that the y-axis grows in steps and shrinks lazily
+        """
+        f = ping_gui.limit_hysteresis
+        current = [-100, 0, 0, 75]
+        #grows to a round number
+        self.assertListEqual(f(current, [-100, 0, 0, 95]), [-100, 0, 0, 100])
+        self.assertListEqual(f(current, [-100, 0, 0, 160]), [-100, 0, 0, 200])
+        #keeps the top while the data fits and isn't much lower
+        self.assertListEqual(f(current, [-100, 0, 0, 40]), [-100, 0, 0, 75])
+        self.assertListEqual(f(current, [-200, 0, 0, 60]), [-200, 0, 0, 75])
+        #shrinks when the data is far below the top
+        self.assertListEqual(f([-100, 0, 0, 700], [-100, 0, 0, 75]),
+                            [-100, 0, 0, 100])
+
+    def test_split_hosts(self):
+        """
+        Tests splitting the server field into hosts
+        """
+        f = ping_gui.split_hosts
+        self.assertListEqual(f('ping.sunet.se'), ['ping.sunet.se'])
+        self.assertListEqual(f(' a.se, b.se;c.se  a.se\t'),
+                            ['a.se', 'b.se', 'c.se'])
+        self.assertListEqual(f(' , '), [])
+
+    def test_time_diff(self):
+        """
+        Tests the time diff function.
+        Subtracts a value from a list of values
+        """
+        data = [1.0, 2.0, 3.0]
+        result = [0.0, 1.0, 2.0]
+        diff = ping_gui.get_time_diff(data, 1.0)
+        #check that the value 1.0 has been subtracted from each element
+        self.assertListEqual(diff, result)
+
+
+    def test_nan_line_creator(self):
+        """
+        test nan_line_creator
+        """
+        x_data = range(5)
+        y_data = [1, nan, 3, 1, 2]
+        x_res = [0, 2]
+        y_res = [1, 3]
+
+        #short name for the function under test
+        f = ping_gui.nan_line_creator
+        #first simple test
+        x_out, y_out = f(x_data, y_data)
+
+        self.assertListEqual(x_out, x_res)
+        self.assertListEqual(y_out, y_res)
+
+        #a nan element in the as the first and last element
+        x_data = range(5)
+        y_data = [nan, 4, 3, 1, nan]
+        x_res = [0, 1, nan, 3, 4]
+        y_res = [4, 4, nan, 1, 1]
+
+        x_out, y_out = f(x_data, y_data)
+        self.assertListEqual(x_out, x_res)
+        self.assertListEqual(y_out, y_res)
+
+        #test handling of multiple consecutive nan elements
+        x_data = range(8)
+        y_data = [3, nan, nan, nan, 2, nan, nan, 5]
+        x_res = [0, 4, nan, 4, 7]
+        y_res = [3, 2, nan, 2, 5]
+
+        x_out, y_out = f(x_data, y_data)
+        self.assertListEqual(x_out, x_res)
+        self.assertListEqual(y_out, y_res)
+
+
+        #test handling of multiple consecutive nan elements at start
+        x_data = range(10)
+        y_data = [nan, nan, nan, nan, 2, nan, nan, 5, nan, nan]
+        x_res = [0, 4, nan, 4, 7, nan, 7, 9]
+        y_res = [2, 2, nan, 2, 5, nan, 5, 5]
+
+        x_out, y_out = f(x_data, y_data)
+        self.assertListEqual(x_out, x_res)
+        self.assertListEqual(y_out, y_res)
+
+        #test that a single nan element causes no error
+        x_data = [0]
+        y_data = [nan]
+        x_out, y_out = f(x_data, y_data)
+
+        #nothing to span when all or no elements are nan
+        self.assertEqual(f(range(3), [nan]*3), ([], []))
+        self.assertEqual(f(range(3), [1, 2, 3]), ([], []))
+
+        #numpy arrays as given by the ring buffer
+        x_out, y_out = f(np.arange(5.0), np.array([1, nan, 3, 1, 2.0]))
+        self.assertListEqual(x_out, [0, 2])
+        self.assertListEqual(y_out, [1, 3])
+
+
+
+
+
+if __name__ == '__main__' or True:
+    
+    tests_to_run = [TestPing, TestPingReader, TestPingNative, TestMultiPing,
+                    TestSharedRing, TestShards, TestReplay, TestBus,
+                    TestParser, TestRingBuffer, TestStats, TestSketch,
+                    TestDecimate, TestRollup, TestCompress, TestHeatmap,
+                    TestStore, TestCli, TestScheduler, TestLayout,
+                    TestMain]
+    suites_list = []
+    for test_class in tests_to_run:
+        suite = unittest.TestLoader().loadTestsFromTestCase(test_class)
+        suites_list.append(suite)
+    big_suite = unittest.TestSuite(suites_list)
+    unittest.TextTestRunner(verbosity=2).run(big_suite)
+    
+    #sleep(3)
+
+
+
+
+
+